@@ -1,29 +1,50 @@
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory
 import os
 import time
-from questions import get_job_questions
-from speaker import speak, USE_OPENAI_TTS, check_voice_services, set_voice
-from transcriber import transcribe_audio
-from recorder import record_audio_threaded, stop_current_recording
-from evaluater import evaluate_response
+from questions import get_job_questions, suggested_jobs_request, parse_job_list, FALLBACK_JOBS
+import speaker
+from speaker import speak, prefetch_speech, check_voice_services, resolve_voice
+from transcriber import get_inference_service
+from recorder import recording_options
+from config import WARMUP_DELAY, SPEECH_PAUSE_SECONDS, report_config
+from backends import registry
+from llm_cache import cached_chat, get_llm_cache
+from openai_client import get_openai_client
+import metrics
+from sessions import SessionStore, InterviewSession, format_sse
+import interview
+from interview import AnswerPipeline
 import threading
-import json
+import uuid
+from log import get_logger
+
+log = get_logger(__name__)
 
 app = Flask(__name__)
 
-interview_state = {
-    "job": "",
-    "current_question_index": -1,
-    "questions": [],
-    "answers": [],
-    "feedbacks": [],
-    "is_recording": False,
-    "is_processing": False,
-    "is_complete": False,
-    "using_openai_tts": USE_OPENAI_TTS,
-    "interviewer_name": "",
-    "interviewer_voice": ""
-}
+# Interview state is kept per browser session; the id travels in a cookie
+# (or the X-Session-Id header for non-browser clients)
+SESSION_COOKIE = "interview_session"
+USER_COOKIE = "interview_user"  # Long-lived; owns the interview history of this browser
+USER_COOKIE_MAX_AGE = 365 * 24 * 3600
+sessions = SessionStore()
+
+# Server-Sent Events settings for /api/events
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 2000
+
+def get_session_id():
+    return request.headers.get("X-Session-Id") or request.cookies.get(SESSION_COOKIE)
+
+def get_user_id():
+    return request.headers.get("X-User-Id") or request.cookies.get(USER_COOKIE)
+
+def get_session():
+    """Resolve the interview session for the current request, or None"""
+    return sessions.get(get_session_id())
+
+def no_session_response():
+    return jsonify({"status": "error", "message": "Interview not started"})
 
 @app.route('/')
 def serve():
@@ -40,7 +61,7 @@ def get_voice_status():
     voice_status = check_voice_services()
     
     return jsonify({
-        "using_openai_tts": USE_OPENAI_TTS,
+        "using_openai_tts": speaker.USE_OPENAI_TTS,
         "active_voice": voice_status["active"],
         "status": voice_status
     })
@@ -48,33 +69,51 @@ def get_voice_status():
 # Try to reconnect to voice services
 @app.route('/api/check_voice', methods=['GET'])
 def refresh_voice():
-    voice_status = check_voice_services()
+    voice_status = check_voice_services(retest=True)
     
     return jsonify({
-        "using_openai_tts": USE_OPENAI_TTS,
+        "using_openai_tts": speaker.USE_OPENAI_TTS,
         "active_voice": voice_status["active"],
         "status": voice_status
     })
 
+@app.route('/api/ready', methods=['GET'])
+def get_readiness():
+    """Readiness probe: 200 once every required backend has loaded, 503 while warming up"""
+    status = registry.status()
+    return jsonify(status), (200 if status["ready"] else 503)
+
+@app.route('/api/inference', methods=['GET'])
+def get_inference_stats():
+    """Queue depth and latency of the shared transcription workers"""
+    inference_service = get_inference_service() if registry.is_ready("transcription") else None
+    if inference_service is None:
+        return jsonify({"status": "unavailable", "message": "Local Whisper model not loaded"})
+    return jsonify({"status": "ok", **inference_service.stats()})
+
+@app.route('/api/llm_cache', methods=['GET'])
+def get_llm_cache_stats():
+    """Hit/miss counters of the shared chat completion cache"""
+    return jsonify(get_llm_cache().stats())
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Latency histograms, fallback counters and cache hit rates for Prometheus"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
 @app.route('/api/jobs', methods=['GET'])
 def get_suggested_jobs():
     """Return a list of suggested job roles using GPT"""
     try:
-        from openai import OpenAI
-        from config import OPENAI_API_KEY
-        
-        # Initialize the client with minimal required parameters
-        client = OpenAI(api_key=OPENAI_API_KEY)
+        # Shared pooled client; no new connection per request
+        client = get_openai_client("chat")
         
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": "Generate a list of 10 diverse and popular job titles that people might want to practice interviewing for. Return only the job titles, one per line, without any numbering or extra text."}]
-            )
+            # The same prompt is sent on every page load, so this is normally a cache hit
+            jobs_text = cached_chat(client, "jobs", **suggested_jobs_request())
             
             # Parse the response
-            jobs_text = response.choices[0].message.content
-            suggested_jobs = [job.strip() for job in jobs_text.split('\n') if job.strip()]
+            suggested_jobs = parse_job_list(jobs_text)
             
             # Ensure we have at least some job suggestions
             if not suggested_jobs:
@@ -82,36 +121,15 @@ def get_suggested_jobs():
                 
             return jsonify({"jobs": suggested_jobs})
         except Exception as e:
-            print(f"Error generating job suggestions with API: {e}")
+            log.warning(f"Error generating job suggestions with API: {e}")
             raise e
     except Exception as e:
-        print(f"Error generating job suggestions: {e}")
+        log.warning(f"Error generating job suggestions: {e}")
         # Fallback generic job roles
-        fallback_jobs = [
-            "Software Engineer", "Product Manager", "Data Scientist", 
-            "Marketing Manager", "UX Designer", "Project Manager"
-        ]
-        return jsonify({"jobs": fallback_jobs})
+        return jsonify({"jobs": FALLBACK_JOBS})
 
 @app.route('/api/start', methods=['POST'])
 def start_interview():
-    global interview_state
-    
-    # Reset interview state
-    interview_state = {
-        "job": "",
-        "current_question_index": -1,
-        "questions": [],
-        "answers": [],
-        "feedbacks": [],
-        "is_recording": False,
-        "is_processing": False,
-        "is_complete": False,
-        "using_openai_tts": USE_OPENAI_TTS,
-        "interviewer_name": "",
-        "interviewer_voice": ""
-    }
-    
     # Get job role from request
     data = request.json
     job = data.get('job', '').strip()
@@ -124,7 +142,7 @@ def start_interview():
     
     # Get interviewer settings
     interviewer_name = data.get('interviewer_name', 'Kashmala')
-    interviewer_voice = data.get('interviewer_voice', 'shimmer')
+    interviewer_voice = resolve_voice(data.get('interviewer_voice', 'shimmer'))
     
     # Generate questions for this job role
     try:
@@ -134,177 +152,160 @@ def start_interview():
     except Exception as e:
         return jsonify({"status": "error", "message": f"Error generating questions: {str(e)}"})
     
-    interview_state["job"] = job
-    interview_state["questions"] = questions
-    interview_state["interviewer_name"] = interviewer_name
-    interview_state["interviewer_voice"] = interviewer_voice
-    
-    # Set the voice to use
-    set_voice(interviewer_voice)
+    # Start a fresh session, replacing any previous interview from this browser
+    user_id = get_user_id() or uuid.uuid4().hex
+    session = interview.start_session(sessions, job, questions, interviewer_name, interviewer_voice,
+                                      replace_id=get_session_id(), user_id=user_id)
     
     # Start interview with welcome message
     def speak_welcome():
+        # Synthesize the first question while the welcome plays
+        prefetch_speech(session.questions[1], voice=session.interviewer_voice)
+        
         # Speak the welcome message (first item in questions array)
-        welcome_message = interview_state["questions"][0]
-        speak(welcome_message)
-        time.sleep(1)
+        speak(session.questions[0], voice=session.interviewer_voice)
+        time.sleep(SPEECH_PAUSE_SECONDS)
         
         # Move to the first actual question (index 1 in the array)
-        interview_state["current_question_index"] = 1
-        speak(interview_state["questions"][1])
+        session.update("next_question", current_question_index=1)
+        speak(session.questions[1], voice=session.interviewer_voice)
+        session.update("speech_done", is_speaking=False)
     
-    threading.Thread(target=speak_welcome).start()
+    threading.Thread(target=speak_welcome, daemon=True).start()
     
-    return jsonify({
-        "status": "success", 
-        "message": "Interview started",
-        "job": job,
-        "questions": questions,
-        "using_openai_tts": USE_OPENAI_TTS
-    })
+    response = jsonify(interview.session_started(session))
+    response.set_cookie(SESSION_COOKIE, session.session_id, httponly=True, samesite="Lax")
+    response.set_cookie(USER_COOKIE, user_id, max_age=USER_COOKIE_MAX_AGE, httponly=True, samesite="Lax")
+    return response
 
 @app.route('/api/state', methods=['GET'])
 def get_state():
-    return jsonify(interview_state)
+    """Full state snapshot; supports conditional requests via a version ETag"""
+    session = get_session()
+    if session is None:
+        # No interview yet (or it was evicted): report a blank, not-started state
+        return jsonify(InterviewSession("", using_openai_tts=speaker.USE_OPENAI_TTS).to_dict())
+    
+    etag = f"{session.session_id}-{session.version}"
+    if etag in request.if_none_match:
+        return Response(status=304, headers={"ETag": f'"{etag}"'})
+    
+    response = jsonify(session.to_dict())
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
-@app.route('/api/record', methods=['POST'])
-def record_answer():
-    if interview_state["current_question_index"] < 0:
-        return jsonify({"status": "error", "message": "Interview not started"})
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """Push state transitions to the browser as Server-Sent Events.
     
-    if interview_state["is_recording"] or interview_state["is_processing"]:
-        return jsonify({"status": "error", "message": "Already recording or processing"})
+    The first message is a full snapshot; after that only versioned deltas
+    are sent. Clients that reconnect with Last-Event-ID get just the events
+    they missed, or a fresh snapshot if those have rolled out of the log.
+    """
+    session = get_session()
+    if session is None:
+        return no_session_response(), 404
     
-    interview_state["is_recording"] = True
+    try:
+        last_version = int(request.headers.get("Last-Event-ID", ""))
+    except ValueError:
+        last_version = None
     
-    def recording_finished():
-        process_recording_result()
+    def generate():
+        version = last_version
+        # Tell the browser how long to wait before reconnecting
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while not session.closed:
+            missed = session.events_since(version) if version is not None else None
+            if missed is None:
+                snapshot = session.to_dict()
+                version = snapshot["version"]
+                yield format_sse("snapshot", snapshot, version)
+            else:
+                for delta in missed:
+                    version = delta["version"]
+                    yield format_sse("delta", delta, version)
+            
+            if not session.wait_for_change(version, SSE_HEARTBEAT_SECONDS):
+                # Comment line keeps proxies from closing an idle connection
+                session.touch()
+                yield ": keep-alive\n\n"
     
-    # Record the answer
-    index = interview_state["current_question_index"]
-    filename = f"answer_{index}.wav"
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+@app.route('/api/record', methods=['POST'])
+def record_answer():
+    session = get_session()
+    if session is None:
+        return no_session_response()
+    
+    # Optional body: {"mode": "voice"} ends the answer automatically when the candidate stops talking
+    try:
+        mode, end_silence_ms = recording_options(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     
-    # Start recording in a thread - using manual recording mode
-    record_audio_threaded(
-        filename,
-        callback=recording_finished,
-        manual_mode=True  # Use manual mode (requires explicit stop)
-    )
+    index, error = interview.begin_recording(session)
+    if error is not None:
+        return jsonify(error)
     
-    return jsonify({"status": "success", "message": "Recording started - press stop when finished"})
+    def recording_finished(streamer, capture):
+        AnswerPipeline(session, streamer, capture).run()
+    
+    # Start recording in a thread; the pipeline runs on it once the answer ends
+    return jsonify(interview.start_recording(session, index, mode, end_silence_ms, recording_finished))
 
 @app.route('/api/stop_recording', methods=['POST'])
 def stop_recording():
     """Stop the current recording session"""
-    print("\n=== STOP RECORDING API CALLED ===")
-    print(f"Current interview state: {json.dumps(interview_state, indent=2)}")
-    
-    if not interview_state["is_recording"]:
-        print("ERROR: Attempted to stop recording but not currently recording")
-        print(f"Current question index: {interview_state['current_question_index']}")
-        print(f"Is processing: {interview_state['is_processing']}")
-        return jsonify({"status": "error", "message": "Not currently recording"})
-    
-    # Call the stop function
-    print("Stopping recording via API request")
-    success = stop_current_recording()
+    session = get_session()
+    if session is None:
+        return no_session_response()
     
-    # Add a safety measure to ensure the recording state is properly reset
-    if success:
-        # Don't actually set is_recording to False here, let the callback handle it
-        print("Successfully requested recording to stop")
-    else:
-        print("WARNING: Failed to stop recording, forcing state reset")
-        interview_state["is_recording"] = False
-    
-    print("=== END STOP RECORDING API ===\n")
-    return jsonify({"status": "success", "message": "Recording stop requested"})
+    return jsonify(interview.stop_recording(session))
 
 @app.route('/api/reset_recording', methods=['POST'])
 def reset_recording_state():
     """Emergency endpoint to reset the recording state if it gets stuck"""
-    global interview_state
-    
-    print("\n=== EMERGENCY RECORDING STATE RESET ===")
-    print(f"Previous state: {json.dumps(interview_state, indent=2)}")
-    
-    # Reset all relevant flags
-    interview_state["is_recording"] = False
-    interview_state["is_processing"] = False
+    session = get_session()
+    if session is None:
+        return no_session_response()
     
-    # Also reset the recorder module's state
-    from recorder import recording_active, stop_recording
-    if recording_active:
-        print("Resetting recorder module's recording_active flag")
-        import recorder
-        recorder.recording_active = False
-        recorder.stop_recording = True
-    
-    print(f"New state: {json.dumps(interview_state, indent=2)}")
-    print("=== EMERGENCY RESET COMPLETE ===\n")
-    
-    return jsonify({
-        "status": "success", 
-        "message": "Recording state has been reset"
-    })
+    return jsonify(interview.reset_recording(session))
 
-def process_recording_result():
-    # This function is called after recording finishes
-    print(f"Processing recording result. Current state: recording={interview_state['is_recording']}, processing={interview_state['is_processing']}")
-    interview_state["is_recording"] = False
-    interview_state["is_processing"] = True
-    print("Set is_recording=False, is_processing=True")
-    
-    # Get the current index
-    index = interview_state["current_question_index"]
-    filename = f"answer_{index}.wav"
-    
-    # Transcribe the answer
-    try:
-        print(f"Transcribing answer from {filename}")
-        answer = transcribe_audio(filename)
-        interview_state["answers"].append(answer)
-        print(f"Transcription result: {answer[:50]}...")
-        
-        # Evaluate the response
-        question = interview_state["questions"][index]
-        print(f"Evaluating response to: {question}")
-        feedback = evaluate_response(question, answer)
-        interview_state["feedbacks"].append(feedback)
-        print(f"Feedback: {feedback[:50]}...")
-        
-        # Speak the feedback
-        speak(feedback)
-        time.sleep(1)
-        
-        # Move to next question or complete interview
-        print(f"Moving to next question. Current index: {interview_state['current_question_index']}")
-        interview_state["current_question_index"] += 1
-        print(f"New index: {interview_state['current_question_index']}, Total questions: {len(interview_state['questions'])}")
-        
-        # Note: index 0 was the welcome message, so we include it in the length check
-        if interview_state["current_question_index"] < len(interview_state["questions"]):
-            # Speak the next question
-            next_question = interview_state["questions"][interview_state["current_question_index"]]
-            print(f"Next question: {next_question}")
-            speak(next_question)
-        else:
-            interview_state["is_complete"] = True
-            interviewer_name = interview_state["interviewer_name"]
-            print("Interview complete")
-            speak(f"That completes our interview session. Thank you for practicing with me today! This is {interviewer_name}, wishing you the best of luck with your job search.")
-    except Exception as e:
-        print(f"Error processing recording: {e}")
-    finally:
-        # Make sure to reset processing state when done
-        interview_state["is_processing"] = False
-        print("Set is_processing=False")
+@app.route('/api/history', methods=['GET'])
+def get_history_page():
+    """This browser's past interviews, newest first; pass next_cursor back as ?cursor= for the next page"""
+    body, status = interview.history_sessions(get_user_id(), request.args)
+    return jsonify(body), status
+
+@app.route('/api/history/answers', methods=['GET'])
+def get_history_answers():
+    """This browser's answers across all interviews, newest first, keyset-paginated like /api/history"""
+    body, status = interview.history_answers(get_user_id(), request.args)
+    return jsonify(body), status
+
+@app.route('/api/history/<session_id>', methods=['GET'])
+def get_history_session(session_id):
+    """One past interview with its questions, answers, feedback and timings"""
+    body, status = interview.history_session(get_user_id(), session_id)
+    return jsonify(body), status
 
 if __name__ == '__main__':
+    report_config()
     print("\n" + "=" * 60)
     print("🤖 AI INTERVIEW COACH 🤖")
     print("=" * 60)
     print("Open your browser at http://localhost:8080 to start")
-    print("Using OpenAI TTS: " + ("YES" if USE_OPENAI_TTS else "NO - using system voice"))
+    print("Backends load in the background; check /api/ready for status")
     print("=" * 60 + "\n")
+    
+    # Warm backends after the server is up. With the debug reloader only the
+    # child process (WERKZEUG_RUN_MAIN) serves requests, so only it warms up.
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        registry.warm_up(delay=WARMUP_DELAY)
     app.run(debug=True, port=8080) 
\ No newline at end of file
@@ -0,0 +1,452 @@
+"""
+Async (ASGI) serving mode for the interview API.
+
+Serves the same endpoints and JSON as app.py, but the handlers and the
+post-answer pipeline are coroutines. GPT calls go through the shared
+AsyncOpenAI client. Blocking work runs on bounded thread pools: one for
+transcription, one for audio playback and one for everything else (such as
+the first load of each backend). A session that is
+waiting on GPT or holding an open /api/events stream costs a coroutine,
+not a thread.
+
+Needs starlette and uvicorn:
+    pip install starlette uvicorn
+    python asgi_app.py                 # or: uvicorn asgi_app:app --port 8080
+"""
+import asyncio
+import contextlib
+import functools
+import os
+import queue
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from starlette.applications import Starlette
+    from starlette.responses import FileResponse, JSONResponse, Response, StreamingResponse
+    from starlette.routing import Mount, Route
+    from starlette.staticfiles import StaticFiles
+except ImportError as e:
+    raise SystemExit(f"The ASGI server needs starlette and uvicorn ({e}); run: pip install starlette uvicorn")
+
+import speaker
+from speaker import speak, speak_stream, prefetch_speech, check_voice_services, resolve_voice
+from transcriber import get_inference_service
+from recorder import recording_options
+from evaluater import evaluate_response_async, stream_evaluation_async
+from questions import get_job_questions_async, suggested_jobs_request, parse_job_list, FALLBACK_JOBS
+from config import (FEEDBACK_STREAMING, WARMUP_DELAY, SPEECH_PAUSE_SECONDS,
+                    ASGI_BLOCKING_WORKERS, ASGI_INFERENCE_WORKERS, ASGI_PLAYBACK_WORKERS, report_config)
+from backends import registry
+from llm_cache import cached_chat_async, get_llm_cache
+import interview
+from interview import AnswerPipeline
+import metrics
+from openai_client import get_async_openai_client
+from sessions import SessionStore, InterviewSession, format_sse
+from log import get_logger
+
+log = get_logger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Same cookie and SSE settings as the Flask server
+SESSION_COOKIE = "interview_session"
+USER_COOKIE = "interview_user"
+USER_COOKIE_MAX_AGE = 365 * 24 * 3600
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 2000
+
+sessions = SessionStore()
+blocking_executor = ThreadPoolExecutor(max_workers=ASGI_BLOCKING_WORKERS, thread_name_prefix="asgi-blocking")
+inference_executor = ThreadPoolExecutor(max_workers=ASGI_INFERENCE_WORKERS, thread_name_prefix="asgi-inference")
+playback_executor = ThreadPoolExecutor(max_workers=ASGI_PLAYBACK_WORKERS, thread_name_prefix="asgi-playback")
+
+# The event loop only keeps weak references to tasks
+background_tasks = set()
+
+
+def spawn(coro):
+    """Run `coro` in the background, keeping it alive until it finishes"""
+    task = asyncio.ensure_future(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the worker pool without stalling the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_inference(func, *args, **kwargs):
+    """run_blocking for transcription"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_playback(func, *args, **kwargs):
+    """run_blocking for speech, which holds its thread for as long as the audio plays"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(playback_executor, functools.partial(func, *args, **kwargs))
+
+
+def get_session(request):
+    session_id = request.headers.get("x-session-id") or request.cookies.get(SESSION_COOKIE)
+    return sessions.get(session_id)
+
+
+def get_user_id(request):
+    return request.headers.get("x-user-id") or request.cookies.get(USER_COOKIE)
+
+
+def no_session_response(status_code=200):
+    return JSONResponse({"status": "error", "message": "Interview not started"}, status_code=status_code)
+
+
+def if_none_match(request):
+    """Entity tags from the If-None-Match header, without quotes or weak prefixes"""
+    tags = set()
+    for tag in request.headers.get("if-none-match", "").split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag:
+            tags.add(tag.strip('"'))
+    return tags
+
+
+async def serve(request):
+    return FileResponse(os.path.join(BASE_DIR, "templates", "index.html"))
+
+
+async def voice_status_response(retest):
+    if retest:
+        # Re-testing synthesizes a phrase with OpenAI TTS
+        voice_status = await run_blocking(check_voice_services, retest=True)
+    else:
+        voice_status = check_voice_services()
+    return JSONResponse({
+        "using_openai_tts": speaker.USE_OPENAI_TTS,
+        "active_voice": voice_status["active"],
+        "status": voice_status
+    })
+
+
+async def get_voice_status(request):
+    return await voice_status_response(retest=False)
+
+
+async def refresh_voice(request):
+    return await voice_status_response(retest=True)
+
+
+async def get_readiness(request):
+    """Readiness probe: 200 once every required backend has loaded, 503 while warming up"""
+    status = registry.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+async def get_inference_stats(request):
+    """Queue depth and latency of the shared transcription workers"""
+    inference_service = get_inference_service() if registry.is_ready("transcription") else None
+    if inference_service is None:
+        return JSONResponse({"status": "unavailable", "message": "Local Whisper model not loaded"})
+    return JSONResponse({"status": "ok", **inference_service.stats()})
+
+
+async def get_llm_cache_stats(request):
+    """Hit/miss counters of the shared chat completion cache"""
+    return JSONResponse(get_llm_cache().stats())
+
+
+async def get_metrics(request):
+    """Latency histograms, fallback counters and cache hit rates for Prometheus"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+async def get_suggested_jobs(request):
+    """Return a list of suggested job roles using GPT"""
+    try:
+        client = get_async_openai_client("chat")
+        suggested_jobs = parse_job_list(await cached_chat_async(client, "jobs", **suggested_jobs_request()))
+        if not suggested_jobs:
+            raise Exception("No job suggestions generated")
+        return JSONResponse({"jobs": suggested_jobs})
+    except Exception as e:
+        log.warning(f"Error generating job suggestions: {e}")
+        return JSONResponse({"jobs": FALLBACK_JOBS})
+
+
+async def start_interview(request):
+    data = await request.json()
+    job = data.get('job', '').strip()
+
+    if not job:
+        return JSONResponse({"status": "error", "message": "Job role is required"})
+
+    num_questions = data.get('num_questions', 3)
+    interviewer_name = data.get('interviewer_name', 'Kashmala')
+    interviewer_voice = resolve_voice(data.get('interviewer_voice', 'shimmer'))
+
+    try:
+        questions = await get_job_questions_async(job, num_questions=num_questions,
+                                                  interviewer_name=interviewer_name)
+        if not questions:
+            return JSONResponse({"status": "error", "message": "Failed to generate questions"})
+    except Exception as e:
+        return JSONResponse({"status": "error", "message": f"Error generating questions: {str(e)}"})
+
+    # Start a fresh session, replacing any previous interview from this browser
+    session_id = request.headers.get("x-session-id") or request.cookies.get(SESSION_COOKIE)
+    user_id = get_user_id(request) or uuid.uuid4().hex
+    session = interview.start_session(sessions, job, questions, interviewer_name, interviewer_voice,
+                                      replace_id=session_id, user_id=user_id)
+    spawn(speak_welcome(session))
+
+    response = JSONResponse(interview.session_started(session))
+    response.set_cookie(SESSION_COOKIE, session.session_id, httponly=True, samesite="lax")
+    response.set_cookie(USER_COOKIE, user_id, max_age=USER_COOKIE_MAX_AGE, httponly=True, samesite="lax")
+    return response
+
+
+async def speak_welcome(session):
+    voice = session.interviewer_voice
+    try:
+        # Synthesize the first question while the welcome plays
+        prefetch_speech(session.questions[1], voice=voice)
+        await run_playback(speak, session.questions[0], voice=voice)
+        await asyncio.sleep(SPEECH_PAUSE_SECONDS)
+
+        # Move to the first actual question (index 1 in the array)
+        session.update("next_question", current_question_index=1)
+        await run_playback(speak, session.questions[1], voice=voice)
+    except Exception as e:
+        log.warning(f"Error speaking welcome: {e}")
+    finally:
+        session.update("speech_done", is_speaking=False)
+
+
+async def get_state(request):
+    """Full state snapshot; supports conditional requests via a version ETag"""
+    session = get_session(request)
+    if session is None:
+        return JSONResponse(InterviewSession("", using_openai_tts=speaker.USE_OPENAI_TTS).to_dict())
+
+    snapshot = session.to_dict()
+    etag = f"{session.session_id}-{snapshot['version']}"
+    if etag in if_none_match(request):
+        return Response(status_code=304, headers={"ETag": f'"{etag}"'})
+    return JSONResponse(snapshot, headers={"ETag": f'"{etag}"', "Cache-Control": "no-cache"})
+
+
+async def stream_events(request):
+    """Server-Sent Events, as in app.py, waiting on an asyncio.Event instead of a thread"""
+    session = get_session(request)
+    if session is None:
+        return no_session_response(404)
+
+    try:
+        last_version = int(request.headers.get("last-event-id", ""))
+    except ValueError:
+        last_version = None
+
+    async def generate():
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        def listener():
+            # Called under the session lock from whichever thread changed it
+            try:
+                loop.call_soon_threadsafe(changed.set)
+            except RuntimeError:
+                pass  # Event loop already closed
+
+        session.add_listener(listener)
+        try:
+            version = last_version
+            yield f"retry: {SSE_RETRY_MS}\n\n"
+            while not session.closed:
+                changed.clear()
+                missed = session.events_since(version) if version is not None else None
+                if missed is None:
+                    snapshot = session.to_dict()
+                    version = snapshot["version"]
+                    yield format_sse("snapshot", snapshot, version)
+                else:
+                    for delta in missed:
+                        version = delta["version"]
+                        yield format_sse("delta", delta, version)
+
+                try:
+                    await asyncio.wait_for(changed.wait(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    session.touch()
+                    yield ": keep-alive\n\n"
+        finally:
+            session.remove_listener(listener)
+
+    return StreamingResponse(generate(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+async def record_answer(request):
+    session = get_session(request)
+    if session is None:
+        return no_session_response()
+
+    try:
+        body = await request.json()
+    except ValueError:
+        body = None
+    try:
+        mode, end_silence_ms = recording_options(body)
+    except ValueError as e:
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=400)
+
+    index, error = interview.begin_recording(session)
+    if error is not None:
+        return JSONResponse(error)
+
+    loop = asyncio.get_running_loop()
+
+    def recording_finished(streamer, capture):
+        # Runs on the recorder's thread; hand the pipeline back to the event loop
+        loop.call_soon_threadsafe(spawn, process_recording_result(session, streamer, capture))
+
+    # The audio device still needs its own capture thread while recording
+    return JSONResponse(interview.start_recording(session, index, mode, end_silence_ms, recording_finished))
+
+
+async def stop_recording(request):
+    """Stop the current recording session"""
+    session = get_session(request)
+    if session is None:
+        return no_session_response()
+
+    return JSONResponse(interview.stop_recording(session))
+
+
+async def reset_recording_state(request):
+    """Emergency endpoint to reset the recording state if it gets stuck"""
+    session = get_session(request)
+    if session is None:
+        return no_session_response()
+
+    return JSONResponse(interview.reset_recording(session))
+
+
+async def get_history_page(request):
+    body, status = await run_blocking(interview.history_sessions, get_user_id(request), request.query_params)
+    return JSONResponse(body, status_code=status)
+
+
+async def get_history_answers(request):
+    body, status = await run_blocking(interview.history_answers, get_user_id(request), request.query_params)
+    return JSONResponse(body, status_code=status)
+
+
+async def get_history_session(request):
+    body, status = await run_blocking(interview.history_session, get_user_id(request),
+                                      request.path_params["session_id"])
+    return JSONResponse(body, status_code=status)
+
+
+async def process_recording_result(session, streamer=None, capture=None):
+    """AnswerPipeline.run() as a coroutine: transcription and playback go to their thread pools"""
+    pipeline = AnswerPipeline(session, streamer, capture)
+    try:
+        answer = await run_inference(pipeline.transcribe)
+        pipeline.answer_ready(answer)
+
+        if FEEDBACK_STREAMING:
+            # Sentences go from the async stream to the TTS pipeline on a worker thread,
+            # which starts speaking the first one while the rest is generated
+            sentences = queue.Queue()
+            speaking = asyncio.ensure_future(run_playback(speak_stream, iter(sentences.get, None),
+                                                          voice=pipeline.voice))
+            parts = []
+            try:
+                async for sentence in stream_evaluation_async(pipeline.question, answer):
+                    parts.append(sentence)
+                    sentences.put(sentence)
+            finally:
+                sentences.put(None)
+            pipeline.feedback_ready(" ".join(parts))
+            pipeline.first_feedback_audio(await speaking)
+        else:
+            feedback = await evaluate_response_async(pipeline.question, answer)
+            pipeline.feedback_ready(feedback)
+            await run_playback(speak, feedback, voice=pipeline.voice)
+
+        pipeline.answer_done()
+        await asyncio.sleep(SPEECH_PAUSE_SECONDS)
+        await run_playback(speak, pipeline.next_text, voice=pipeline.voice)
+    except Exception:
+        log.exception("Error processing recording")
+    finally:
+        pipeline.processing_done()
+
+
+async def prime_openai_connection():
+    """Open a pooled connection on the async client before the first interview"""
+    await asyncio.sleep(WARMUP_DELAY)
+    try:
+        client = get_async_openai_client()
+        await client.with_options(max_retries=0).models.list()
+    except Exception as e:
+        log.warning(f"OpenAI connection priming failed: {e}")
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    registry.warm_up(delay=WARMUP_DELAY)
+    spawn(prime_openai_connection())
+    yield
+    for executor in (blocking_executor, inference_executor, playback_executor):
+        executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route('/', serve),
+        Mount('/static', StaticFiles(directory=os.path.join(BASE_DIR, 'static')), name='static'),
+        Route('/api/voice_status', get_voice_status, methods=['GET']),
+        Route('/api/check_voice', refresh_voice, methods=['GET']),
+        Route('/api/ready', get_readiness, methods=['GET']),
+        Route('/api/inference', get_inference_stats, methods=['GET']),
+        Route('/api/llm_cache', get_llm_cache_stats, methods=['GET']),
+        Route('/api/metrics', get_metrics, methods=['GET']),
+        Route('/api/jobs', get_suggested_jobs, methods=['GET']),
+        Route('/api/start', start_interview, methods=['POST']),
+        Route('/api/state', get_state, methods=['GET']),
+        Route('/api/events', stream_events, methods=['GET']),
+        Route('/api/record', record_answer, methods=['POST']),
+        Route('/api/stop_recording', stop_recording, methods=['POST']),
+        Route('/api/reset_recording', reset_recording_state, methods=['POST']),
+        Route('/api/history', get_history_page, methods=['GET']),
+        Route('/api/history/answers', get_history_answers, methods=['GET']),
+        Route('/api/history/{session_id}', get_history_session, methods=['GET']),
+    ],
+    lifespan=lifespan
+)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("uvicorn is required to run the ASGI server; run: pip install uvicorn")
+
+    report_config()
+    print("\n" + "=" * 60)
+    print("🤖 AI INTERVIEW COACH (async server) 🤖")
+    print("=" * 60)
+    print("Open your browser at http://localhost:8080 to start")
+    print("Backends load in the background; check /api/ready for status")
+    print("=" * 60 + "\n")
+    uvicorn.run(app, host="127.0.0.1", port=8080)
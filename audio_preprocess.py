@@ -0,0 +1,137 @@
+import numpy as np
+
+from config import (COMPACT_MARGIN_DB, COMPACT_PADDING_MS, COMPACT_MAX_PAUSE_MS,
+                    NORMALIZE_PEAK, NORMALIZE_MAX_GAIN)
+from vad import FRAME_MS, frame_energy_db
+
+NOISE_FLOOR_PERCENTILE = 10  # The quietest frames of an answer are its room noise
+
+
+class TimeMap:
+    """
+    Maps times in compacted audio back to the original recording.
+
+    The compacted audio is the original with some stretches of silence cut
+    out. It is stored as a list of kept intervals. Inside an interval, time
+    runs at the same rate in both, so mapping is an offset lookup.
+    """
+
+    def __init__(self, compact_starts, original_starts, lengths, original_seconds):
+        self.compact_starts = np.asarray(compact_starts, dtype=np.float64)
+        self.original_starts = np.asarray(original_starts, dtype=np.float64)
+        self.lengths = np.asarray(lengths, dtype=np.float64)
+        self.original_seconds = original_seconds
+
+    @classmethod
+    def identity(cls, seconds):
+        return cls([0.0], [0.0], [seconds], seconds)
+
+    @property
+    def compact_seconds(self):
+        return float(self.lengths.sum())
+
+    @property
+    def removed_seconds(self):
+        return self.original_seconds - self.compact_seconds
+
+    def to_original(self, t):
+        """Original-recording time of compacted time `t` (a number or an array)"""
+        t = np.asarray(t, dtype=np.float64)
+        idx = np.clip(np.searchsorted(self.compact_starts, t, side="right") - 1, 0, len(self.compact_starts) - 1)
+        offset = np.clip(t - self.compact_starts[idx], 0.0, self.lengths[idx])
+        mapped = self.original_starts[idx] + offset
+        return float(mapped) if mapped.ndim == 0 else mapped
+
+    def map_segments(self, segments):
+        """Copy Whisper-style segments ({"start", "end", ...}) with times in the original recording"""
+        if not segments:
+            return []
+        starts = self.to_original([s["start"] for s in segments])
+        ends = self.to_original([s["end"] for s in segments])
+        return [dict(s, start=float(a), end=float(b)) for s, a, b in zip(segments, starts, ends)]
+
+
+def speech_frames(audio, frame_len, margin_db=COMPACT_MARGIN_DB):
+    """Boolean speech mask over whole frames, or None when the answer has no quiet/loud contrast"""
+    n_frames = len(audio) // frame_len
+    if n_frames < 2:
+        return None
+    energy_db = frame_energy_db(audio[:n_frames * frame_len].reshape(n_frames, frame_len))
+    floor_db = np.percentile(energy_db, NOISE_FLOOR_PERCENTILE)
+    speech = energy_db > floor_db + margin_db
+    # All speech or all silence: nothing can be safely cut
+    if speech.all() or not speech.any():
+        return None
+    return speech
+
+
+def keep_mask(speech, padding_frames, max_pause_frames):
+    """Frames to keep: speech plus padding, interior pauses capped at max_pause_frames,
+    and no silence before the first or after the last speech"""
+    n = len(speech)
+    if padding_frames:
+        speech = np.convolve(speech, np.ones(2 * padding_frames + 1), mode="same") > 0
+
+    # Runs of silence as [start, end) frame ranges
+    edges = np.diff(np.concatenate(([1], speech.astype(np.int8), [1])))
+    starts = np.flatnonzero(edges == -1)
+    ends = np.flatnonzero(edges == 1)
+    interior = (starts > 0) & (ends < n)
+    starts, ends = starts[interior], ends[interior]
+    lengths = ends - starts
+
+    # Keep the start and end of each pause, up to max_pause_frames in total
+    head = np.minimum(lengths, max_pause_frames // 2)
+    tail = np.minimum(lengths - head, max_pause_frames - max_pause_frames // 2)
+    marks = np.zeros(n + 1, dtype=np.int32)
+    np.add.at(marks, starts, 1)
+    np.add.at(marks, starts + head, -1)
+    np.add.at(marks, ends - tail, 1)
+    np.add.at(marks, ends, -1)
+    return speech | (np.cumsum(marks[:n]) > 0)
+
+
+def normalize_peak(audio, peak=NORMALIZE_PEAK, max_gain=NORMALIZE_MAX_GAIN):
+    """Scale in place so the loudest sample reaches `peak`, boosting at most `max_gain` times"""
+    current = float(np.max(np.abs(audio))) if len(audio) else 0.0
+    if current > 0:
+        audio *= min(peak / current, max_gain)
+    return audio
+
+
+def compact_silence(audio, sample_rate=16000, margin_db=COMPACT_MARGIN_DB, padding_ms=COMPACT_PADDING_MS,
+                    max_pause_ms=COMPACT_MAX_PAUSE_MS, normalize=True):
+    """
+    Prepare an answer for transcription.
+
+    Leading and trailing silence is trimmed, pauses longer than `max_pause_ms`
+    are shortened, and the result is peak-normalized. Speech is found from
+    per-frame energy compared with the recording's own noise floor.
+
+    Returns (audio, TimeMap). The input array is never modified. Audio with no
+    clear speech/silence contrast is only normalized.
+    """
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    frame_len = sample_rate * FRAME_MS // 1000
+    original_seconds = len(audio) / sample_rate
+
+    speech = speech_frames(audio, frame_len, margin_db)
+    if speech is None:
+        compacted, time_map = audio.copy(), TimeMap.identity(original_seconds)
+    else:
+        frames = keep_mask(speech, padding_ms // FRAME_MS, max(0, max_pause_ms // FRAME_MS))
+        # The last partial frame follows the last whole frame
+        samples = np.repeat(frames, frame_len)
+        samples = np.concatenate((samples, np.full(len(audio) - len(samples), frames[-1])))
+        compacted = audio[samples]  # Boolean indexing copies
+
+        edges = np.diff(np.concatenate(([0], samples.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1)
+        lengths = np.flatnonzero(edges == -1) - starts
+        compact_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        time_map = TimeMap(compact_starts / sample_rate, starts / sample_rate, lengths / sample_rate,
+                           original_seconds)
+
+    if normalize:
+        normalize_peak(compacted)
+    return compacted, time_map
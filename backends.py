@@ -0,0 +1,98 @@
+import threading
+import time
+
+from log import get_logger
+
+log = get_logger(__name__)
+
+
+class BackendRegistry:
+    """
+    Lazily initialized backends (transcription, evaluation, TTS, questions).
+
+    Modules register a loader at import time, which costs nothing. The loader
+    runs the first time the backend is needed, or earlier if warm_up() is
+    called once the server is listening. Each backend loads at most once,
+    even when several requests ask for it at the same time.
+
+    Optional backends (the OpenAI clients the other backends build on) load
+    on first use only. warm_up() skips them, and they don't count towards
+    readiness, since what depends on them has its own fallback.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._backends = {}
+        self._locks = {}
+        self._errors = {}
+        self._optional = set()
+        self.load_times = {}
+        self.warming = False
+
+    def register(self, name, loader, optional=False):
+        self._loaders[name] = loader
+        self._locks[name] = threading.Lock()
+        if optional:
+            self._optional.add(name)
+
+    def get(self, name):
+        """Return the backend, loading it on first use"""
+        # Fast path without locking; a loader may legitimately return None
+        if name in self._backends:
+            return self._backends[name]
+
+        with self._locks[name]:
+            if name not in self._backends:
+                start = time.perf_counter()
+                try:
+                    self._backends[name] = self._loaders[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._errors.pop(name, None)
+                self.load_times[name] = time.perf_counter() - start
+                log.info(f"Backend '{name}' ready in {self.load_times[name]:.2f}s")
+        return self._backends[name]
+
+    def is_ready(self, name=None):
+        """True once the named backend (or every required backend) is loaded"""
+        if name is not None:
+            return name in self._backends
+        return all(n in self._backends for n in self._loaders if n not in self._optional)
+
+    def warm_up(self, names=None, delay=0.0):
+        """Load backends on a background thread so requests don't pay for it"""
+        names = list(names or (n for n in self._loaders if n not in self._optional))
+
+        def warm():
+            if delay:
+                time.sleep(delay)
+            self.warming = True
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    log.warning(f"Backend '{name}' failed to load: {e}")
+            self.warming = False
+
+        thread = threading.Thread(target=warm, name="backend-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        return {
+            "ready": self.is_ready(),
+            "warming": self.warming,
+            "backends": {
+                name: {
+                    "ready": name in self._backends,
+                    "optional": name in self._optional,
+                    "load_time": self.load_times.get(name),
+                    "error": self._errors.get(name)
+                }
+                for name in self._loaders
+            }
+        }
+
+
+registry = BackendRegistry()
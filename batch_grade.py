@@ -0,0 +1,235 @@
+"""
+Offline grading of recorded answers, many at a time.
+
+Each answer is transcribed on a process pool sized to the cores, and its
+transcript is graded by the LLM with a bounded number of requests in flight.
+Results are appended to a JSONL file as each answer finishes. Rerunning
+with the same output skips answers already graded, so an interrupted run
+picks up where it stopped. Answers that failed are retried. So are answers
+whose feedback came from the local rubric fallback instead of the LLM.
+
+Canned transcripts are never graded. The run stops if the workers can't
+load a real transcription backend (local Whisper or the OpenAI API).
+
+The input is either a manifest or a directory:
+    manifest.csv    columns question,wav and optionally id
+    manifest.jsonl  one {"question": ..., "wav": ..., "id": ...} per line
+    answers/        every WAV below it, graded against the question.txt
+                    in the WAV's own directory
+
+Relative WAV paths are resolved against the manifest's directory.
+Answers without an id are keyed by their WAV path.
+
+Usage:
+    python batch_grade.py manifest.csv
+    python batch_grade.py answers/ --output graded.jsonl --workers 4 --llm-concurrency 16
+    python batch_grade.py manifest.jsonl --backend openai_api --limit 50
+"""
+import argparse
+import asyncio
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import config
+
+TRANSCRIPTION_FAILED = "[Transcription failed]"
+
+
+def load_manifest(path):
+    """[{"id", "question", "wav"}] from a CSV or JSONL manifest, or a directory of WAVs"""
+    if os.path.isdir(path):
+        items = []
+        for wav in sorted(glob.glob(os.path.join(path, "**", "*.wav"), recursive=True)):
+            question_file = os.path.join(os.path.dirname(wav), "question.txt")
+            if not os.path.exists(question_file):
+                raise SystemExit(f"{wav}: no question.txt next to it")
+            with open(question_file) as f:
+                question = f.read().strip()
+            items.append({"id": os.path.relpath(wav, path), "question": question, "wav": wav})
+        return items
+
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, newline="") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    items = []
+    for n, row in enumerate(rows, 1):
+        if not row.get("question") or not row.get("wav"):
+            raise SystemExit(f"{path}: entry {n} needs both 'question' and 'wav'")
+        items.append({"id": row.get("id") or row["wav"], "question": row["question"],
+                      "wav": os.path.join(base, row["wav"])})
+    return items
+
+
+def graded_ids(output):
+    """Ids already graded successfully in an earlier run's output"""
+    done = set()
+    if not os.path.exists(output):
+        return done
+    with open(output) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # A line cut short when the run was interrupted
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def open_output(output):
+    """Open the results file for appending, first ending any line cut off by an interrupted run"""
+    f = open(output, "a+")
+    if f.tell():
+        f.seek(f.tell() - 1)
+        if f.read(1) != "\n":
+            f.write("\n")
+    return f
+
+
+def init_worker(backend, threads):
+    """Runs once in each pool process, before transcriber is imported there"""
+    config.TRANSCRIPTION_BACKEND = backend
+    config.INFERENCE_WORKERS = 1
+    config.INFERENCE_TORCH_THREADS = threads
+
+    # Load the model now rather than on the first answer
+    from transcriber import get_transcription_backend
+    loaded = get_transcription_backend()["name"]
+    if loaded == "canned":
+        # Failing here breaks the pool, which stops the run before anything is graded
+        raise RuntimeError(f"No real transcription backend could be loaded (asked for '{backend}')")
+
+
+def transcribe_file(path):
+    """Transcribe one WAV in a pool process.
+    Returns (transcript, segments, backend, audio seconds, decode seconds)."""
+    from capture_buffer import CAPTURE_SAMPLE_RATE, read_wav
+    from transcriber import get_transcription_backend, transcribe_audio_segments
+    audio = read_wav(path)
+    start = time.perf_counter()
+    text, segments = transcribe_audio_segments(audio, os.path.basename(path))
+    # Times in the WAV itself, so a reviewer can seek to any part of the answer
+    segments = [{"start": round(s["start"], 2), "end": round(s["end"], 2), "text": s["text"].strip()}
+                for s in segments]
+    return (text, segments, get_transcription_backend()["name"], len(audio) / CAPTURE_SAMPLE_RATE,
+            time.perf_counter() - start)
+
+
+async def grade(item, pool, llm_slots):
+    """Transcribe and evaluate one answer; never raises, failures become records"""
+    from evaluater import evaluate_response_with_source_async
+    loop = asyncio.get_running_loop()
+    record = {"id": item["id"], "wav": item["wav"], "question": item["question"]}
+    try:
+        text, segments, backend, audio_seconds, transcribe_seconds = await loop.run_in_executor(
+            pool, transcribe_file, item["wav"])
+        record.update(transcript=text, segments=segments, transcription_backend=backend,
+                      audio_seconds=round(audio_seconds, 2), transcribe_seconds=round(transcribe_seconds, 3))
+        if text == TRANSCRIPTION_FAILED:
+            raise RuntimeError("transcription failed")
+
+        async with llm_slots:
+            start = time.perf_counter()
+            record["feedback"], record["feedback_source"] = await evaluate_response_with_source_async(
+                item["question"], text)
+            record["evaluate_seconds"] = round(time.perf_counter() - start, 3)
+        if record["feedback_source"] != "llm":
+            # Kept for reference, but not a grade: a rerun asks the LLM again
+            raise RuntimeError("LLM evaluation unavailable, feedback is the rubric fallback")
+        record["status"] = "ok"
+    except BrokenProcessPool:
+        raise  # The workers are gone; grade_all stops the run
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    return record
+
+
+async def grade_all(items, output, workers, threads, backend, llm_concurrency):
+    llm_slots = asyncio.Semaphore(llm_concurrency)
+    # spawn: each worker imports torch and its model fresh, rather than inheriting
+    # the parent's threads through fork
+    pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=init_worker, initargs=(backend, threads))
+    summary = {"ok": 0, "error": 0, "audio_seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        with open_output(output) as out:
+            tasks = [asyncio.ensure_future(grade(item, pool, llm_slots)) for item in items]
+            for finished, task in enumerate(asyncio.as_completed(tasks), 1):
+                record = await task
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+
+                summary[record["status"]] += 1
+                summary["audio_seconds"] += record.get("audio_seconds", 0.0)
+                elapsed = time.perf_counter() - start
+                note = "" if record["status"] == "ok" else f"  ERROR {record['error']}"
+                print(f"[{finished}/{len(items)}] {record['id']}  {finished / elapsed * 60:.1f} answers/min{note}")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    summary["elapsed"] = time.perf_counter() - start
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe and grade a batch of recorded answers")
+    parser.add_argument("manifest", help="CSV or JSONL manifest, or a directory of WAVs with question.txt files")
+    parser.add_argument("--output", default="graded_answers.jsonl", help="JSONL results; existing results are kept")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Transcription processes")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="Torch threads per process (default: cores // workers)")
+    parser.add_argument("--backend", default=config.TRANSCRIPTION_BACKEND,
+                        help="TRANSCRIPTION_BACKEND for the workers")
+    parser.add_argument("--llm-concurrency", type=int, default=min(8, config.OPENAI_MAX_CONNECTIONS),
+                        help="Evaluation requests in flight at once")
+    parser.add_argument("--limit", type=int, help="Grade at most this many answers")
+    args = parser.parse_args()
+    if args.backend == "canned":
+        parser.error("the canned backend returns made-up transcripts; choose a real transcription backend")
+
+    items = load_manifest(args.manifest)
+    missing = [item["wav"] for item in items if not os.path.exists(item["wav"])]
+    if missing:
+        raise SystemExit(f"{len(missing)} WAV file(s) not found, e.g. {missing[0]}")
+
+    done = graded_ids(args.output)
+    todo = [item for item in items if item["id"] not in done]
+    print(f"{len(items)} answers in {args.manifest}, {len(items) - len(todo)} already graded in {args.output}")
+    if args.limit is not None:
+        todo = todo[:args.limit]
+    if not todo:
+        return
+
+    workers = max(1, min(args.workers, len(todo)))
+    threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+    print(f"Transcribing on {workers} process(es) x {threads} thread(s), "
+          f"{args.llm_concurrency} evaluation(s) in flight")
+
+    try:
+        summary = asyncio.run(grade_all(todo, args.output, workers, threads, args.backend, args.llm_concurrency))
+    except BrokenProcessPool:
+        raise SystemExit("Transcription workers failed to start (see the errors above). Install Whisper or "
+                         "faster-whisper, or set OPENAI_API_KEY (in config.py or the environment); canned transcripts are never graded.")
+
+    elapsed = summary["elapsed"]
+    print(f"\nGraded {summary['ok']} answers ({summary['error']} failed) in {elapsed:.1f}s: "
+          f"{summary['ok'] / elapsed * 60:.1f} answers/min, "
+          f"{summary['audio_seconds'] / elapsed:.1f}x real time")
+    print(f"Results in {args.output}")
+    if summary["error"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Benchmark for silence compaction before transcription.
+
+For each answer, prints the seconds Whisper would decode before and after
+compact_silence(), the 30-second windows that means, and how long the
+preprocessing took. Without arguments it uses synthetic answers: a
+speech-like signal with a slow start, thinking pauses and a late stop.
+
+Usage:
+    python bench_compaction.py                      # synthetic answers
+    python bench_compaction.py answers/*.wav        # recorded answers (WAV files or directories)
+    python bench_compaction.py --transcribe a.wav   # also time real transcription of both versions
+"""
+import argparse
+import glob
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from audio_preprocess import compact_silence
+from capture_buffer import CAPTURE_SAMPLE_RATE, read_wav
+
+WHISPER_WINDOW_SECONDS = 30
+
+
+def synthetic_answer(seed, sample_rate=CAPTURE_SAMPLE_RATE):
+    """Room noise, a late start, bursts of voiced sound with pauses, and a late stop"""
+    rng = np.random.default_rng(seed)
+    parts = [rng.uniform(1.5, 4.0)]  # Seconds of silence before speaking
+    for _ in range(rng.integers(4, 10)):
+        parts += [-rng.uniform(1.0, 6.0), rng.uniform(0.2, 3.0)]  # Speech (negative), then a pause
+    parts.append(rng.uniform(2.0, 5.0))  # Silence before Stop is clicked
+
+    chunks = []
+    for seconds in parts:
+        n = int(abs(seconds) * sample_rate)
+        chunk = rng.normal(0, 0.003, n)
+        if seconds < 0:
+            t = np.arange(n) / sample_rate
+            pitch = rng.uniform(100, 220)
+            voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+            chunk += 0.08 * voiced * (0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 3 * t)))
+        chunks.append(chunk)
+    return np.concatenate(chunks).astype(np.float32)
+
+
+def find_inputs(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(glob.glob(os.path.join(path, "**", "*.wav"), recursive=True))
+        else:
+            files.append(path)
+    return files
+
+
+def windows(seconds):
+    return max(1, math.ceil(seconds / WHISPER_WINDOW_SECONDS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how much audio silence compaction saves Whisper")
+    parser.add_argument("inputs", nargs="*", help="WAV files or directories (default: synthetic answers)")
+    parser.add_argument("--synthetic", type=int, default=10, help="Synthetic answers to generate")
+    parser.add_argument("--transcribe", action="store_true",
+                        help="Also transcribe the original and compacted audio and time both")
+    args = parser.parse_args()
+
+    if args.inputs:
+        answers = [(os.path.basename(path), read_wav(path)) for path in find_inputs(args.inputs)]
+    else:
+        answers = [(f"synthetic-{i}", synthetic_answer(i)) for i in range(args.synthetic)]
+    if not answers:
+        sys.exit("No audio found")
+
+    transcribe = None
+    if args.transcribe:
+        from transcriber import get_transcription_backend
+        transcribe = get_transcription_backend()["transcribe"]
+
+    print(f"{'answer':<24} {'original':>9} {'compacted':>10} {'saved':>7} {'windows':>8} {'prep':>8}"
+          + (f" {'decode':>9} {'decode*':>9}" if transcribe else ""))
+    totals = {"original": 0.0, "compacted": 0.0, "prep": 0.0, "windows": 0, "windows_after": 0,
+              "decode": 0.0, "decode_after": 0.0}
+    for name, audio in answers:
+        start = time.perf_counter()
+        compacted, time_map = compact_silence(audio)
+        prep = time.perf_counter() - start
+        before, after = time_map.original_seconds, time_map.compact_seconds
+        line = (f"{name[:24]:<24} {before:>8.1f}s {after:>9.1f}s {1 - after / max(before, 1e-9):>7.0%} "
+                f"{windows(before):>3} -> {windows(after):<2} {prep * 1000:>6.1f}ms")
+
+        totals["original"] += before
+        totals["compacted"] += after
+        totals["prep"] += prep
+        totals["windows"] += windows(before)
+        totals["windows_after"] += windows(after)
+
+        if transcribe:
+            start = time.perf_counter()
+            transcribe(audio, name)
+            decode = time.perf_counter() - start
+            start = time.perf_counter()
+            transcribe(compacted, name)
+            decode_after = time.perf_counter() - start
+            totals["decode"] += decode
+            totals["decode_after"] += decode_after
+            line += f" {decode:>8.2f}s {decode_after:>8.2f}s"
+        print(line)
+
+    saved = 1 - totals["compacted"] / max(totals["original"], 1e-9)
+    print(f"\nDecoded audio: {totals['original']:.1f}s -> {totals['compacted']:.1f}s ({saved:.0%} less), "
+          f"Whisper windows {totals['windows']} -> {totals['windows_after']}, "
+          f"preprocessing {totals['prep'] * 1000:.1f}ms total")
+    if transcribe:
+        print(f"Transcription time: {totals['decode']:.2f}s -> {totals['decode_after']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Startup-time benchmark for the web app.
+
+Imports a module (app by default) in a fresh interpreter with
+`python -X importtime`, then prints the wall-clock import time and the
+modules with the largest cumulative import cost. Backends are lazy, so
+importing app should not load Whisper, create OpenAI clients or call any API.
+
+Usage:
+    python bench_startup.py                 # import app, show top 15 modules
+    python bench_startup.py --runs 5        # report the best of 5 runs
+    python bench_startup.py --budget 1.5    # exit 1 if import takes longer than 1.5s
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into (cumulative_us, self_us, module) tuples"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+            rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+        except ValueError:
+            continue
+    return rows
+
+
+def measure(module):
+    """Import `module` in a fresh interpreter; return (wall seconds, importtime rows)"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit(f"Importing {module} failed")
+    return wall, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import-time cost of the app")
+    parser.add_argument("--module", default="app", help="Module to import (default: app)")
+    parser.add_argument("--runs", type=int, default=3, help="Runs to take the best of")
+    parser.add_argument("--top", type=int, default=15, help="How many modules to list")
+    parser.add_argument("--budget", type=float, default=None, help="Fail if import exceeds this many seconds")
+    args = parser.parse_args()
+
+    best_wall, best_rows = None, []
+    for _ in range(args.runs):
+        wall, rows = measure(args.module)
+        if best_wall is None or wall < best_wall:
+            best_wall, best_rows = wall, rows
+
+    # Top-level entries (no leading indentation) add up to the total import time
+    total_us = sum(c for c, _, m in best_rows if not m.startswith("  "))
+    print(f"Importing {args.module}: {best_wall:.3f}s wall (interpreter included), "
+          f"{total_us / 1e6:.3f}s in imports, best of {args.runs}")
+    print(f"\n{'cumulative':>12} {'self':>10}  module")
+    for cumulative_us, self_us, module in sorted(best_rows, reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {module}")
+
+    # Heavy backends must not be imported eagerly
+    eager = [m.strip() for _, _, m in best_rows if m.strip() in ("whisper", "torch", "pyttsx3")]
+    if eager:
+        print(f"\nWARNING: heavy backends imported at startup: {', '.join(sorted(set(eager)))}")
+
+    if args.budget is not None and best_wall > args.budget:
+        print(f"\nFAIL: {best_wall:.3f}s exceeds budget of {args.budget:.3f}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
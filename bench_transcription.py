@@ -0,0 +1,164 @@
+"""
+Accuracy/latency benchmark for the local transcription backends.
+
+Transcribes a corpus of WAV files with every combination of backend, model
+size, precision and thread count, and reports load time, real-time factor
+(decode seconds per second of audio), p50/p95 latency and word error rate.
+It ends by recommending the fastest configuration within a WER budget.
+
+The corpus is a directory of WAV files, each with a reference transcript
+next to it (answer1.wav + answer1.txt). Files without a transcript are
+timed but left out of the WER.
+
+Usage:
+    python bench_transcription.py corpus/
+    python bench_transcription.py corpus/ --sizes tiny,base,small --precision int8,fp32
+    python bench_transcription.py corpus/ --backends faster_whisper --threads 2,4 --max-wer 0.12
+    python bench_transcription.py corpus/ --json results.json
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+from audio_preprocess import compact_silence
+from capture_buffer import CAPTURE_SAMPLE_RATE, read_wav
+from transcriber import load_local_model, local_threads
+
+
+def normalize_words(text):
+    """Lowercase words without punctuation, so WER only counts real word differences"""
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance (substitutions + insertions + deletions)"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1]
+
+
+def load_corpus(directory, compact=True):
+    corpus = []
+    for path in sorted(glob.glob(os.path.join(directory, "**", "*.wav"), recursive=True)):
+        audio = read_wav(path)
+        if compact:
+            audio, _ = compact_silence(audio)
+        reference_path = os.path.splitext(path)[0] + ".txt"
+        reference = None
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding="utf-8") as f:
+                reference = normalize_words(f.read())
+        corpus.append({"name": os.path.relpath(path, directory), "audio": audio, "reference": reference})
+    return corpus
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+
+def run_config(corpus, backend, size, quantize, threads, language):
+    start = time.perf_counter()
+    model = load_local_model(backend, size=size, quantize=quantize, threads=threads)
+    load_seconds = time.perf_counter() - start
+
+    # The first call pays for lazy initialization; keep it out of the latencies
+    model.transcribe(corpus[0]["audio"], language=language, fp16=False)
+
+    latencies, audio_seconds, errors, words = [], 0.0, 0, 0
+    for item in corpus:
+        start = time.perf_counter()
+        result = model.transcribe(item["audio"], language=language, fp16=False, temperature=0.0)
+        latencies.append(time.perf_counter() - start)
+        audio_seconds += len(item["audio"]) / CAPTURE_SAMPLE_RATE
+        if item["reference"] is not None:
+            errors += word_errors(item["reference"], normalize_words(result["text"]))
+            words += len(item["reference"])
+
+    return {
+        "backend": backend,
+        "size": size,
+        "precision": "int8" if quantize else "fp32",
+        "threads": threads,
+        "load_seconds": load_seconds,
+        "rtf": sum(latencies) / max(audio_seconds, 1e-9),
+        "latency_p50": percentile(latencies, 0.5),
+        "latency_p95": percentile(latencies, 0.95),
+        "wer": errors / words if words else None,
+    }
+
+
+def split(value):
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare transcription backends on a local WAV corpus")
+    parser.add_argument("corpus", help="Directory of WAV files with .txt reference transcripts")
+    parser.add_argument("--backends", default="whisper,faster_whisper", help="Comma-separated backends")
+    parser.add_argument("--sizes", default="tiny,base", help="Comma-separated model sizes")
+    parser.add_argument("--precision", default="int8,fp32", help="Comma-separated: int8, fp32")
+    parser.add_argument("--threads", default=str(local_threads()), help="Comma-separated CPU thread counts")
+    parser.add_argument("--language", default="en", help="Spoken language (skips language detection)")
+    parser.add_argument("--max-wer", type=float, default=0.15, help="WER budget for the recommendation")
+    parser.add_argument("--no-compact", action="store_true", help="Transcribe the audio without silence compaction")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus, compact=not args.no_compact)
+    if not corpus:
+        sys.exit(f"No WAV files found in {args.corpus}")
+    total = sum(len(item["audio"]) for item in corpus) / CAPTURE_SAMPLE_RATE
+    with_reference = sum(item["reference"] is not None for item in corpus)
+    print(f"Corpus: {len(corpus)} files, {total:.1f}s of audio, {with_reference} with reference transcripts\n")
+
+    results = []
+    print(f"{'backend':<15} {'size':<9} {'prec':<5} {'thr':>3} {'load':>7} {'RTF':>6} {'p50':>7} {'p95':>7} {'WER':>6}")
+    for backend in split(args.backends):
+        for size in split(args.sizes):
+            for precision in split(args.precision):
+                for threads in split(args.threads):
+                    try:
+                        result = run_config(corpus, backend, size, precision == "int8", int(threads), args.language)
+                    except (ImportError, OSError, Exception) as e:
+                        print(f"{backend:<15} {size:<9} {precision:<5} {threads:>3}  skipped: {e}")
+                        continue
+                    results.append(result)
+                    wer = f"{result['wer']:.1%}" if result["wer"] is not None else "-"
+                    print(f"{backend:<15} {size:<9} {precision:<5} {threads:>3} {result['load_seconds']:>6.1f}s "
+                          f"{result['rtf']:>6.3f} {result['latency_p50']:>6.2f}s {result['latency_p95']:>6.2f}s {wer:>6}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"corpus_seconds": total, "files": len(corpus), "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if not results:
+        sys.exit("\nNo configuration could be loaded")
+    eligible = [r for r in results if r["wer"] is None or r["wer"] <= args.max_wer]
+    if not eligible:
+        print(f"\nNo configuration stayed within the {args.max_wer:.0%} WER budget")
+        sys.exit(1)
+    best = min(eligible, key=lambda r: r["rtf"])
+    print(f"\nFastest within {args.max_wer:.0%} WER: {best['backend']} {best['size']} {best['precision']}, "
+          f"{best['threads']} thread(s), RTF {best['rtf']:.3f}")
+    print("config.py:")
+    print(f'    TRANSCRIPTION_BACKEND = "{best["backend"]}"')
+    print(f'    WHISPER_MODEL_SIZE = "{best["size"]}"')
+    if best["backend"] == "whisper":
+        print(f"    WHISPER_QUANTIZE = {best['precision'] == 'int8'}")
+    else:
+        print(f'    FASTER_WHISPER_COMPUTE_TYPE = "{"int8" if best["precision"] == "int8" else "float32"}"')
+    print(f"    INFERENCE_TORCH_THREADS = {best['threads']}  # with INFERENCE_WORKERS = 1")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""
+Stage-level benchmarks for the interview pipeline.
+
+`python -m benchmark` starts a local mock of the OpenAI API (mock_openai.py)
+and points the app's shared client at it. It then runs transcription,
+evaluation, question generation and speech synthesis many times each, through
+the same functions the web app calls. Per-stage p50/p95/p99 latency and
+memory high-water marks are written as JSON, so two versions can be compared
+with --compare.
+"""
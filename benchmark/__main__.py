@@ -0,0 +1,214 @@
+"""
+Usage (from the repository root):
+    python -m benchmark                                   # all stages, 20 iterations each
+    python -m benchmark --stages evaluate,speak --iterations 50 --concurrency 4
+    python -m benchmark --latency chat=lognormal:1500,0.5 --latency speech=fixed:300
+    python -m benchmark --wav answers/ --output after.json --compare before.json
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+
+import config
+from benchmark.mock_openai import MockOpenAIServer, DEFAULT_LATENCIES
+from benchmark.stages import run_stage, rss_high_water_mb
+
+STAGES = ["transcribe", "evaluate", "questions", "speak", "answer"]
+
+QUESTION = "Tell me about a project you are proud of and your role in it."
+ANSWERS = [
+    "I led the migration of our billing system to a new platform and cut invoice errors by forty percent.",
+    "I built an internal dashboard that the support team now uses every day to triage tickets.",
+    "I mentored two junior developers while we rewrote the checkout flow, and we shipped two weeks early.",
+    "I redesigned our onboarding emails and activation went up by twelve percent over a quarter.",
+    "I organized a cross-team incident review process that halved our repeat outages.",
+]
+FEEDBACK = ("Your answer gives a clear example and shows relevant experience. "
+            "To strengthen it, quantify the outcome and explain your own contribution more specifically.")
+
+
+def parse_latencies(values):
+    latencies = {}
+    for value in values or []:
+        endpoint, _, spec = value.partition("=")
+        if endpoint not in DEFAULT_LATENCIES or not spec:
+            raise SystemExit(f"--latency expects ENDPOINT=SPEC with ENDPOINT in {', '.join(DEFAULT_LATENCIES)}")
+        latencies[endpoint] = spec
+    return latencies
+
+
+def configure(args, base_url):
+    """Point the app at the mock server. Must run before any app module is imported."""
+    config.OPENAI_API_KEY = "sk-benchmark-" + "0" * 32
+    config.OPENAI_BASE_URL = base_url
+    config.TRANSCRIPTION_BACKEND = args.transcription_backend
+    config.LLM_CACHE_ENABLED = args.with_caches
+    config.TTS_CACHE_ENABLED = args.with_caches
+    config.QUESTION_BANK_ENABLED = args.question_bank
+    config.TTS_PLAYBACK = False
+
+
+def load_answers(path):
+    from capture_buffer import read_wav
+    if path:
+        files = sorted(glob.glob(os.path.join(path, "**", "*.wav"), recursive=True)) if os.path.isdir(path) else [path]
+        answers = [read_wav(f) for f in files]
+        if not answers:
+            raise SystemExit(f"No WAV files found in {path}")
+        return answers
+    from bench_compaction import synthetic_answer
+    return [synthetic_answer(seed) for seed in range(5)]
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def build_stages(answers, args):
+    from transcriber import transcribe_audio
+    from evaluater import evaluate_response
+    from questions import get_job_questions
+    from speaker import speak
+
+    def transcribe(i):
+        return transcribe_audio(answers[i % len(answers)], f"bench_answer_{i}.wav")
+
+    def evaluate(i):
+        return evaluate_response(QUESTION, ANSWERS[i % len(ANSWERS)])
+
+    def questions(i):
+        return get_job_questions(args.job, args.num_questions)
+
+    def speak_feedback(i):
+        return speak(FEEDBACK)
+
+    def answer(i):
+        # The post-answer path of the web app: transcript, feedback, then speaking it
+        transcript = transcribe(i)
+        feedback = evaluate_response(QUESTION, transcript)
+        speak(feedback)
+
+    return {"transcribe": transcribe, "evaluate": evaluate, "questions": questions,
+            "speak": speak_feedback, "answer": answer}
+
+
+def backend_names():
+    import evaluater
+    import speaker
+    from backends import registry
+    names = {}
+    if registry.is_ready("transcription"):
+        names["transcription"] = registry.get("transcription")["name"]
+    if registry.is_ready("evaluation"):
+        names["evaluation"] = "openai" if evaluater.USE_OPENAI else "canned"
+    if registry.is_ready("tts"):
+        names["tts"] = "openai" if speaker.USE_OPENAI_TTS else "system"
+    return names
+
+
+def print_results(results):
+    print(f"\n{'stage':<11} {'n':>4} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'py peak':>9} {'rss hw':>8}")
+    for name, s in results["stages"].items():
+        if not s["count"]:
+            print(f"{name:<11} {0:>4} {s['errors']:>4}  (no successful iterations)")
+            continue
+        rss = f"{s['rss_high_water_mb']:.0f}MB" if s["rss_high_water_mb"] is not None else "-"
+        print(f"{name:<11} {s['count']:>4} {s['errors']:>4} {s['p50'] * 1000:>6.0f}ms {s['p95'] * 1000:>6.0f}ms "
+              f"{s['p99'] * 1000:>6.0f}ms {s['python_peak_mb']:>7.1f}MB {rss:>8}")
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({baseline['meta'].get('revision')}):")
+    for name, s in results["stages"].items():
+        old = baseline["stages"].get(name)
+        if not old or not old.get("count") or not s["count"]:
+            continue
+        deltas = []
+        for key in ("p50", "p95", "p99"):
+            change = (s[key] - old[key]) / old[key] if old[key] else 0.0
+            deltas.append(f"{key} {old[key] * 1000:.0f} -> {s[key] * 1000:.0f}ms ({change:+.0%})")
+        print(f"  {name:<11} " + ", ".join(deltas))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmark",
+                                     description="Per-stage latency and memory benchmark against a mock OpenAI API")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated, from: {', '.join(STAGES)}")
+    parser.add_argument("--iterations", type=int, default=20, help="Measured calls per stage")
+    parser.add_argument("--concurrency", type=int, default=1, help="Calls in flight at once per stage")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured calls before each stage")
+    parser.add_argument("--latency", action="append", metavar="ENDPOINT=SPEC",
+                        help="Mock latency, e.g. chat=lognormal:700,0.4 or speech=fixed:300 "
+                             f"(endpoints: {', '.join(DEFAULT_LATENCIES)})")
+    parser.add_argument("--token-ms", type=float, default=15, help="Delay between streamed chat chunks")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the mock latencies")
+    parser.add_argument("--wav", help="WAV file or directory of recorded answers (default: synthetic)")
+    parser.add_argument("--transcription-backend", default="openai_api",
+                        help="TRANSCRIPTION_BACKEND to use (openai_api goes through the mock; auto may load Whisper)")
+    parser.add_argument("--job", default="forensic accountant", help="Job title for the questions stage")
+    parser.add_argument("--num-questions", type=int, default=3)
+    parser.add_argument("--question-bank", action="store_true", help="Serve banked roles from the question bank")
+    parser.add_argument("--with-caches", action="store_true", help="Keep the LLM and TTS caches on")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise SystemExit(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+    latencies = parse_latencies(args.latency)
+    with MockOpenAIServer(latencies, seed=args.seed, token_ms=args.token_ms) as server:
+        print(f"Mock OpenAI API at {server.base_url}")
+        configure(args, server.base_url)
+        answers = load_answers(args.wav)
+        functions = build_stages(answers, args)
+
+        results = {"meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "latencies": {endpoint: latency.spec for endpoint, latency in server.latencies.items()},
+            "caches": args.with_caches,
+        }, "stages": {}}
+
+        for name in stages:
+            print(f"\n=== {name}: {args.iterations} iterations, concurrency {args.concurrency} ===")
+            results["stages"][name] = run_stage(name, functions[name], args.iterations,
+                                                concurrency=args.concurrency, warmup=args.warmup)
+
+        results["meta"]["backends"] = backend_names()
+        results["meta"]["mock_requests"] = dict(server.requests)
+        results["rss_high_water_mb"] = rss_high_water_mb()
+
+    print_results(results)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+    # Stages silently falling back to canned output would make the numbers meaningless
+    fallbacks = [k for k, v in results["meta"]["backends"].items() if v in ("canned", "system")]
+    if fallbacks:
+        print(f"\nWARNING: fallback backends in use for {', '.join(fallbacks)}; check the mock server setup")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
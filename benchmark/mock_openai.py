@@ -0,0 +1,210 @@
+"""
+A local stand-in for the OpenAI HTTP API.
+
+Serves the endpoints the app uses (chat completions, with and without
+streaming, audio transcriptions, audio speech and models) on 127.0.0.1. Each
+response is delayed by a latency drawn from a configurable distribution, so
+benchmarks measure our own overhead on top of realistic, reproducible
+upstream latency and spend no tokens.
+"""
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_LATENCIES = {
+    "chat": "lognormal:700,0.4",
+    "transcription": "lognormal:900,0.3",
+    "speech": "lognormal:400,0.3",
+    "models": "fixed:20",
+}
+STREAM_TOKEN_MS = 15  # Delay between streamed chat chunks, after the first
+
+# Fake MP3 payload: an ID3 header followed by silent frames' worth of bytes
+SPEECH_BYTES = b"ID3\x03\x00\x00\x00\x00\x00\x00" + b"\xff\xfb\x90\x00" + bytes(24 * 1024)
+
+
+class Latency:
+    """
+    A latency distribution in milliseconds, parsed from a short spec:
+
+        fixed:200             always 200 ms
+        uniform:100,400       uniform between 100 and 400 ms
+        normal:500,100        mean 500 ms, standard deviation 100 ms
+        lognormal:700,0.4     median 700 ms, sigma 0.4 (long right tail)
+    """
+
+    def __init__(self, spec, rng):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",") if p]
+        self.rng = rng
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample(self):
+        """One latency, in seconds"""
+        p = self.params
+        if self.kind == "fixed":
+            ms = p[0]
+        elif self.kind == "uniform":
+            ms = self.rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            ms = self.rng.gauss(p[0], p[1])
+        else:
+            ms = self.rng.lognormvariate(0.0, p[1]) * p[0]
+        return max(0.0, ms) / 1000.0
+
+
+def chat_reply(messages):
+    """Plausible content for the prompts the app sends"""
+    prompt = " ".join(m.get("content", "") for m in messages if isinstance(m.get("content"), str))
+    if "job titles" in prompt:
+        return "\n".join(["Software Engineer", "Product Manager", "Data Scientist", "UX Designer",
+                          "Nurse", "Accountant", "Teacher", "Marketing Manager", "Sales Representative",
+                          "Mechanical Engineer"])
+    if "welcome message" in prompt:
+        return ("Hello and welcome! I'm your AI Interview Coach, and today I'll be asking you about this role. "
+                "Take your time, and good luck!")
+    if "interview questions" in prompt:
+        match = re.search(r"Generate (\d+)", prompt)
+        count = int(match.group(1)) if match else 3
+        return "\n".join(f"Can you describe a challenging situation number {i + 1} you handled in this role?"
+                         for i in range(count))
+    return ("Your answer gives a clear example and shows relevant experience. "
+            "To strengthen it, quantify the outcome and explain your own contribution more specifically.")
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _delay(self, endpoint):
+        self.server.record(endpoint)
+        time.sleep(self.server.latencies[endpoint].sample())
+
+    def _send(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status=200):
+        self._send(status, "application/json", json.dumps(payload).encode())
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._delay("models")
+            self._send_json({"object": "list", "data": [
+                {"id": model, "object": "model", "created": 0, "owned_by": "mock"}
+                for model in ("gpt-4o", "whisper-1", "tts-1", "tts-1-hd")
+            ]})
+        else:
+            self._send_json({"error": {"message": f"Unknown path {self.path}"}}, status=404)
+
+    def do_POST(self):
+        body = self._body()
+        path = self.path.rstrip("/")
+        if path.endswith("/chat/completions"):
+            self._chat(json.loads(body or b"{}"))
+        elif path.endswith("/audio/transcriptions"):
+            self._delay("transcription")
+            self._send_json({"text": "I've worked on several projects where I led the design and shipped "
+                                     "on time, and I measure success by the impact on users."})
+        elif path.endswith("/audio/speech"):
+            self._delay("speech")
+            self._send(200, "audio/mpeg", SPEECH_BYTES)
+        else:
+            self._send_json({"error": {"message": f"Unknown path {self.path}"}}, status=404)
+
+    def _chat(self, request):
+        self._delay("chat")
+        content = chat_reply(request.get("messages", []))
+        completion_id = f"chatcmpl-mock{self.server.next_id()}"
+        model = request.get("model", "gpt-4o")
+
+        if not request.get("stream"):
+            self._send_json({
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+            return
+
+        # Server-sent events, one word per chunk, over chunked transfer encoding
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = re.findall(r"\S+\s*", content)
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(self.server.token_delay)
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]}
+            self._send_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+        done = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        self._send_chunk(f"data: {json.dumps(done)}\n\ndata: [DONE]\n\n".encode())
+        self._send_chunk(b"")
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    """The mock API on a background thread. Use as a context manager, or start()/stop()."""
+
+    daemon_threads = True
+
+    def __init__(self, latencies=None, seed=0, token_ms=STREAM_TOKEN_MS, port=0):
+        super().__init__(("127.0.0.1", port), MockOpenAIHandler)
+        rng = random.Random(seed)
+        specs = dict(DEFAULT_LATENCIES, **(latencies or {}))
+        self.latencies = {endpoint: Latency(spec, rng) for endpoint, spec in specs.items()}
+        self.token_delay = token_ms / 1000.0
+        self.requests = {endpoint: 0 for endpoint in specs}
+        self._lock = threading.Lock()
+        self._ids = 0
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def record(self, endpoint):
+        with self._lock:
+            self.requests[endpoint] += 1
+
+    def next_id(self):
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-openai", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
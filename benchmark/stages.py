@@ -0,0 +1,81 @@
+"""
+Run pipeline stages repeatedly and summarize latency and memory.
+
+A stage is a name plus a function of the iteration number. Iterations run
+on a thread pool (`concurrency` at a time). Each call's wall time is
+recorded, and so is the stage's Python allocation peak (tracemalloc) and
+the process resident-set high-water mark.
+"""
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def rss_high_water_mb():
+    """Peak resident set size of this process so far, or None where unsupported"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies, errors, wall, peak_bytes):
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "mean": sum(values) / len(values) if values else None,
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": values[-1] if values else None,
+        "throughput": len(values) / wall if wall > 0 else None,
+        "python_peak_mb": peak_bytes / (1024 * 1024),
+        "rss_high_water_mb": rss_high_water_mb(),
+    }
+
+
+def run_stage(name, func, iterations, concurrency=1, warmup=1):
+    """Call func(i) `iterations` times and return the stage summary.
+
+    Warm-up calls (backend loading, first connections) are not measured.
+    """
+    for i in range(warmup):
+        func(-1 - i)
+
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            func(i)
+        except Exception as e:
+            print(f"{name} iteration {i} failed: {e}")
+            return None
+        return time.perf_counter() - start
+
+    tracemalloc.start()
+    if hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix=f"bench-{name}") as pool:
+        results = list(pool.map(timed, range(iterations)))
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = [r for r in results if r is not None]
+    return summarize(latencies, len(results) - len(latencies), wall, peak)
@@ -0,0 +1,218 @@
+import io
+import os
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from config import CAPTURE_MEMORY_SECONDS, MAX_RECORDING_DURATION, SAVE_RECORDINGS
+from log import get_logger
+
+log = get_logger(__name__)
+
+# Whisper works on 16 kHz mono, so that is all we keep
+CAPTURE_SAMPLE_RATE = 16000
+
+
+class StreamResampler:
+    """
+    Linear-interpolation resampler for audio that arrives in chunks.
+
+    Phase is carried across chunk boundaries, so resampling chunk by chunk
+    gives the same result as resampling the whole recording at once.
+    """
+
+    def __init__(self, input_rate, output_rate=CAPTURE_SAMPLE_RATE):
+        self.ratio = input_rate / output_rate
+        self._in_count = 0
+        self._last_sample = 0.0
+        self._next_pos = 0.0
+
+    def process(self, x):
+        """Resample one mono float32 chunk"""
+        if not len(x):
+            return x
+        if self.ratio == 1.0:
+            self._in_count += len(x)
+            return x
+
+        # buf[0] is the previous chunk's last sample, at absolute index in_count - 1
+        buf = np.concatenate(([self._last_sample], x))
+        first = self._in_count - 1
+        last = self._in_count + len(x) - 1
+        positions = np.arange(self._next_pos, last + 1e-9, self.ratio)
+
+        self._in_count += len(x)
+        self._last_sample = x[-1]
+        if not len(positions):
+            return np.zeros(0, dtype=np.float32)
+        self._next_pos = positions[-1] + self.ratio
+        return np.interp(positions - first, np.arange(len(buf)), buf).astype(np.float32)
+
+
+class CaptureBuffer:
+    """
+    Bounded-memory store for one recording.
+
+    Captured chunks are resampled to 16 kHz and stored as int16 in a
+    preallocated array: 32 KB per second instead of 176 KB at 44.1 kHz
+    float32. Once `memory_seconds` of audio have been captured, the array is
+    written to a WAV file next to `filename` and later chunks are appended to
+    that file, so memory stays flat however long the answer runs. Nothing
+    ever concatenates the whole recording.
+
+    Recording stops being accepted at `max_seconds` (see `full`). After
+    finish(), audio() hands the recording straight to the transcriber;
+    writing `filename` is optional and can happen in the background.
+    """
+
+    def __init__(self, filename, input_rate=44100, memory_seconds=CAPTURE_MEMORY_SECONDS,
+                 max_seconds=MAX_RECORDING_DURATION):
+        self.filename = filename
+        self.max_samples = int(max_seconds * CAPTURE_SAMPLE_RATE)
+        self._resampler = StreamResampler(input_rate)
+        self._buffer = np.empty(min(int(memory_seconds * CAPTURE_SAMPLE_RATE), self.max_samples), dtype=np.int16)
+        self._length = 0  # Samples held in _buffer
+        self._spill = None  # wave writer once the recording outgrows memory
+        self._spill_path = filename + ".part"
+        self._lock = threading.Lock()
+        self.num_samples = 0
+        self.full = False
+        self.finished = False
+        self.saved = False
+        self.spilled = False
+
+    @property
+    def duration(self):
+        return self.num_samples / CAPTURE_SAMPLE_RATE
+
+    def write(self, chunk):
+        """Add a captured chunk (any shape, mono, float in [-1, 1] at input_rate).
+
+        Returns the chunk resampled to 16 kHz float32, for listeners such as
+        the streaming transcriber.
+        """
+        resampled = self._resampler.process(np.asarray(chunk, dtype=np.float32).reshape(-1))
+        room = self.max_samples - self.num_samples
+        if len(resampled) >= room:
+            resampled = resampled[:room]
+            self.full = True
+        if not len(resampled):
+            return resampled
+
+        pcm = np.clip(resampled * 32767.0, -32768, 32767).astype(np.int16)
+        if self._spill is None and self._length + len(pcm) > len(self._buffer):
+            self._start_spill()
+        if self._spill is None:
+            self._buffer[self._length:self._length + len(pcm)] = pcm
+            self._length += len(pcm)
+        else:
+            self._spill.writeframes(pcm.tobytes())
+        self.num_samples += len(pcm)
+        return resampled
+
+    def _start_spill(self):
+        log.info(f"Recording passed {len(self._buffer) / CAPTURE_SAMPLE_RATE:.0f}s, spilling to {self._spill_path}")
+        self._spill = _open_wav(self._spill_path)
+        self.spilled = True
+        self._spill.writeframes(self._buffer[:self._length].tobytes())
+        self._length = 0
+
+    def finish(self):
+        """Stop accepting audio; a spilled recording's WAV header is finalized"""
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+            self.finished = True
+
+    def pcm(self):
+        """The whole recording as 16 kHz int16: a view of the memory buffer, or a
+        read-only memmap of the spill file"""
+        with self._lock:
+            if self._spill is not None:
+                raise RuntimeError("finish() the capture before reading a spilled recording")
+            if self._length or not os.path.exists(self._spill_path):
+                return self._buffer[:self._length]
+            with wave.open(self._spill_path, "rb") as f:
+                frames = f.getnframes()
+            # The wave module always writes a 44-byte PCM header
+            return np.memmap(self._spill_path, dtype=np.int16, mode="r", offset=44, shape=(frames,))
+
+    def audio(self):
+        """The whole recording as the 16 kHz float32 array Whisper expects"""
+        audio = self.pcm().astype(np.float32)
+        audio *= 1.0 / 32768.0
+        return audio
+
+    def save(self):
+        """Write the recording to `filename`"""
+        self.finish()
+        with self._lock:
+            if not self.saved:
+                if os.path.exists(self._spill_path):
+                    os.replace(self._spill_path, self.filename)
+                    self._spill_path = self.filename
+                else:
+                    with _open_wav(self.filename) as f:
+                        f.writeframes(self._buffer[:self._length].tobytes())
+                self.saved = True
+        return self.filename
+
+    def save_in_background(self):
+        """Persist the recording off the caller's thread; returns a Future"""
+        return _save_executor.submit(self.save)
+
+    def persist(self):
+        """Save in the background if SAVE_RECORDINGS is on, otherwise discard"""
+        if SAVE_RECORDINGS and self.num_samples:
+            return self.save_in_background()
+        self.discard()
+        return None
+
+    def discard(self):
+        """Delete the spill file of a recording that won't be saved"""
+        self.finish()
+        with self._lock:
+            if not self.saved and os.path.exists(self._spill_path):
+                os.remove(self._spill_path)
+
+
+# Recordings are written one at a time, off the request path
+_save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recording-save")
+
+
+def wav_bytes(audio):
+    """Encode 16 kHz float32 audio as an in-memory WAV file"""
+    pcm = np.clip(np.asarray(audio, dtype=np.float32) * 32767.0, -32768, 32767).astype(np.int16)
+    out = io.BytesIO()
+    with _open_wav(out) as f:
+        f.writeframes(pcm.tobytes())
+    return out.getvalue()
+
+
+def read_wav(path):
+    """Read a PCM WAV file as mono 16 kHz float32"""
+    with wave.open(path, "rb") as f:
+        channels, width, rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+        data = f.readframes(f.getnframes())
+    if width == 2:
+        audio = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+    elif width == 4:
+        audio = np.frombuffer(data, dtype=np.int32).astype(np.float32) / 2147483648.0
+    elif width == 1:
+        audio = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    else:
+        raise ValueError(f"{path}: unsupported sample width {width}")
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    return StreamResampler(rate).process(audio)
+
+
+def _open_wav(path):
+    f = wave.open(path, "wb")
+    f.setnchannels(1)
+    f.setsampwidth(2)
+    f.setframerate(CAPTURE_SAMPLE_RATE)
+    return f
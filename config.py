@@ -1,22 +1,123 @@
 # OpenAI API key for GPT models
 OPENAI_API_KEY = ""
+OPENAI_BASE_URL = None  # None = api.openai.com (or the OPENAI_BASE_URL environment variable)
 
 # ElevenLabs credentials for realistic TTS
 ELEVENLABS_API_KEY = ""
 ELEVENLABS_VOICE_ID = ""
 
 # Voice and transcription settings
-MAX_RECORDING_DURATION = 30  # Maximum recording duration in seconds 
+MAX_RECORDING_DURATION = 30 * 60  # Hard cap on one answer, in seconds
+CAPTURE_MEMORY_SECONDS = 5 * 60  # Longer answers spill to disk (16 kHz int16 is about 32 KB per second)
+SAVE_RECORDINGS = True  # Keep answer WAVs; written in the background, never on the transcription path
 DEFAULT_RECORDING_DURATION = 15  # Default recording duration
 
+# Answer endpointing. In "voice" mode the recording ends by itself once the candidate stops talking.
+RECORDING_MODE = "manual"  # Default for /api/record: "manual" (press stop) or "voice"
+VAD_END_SILENCE_MS = 1500  # Silence after speech that ends the answer
+VAD_MIN_END_SILENCE_MS = 300  # Bounds for an end_silence_ms sent by the client
+VAD_MAX_END_SILENCE_MS = 10000
+VAD_MARGIN_DB = 9  # How far above the noise floor a frame must be to count as speech
+VAD_HANGOVER_MS = 200  # Speech resuming within this long after a speech frame continues it; the dip is not silence
+VAD_MIN_SPEECH_MS = 100  # Shorter bursts (clicks, bumps) are not speech
+
+# Silence compaction before transcription: Whisper's cost grows with audio length
+COMPACT_SILENCE = True
+COMPACT_MARGIN_DB = 12  # Frames this far above the recording's noise floor are speech
+COMPACT_PADDING_MS = 150  # Audio kept around speech so word edges aren't clipped
+COMPACT_MAX_PAUSE_MS = 600  # Longer pauses inside the answer are shortened to this
+NORMALIZE_PEAK = 0.9  # Peak level after normalization (linear)
+NORMALIZE_MAX_GAIN = 20.0  # Quiet recordings are boosted at most this much
+
+# Transcription backend: "auto" tries faster_whisper, whisper, openai_api, then canned responses.
+# Run bench_transcription.py on a few recorded answers to pick the fastest model within a WER budget.
+TRANSCRIPTION_BACKEND = "auto"
+WHISPER_MODEL_SIZE = "base"  # tiny, base, small, medium (".en" variants are English-only and faster)
+WHISPER_QUANTIZE = True  # openai-whisper: int8 dynamic quantization of the Linear layers on CPU
+FASTER_WHISPER_COMPUTE_TYPE = "int8"  # faster-whisper (CTranslate2): int8, int8_float32, float32
+
+# Streaming transcription (local Whisper only): decode while the candidate speaks
+STREAMING_TRANSCRIPTION = True
+STREAMING_STEP_SECONDS = 2.0  # Re-decode the open window after this much new audio
+STREAMING_STABILITY_MARGIN = 1.0  # Segments ending this close to the window edge stay uncommitted
+
+# Shared local Whisper inference service
+INFERENCE_WORKERS = 1  # Worker threads sharing the model
+INFERENCE_TORCH_THREADS = 0  # Intra-op threads per worker; 0 = cores // workers
+INFERENCE_QUEUE_SIZE = 32  # Pending requests before submitters block
+INFERENCE_MAX_BATCH = 8  # 30-second windows decoded in one forward pass
+INFERENCE_BATCH_WAIT_MS = 20  # How long a worker waits for more windows to batch
+INFERENCE_SUBMIT_TIMEOUT = 30  # Seconds to wait for queue space before giving up
+
+# Text-to-speech audio cache
+TTS_CACHE_ENABLED = True
+TTS_CACHE_DIR = "tts_cache"  # Directory for cached MP3s (created on demand)
+TTS_CACHE_MAX_BYTES = 200 * 1024 * 1024  # Least recently used files are evicted beyond this
+
+# Streaming TTS: synthesize sentences concurrently and start playing the first one immediately
+TTS_STREAMING = True
+TTS_PLAYBACK = True  # False synthesizes speech without playing it (benchmarks, headless servers)
+TTS_STREAM_CONCURRENCY = 3  # Sentences synthesized in parallel per utterance
+TTS_MIN_SENTENCE_CHARS = 20  # Shorter sentences are merged into the next one
+
+# Stream the LLM feedback and start speaking its first sentence while the rest is generated
+FEEDBACK_STREAMING = True
+
+# Pause between the spoken feedback and the next question
+SPEECH_PAUSE_SECONDS = 0.3
+
+# Pre-generated question bank, keyed by canonical job title
+QUESTION_BANK_ENABLED = True
+QUESTION_BANK_PATH = "question_bank.json.gz"
+QUESTION_BANK_MAX_PER_ROLE = 60  # Questions kept per role
+QUESTION_BANK_MATCH_CUTOFF = 0.85  # Spelling similarity each word of a title needs to reuse a banked role
+
+# Shared OpenAI client: one keep-alive connection pool for chat, TTS and transcription
+OPENAI_MAX_CONNECTIONS = 20
+OPENAI_KEEPALIVE_CONNECTIONS = 10
+OPENAI_KEEPALIVE_EXPIRY = 60  # Seconds an idle pooled connection is kept open
+OPENAI_CONNECT_TIMEOUT = 5
+OPENAI_TIMEOUTS = {  # Seconds per operation before a hung upstream is abandoned
+    "default": 30,
+    "chat": 30,
+    "evaluation": 10,  # Past this the local rubric feedback is used instead
+    "tts": 20,
+    "transcription": 60,
+}
+OPENAI_MAX_RETRIES = 2  # Retried with jittered exponential backoff by the SDK
+
+# ASGI server (asgi_app.py): separate thread pools, so that seconds of audio playback in some
+# sessions never queue other sessions' transcriptions
+ASGI_BLOCKING_WORKERS = 8  # Backend loads, voice checks, history reads
+ASGI_INFERENCE_WORKERS = 4  # Transcription; the local model has its own worker pool behind this
+ASGI_PLAYBACK_WORKERS = 16  # speak()/speak_stream(), mostly waiting on the audio device
+
+# Shared cache for chat completions (questions, evaluation, job suggestions)
+LLM_CACHE_ENABLED = True
+LLM_CACHE_PATH = "llm_cache.sqlite3"  # Persistent tier; memory-only if it can't be opened
+LLM_CACHE_MEMORY_ENTRIES = 1000
+
+# Interview history (sessions, transcripts, feedback, timings) in SQLite, written behind the request path
+HISTORY_ENABLED = True
+HISTORY_PATH = "history.sqlite3"
+HISTORY_BATCH_SIZE = 200  # Most statements committed in one transaction
+HISTORY_FLUSH_INTERVAL = 0.5  # Seconds the writer gathers statements before committing
+HISTORY_PAGE_MAX = 100  # Largest page the /api/history endpoints return
+
+# Web session settings
+SESSION_IDLE_TIMEOUT = 30 * 60  # Evict interview sessions idle for this many seconds
+MAX_SESSIONS = 200  # Upper bound on concurrent interview sessions kept in memory
+
 # Debug mode - set to True to print more information
 DEBUG = True
 
-# Print API key information if in debug mode
-if DEBUG:
-    print(f"OpenAI API Key: {OPENAI_API_KEY[:8]}...{OPENAI_API_KEY[-4:]}")
-    print(f"ElevenLabs API Key: {ELEVENLABS_API_KEY[:8]}...{ELEVENLABS_API_KEY[-4:]}")
-    print(f"ElevenLabs Voice ID: {ELEVENLABS_VOICE_ID}")
+# Logging: records are queued on the calling thread and written by a background thread
+LOG_LEVEL = "INFO"  # DEBUG also logs the full text of questions, answers and feedback
+LOG_STATE_DUMPS = False  # Dump the whole interview state on stop/reset requests (at DEBUG level)
+LOG_AUDIO_INTERVAL = 5.0  # Seconds between repeated log lines from the audio callback thread
+
+# Seconds after start-up before backends (Whisper, OpenAI clients, TTS) are warmed in the background
+WARMUP_DELAY = 0.5
 
 # API validation helper functions
 def is_valid_openai_key(key):
@@ -27,9 +128,17 @@ def is_valid_elevenlabs_key(key):
     """Basic validation for ElevenLabs key format"""
     return key and key.startswith("sk_") and len(key) > 20
 
-# Check API keys
-if not is_valid_openai_key(OPENAI_API_KEY):
-    print("WARNING: OpenAI API key appears to be invalid!")
+def report_config():
+    """Print key status; called by entry points rather than on every import"""
+    # Print API key information if in debug mode
+    if DEBUG:
+        print(f"OpenAI API Key: {OPENAI_API_KEY[:8]}...{OPENAI_API_KEY[-4:]}")
+        print(f"ElevenLabs API Key: {ELEVENLABS_API_KEY[:8]}...{ELEVENLABS_API_KEY[-4:]}")
+        print(f"ElevenLabs Voice ID: {ELEVENLABS_VOICE_ID}")
+
+    # Check API keys
+    if not is_valid_openai_key(OPENAI_API_KEY):
+        print("WARNING: OpenAI API key appears to be invalid!")
 
-if not is_valid_elevenlabs_key(ELEVENLABS_API_KEY):
-    print("WARNING: ElevenLabs API key appears to be invalid!")
+    if not is_valid_elevenlabs_key(ELEVENLABS_API_KEY):
+        print("WARNING: ElevenLabs API key appears to be invalid!")
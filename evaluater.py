@@ -1,82 +1,173 @@
-# Try to import OpenAI, but provide a fallback if it fails
-USE_OPENAI = True
+import time
 from config import DEBUG
+from backends import registry
+from llm_cache import cached_chat, cached_chat_async, cached_chat_stream, cached_chat_stream_async
+from metrics import EVALUATION_SECONDS, FALLBACKS
+from rubric import rubric_feedback
+from log import get_logger
 
-try:
-    from openai import OpenAI
-    from config import OPENAI_API_KEY
-    
-    if DEBUG:
-        print(f"OpenAI API Key in evaluater.py: {OPENAI_API_KEY[:8]}...{OPENAI_API_KEY[-4:]}")
-    
-    try:
-        # Initialize client with minimal required parameters
-        client = OpenAI(api_key=OPENAI_API_KEY)
-        
-        if DEBUG:
-            print("OpenAI client initialized successfully")
-        
-        # Test connection with a simple request
-        if DEBUG:
-            try:
-                print("Testing OpenAI connection...")
-                response = client.models.list()
-                print(f"OpenAI connection successful - available models: {len(response.data)}")
-            except Exception as e:
-                print(f"OpenAI connection test failed: {e}")
-        
-        def evaluate_response_with_openai(question, answer):
-            prompt = f"""You are a mock interview coach.
+log = get_logger(__name__)
+
+# Set when the evaluation backend loads; False means the local rubric feedback is in use
+USE_OPENAI = False
+
+def build_evaluation_prompt(question, answer):
+    return f"""You are a mock interview coach.
 
             Interviewer Question: "{question}"
             User's Answer: "{answer}"
 
             Give a 2-3 sentence evaluation of the answer. Focus on the quality, content, and professionalism of the response.
-            
+
             DO NOT include a follow-up question in your response.
             """
 
-            try:
-                response = client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                return response.choices[0].message.content
-            except Exception as e:
-                print(f"Error in response evaluation: {e}")
-                return evaluate_response_fallback(question, answer)
-        
-        evaluate_response = evaluate_response_with_openai
-        
+def load_evaluation_backend():
+    """Create the OpenAI evaluator, or fall back to local rubric feedback. Runs once."""
+    global USE_OPENAI
+
+    # Use the shared OpenAI client, but provide a fallback if it isn't available
+    try:
+        from openai_client import get_openai_client
+        client = get_openai_client("evaluation")
+    except (ImportError, OSError) as e:
+        log.warning(f"Error loading OpenAI API: {e}")
+        log.info("Using local rubric feedback for evaluation. Install OpenAI properly for real functionality.")
+        return evaluate_response_fallback
+    except Exception as e:
+        log.warning(f"OpenAI client initialization error: {e}")
+        log.info("Using fallback evaluator.")
+        return evaluate_response_fallback
+
+    if DEBUG:
+        log.info("OpenAI client initialized successfully")
+
+        # Test connection with a simple request (only while warming up or on first use)
+        try:
+            log.info("Testing OpenAI connection...")
+            response = client.models.list()
+            log.info(f"OpenAI connection successful - available models: {len(response.data)}")
+        except Exception as e:
+            log.warning(f"OpenAI connection test failed: {e}")
+
+    def evaluate_response_with_openai(question, answer):
+        try:
+            return cached_chat(
+                client, "evaluation",
+                model="gpt-4o",
+                messages=[{"role": "user", "content": build_evaluation_prompt(question, answer)}]
+            )
+        except Exception as e:
+            log.warning(f"Error in response evaluation: {e}")
+            return evaluate_response_fallback(question, answer)
+
+    USE_OPENAI = True
+    return evaluate_response_with_openai
+
+registry.register("evaluation", load_evaluation_backend)
+
+def evaluate_response(question, answer):
+    """Evaluate an answer with the best available evaluator"""
+    evaluate = registry.get("evaluation")
+    with EVALUATION_SECONDS.time(backend="openai" if USE_OPENAI else "fallback"):
+        return evaluate(question, answer)
+
+async def evaluate_response_async(question, answer):
+    """evaluate_response for the ASGI server, using the async OpenAI client"""
+    feedback, _ = await evaluate_response_with_source_async(question, answer)
+    return feedback
+
+async def evaluate_response_with_source_async(question, answer):
+    """evaluate_response_async, also returning where the feedback came from:
+    "llm", or "rubric" when the local fallback had to answer"""
+    try:
+        from openai_client import get_async_openai_client
+        client = get_async_openai_client("evaluation")
+    except Exception as e:
+        log.warning(f"Async OpenAI client unavailable for evaluation: {e}")
+        return evaluate_response_fallback(question, answer), "rubric"
+
+    try:
+        with EVALUATION_SECONDS.time(backend="openai"):
+            feedback = await cached_chat_async(
+                client, "evaluation",
+                model="gpt-4o",
+                messages=[{"role": "user", "content": build_evaluation_prompt(question, answer)}]
+            )
+        return feedback, "llm"
     except Exception as e:
-        USE_OPENAI = False
-        print(f"OpenAI client initialization error: {e}")
-        print("Using fallback evaluator.")
-    
-except (ImportError, OSError) as e:
-    USE_OPENAI = False
-    print(f"Error loading OpenAI API: {e}")
-    print("Using canned responses for evaluation. Install OpenAI properly for real functionality.")
-    
-# Fallback response generator
+        log.warning(f"Error in response evaluation: {e}")
+        return evaluate_response_fallback(question, answer), "rubric"
+
+def stream_evaluation(question, answer):
+    """
+    evaluate_response, streamed: yields the feedback sentence by sentence
+    while GPT-4o is still generating it, so speech can start on the first
+    sentence. If the stream fails, the rubric feedback follows whatever
+    arrived, so the candidate still gets a whole evaluation.
+    """
+    from speaker import iter_sentences
+    registry.get("evaluation")
+    start = time.perf_counter()
+    backend = "fallback"
+    try:
+        if not USE_OPENAI:
+            yield from iter_sentences([evaluate_response_fallback(question, answer)])
+            return
+
+        from openai_client import get_openai_client
+        client = get_openai_client("evaluation")
+        backend = "openai"
+        try:
+            yield from iter_sentences(cached_chat_stream(
+                client, "evaluation",
+                model="gpt-4o",
+                messages=[{"role": "user", "content": build_evaluation_prompt(question, answer)}]
+            ))
+        except Exception as e:
+            log.warning(f"Error in streamed response evaluation: {e}")
+            backend = "fallback"
+            yield from iter_sentences([evaluate_response_fallback(question, answer)])
+    finally:
+        EVALUATION_SECONDS.observe(time.perf_counter() - start, backend=backend)
+
+async def stream_evaluation_async(question, answer):
+    """stream_evaluation for the ASGI server, using the async OpenAI client"""
+    from speaker import SentenceSplitter, iter_sentences
+    start = time.perf_counter()
+    backend = "fallback"
+    try:
+        try:
+            from openai_client import get_async_openai_client
+            client = get_async_openai_client("evaluation")
+        except Exception as e:
+            log.warning(f"Async OpenAI client unavailable for evaluation: {e}")
+            for sentence in iter_sentences([evaluate_response_fallback(question, answer)]):
+                yield sentence
+            return
+
+        backend = "openai"
+        splitter = SentenceSplitter()
+        try:
+            async for fragment in cached_chat_stream_async(
+                client, "evaluation",
+                model="gpt-4o",
+                messages=[{"role": "user", "content": build_evaluation_prompt(question, answer)}]
+            ):
+                for sentence in splitter.feed(fragment):
+                    yield sentence
+            for sentence in splitter.close():
+                yield sentence
+        except Exception as e:
+            log.warning(f"Error in streamed response evaluation: {e}")
+            backend = "fallback"
+            for sentence in iter_sentences([evaluate_response_fallback(question, answer)]):
+                yield sentence
+    finally:
+        EVALUATION_SECONDS.observe(time.perf_counter() - start, backend=backend)
+
+# Local fallback: the rubric scorer answers in about a millisecond
 def evaluate_response_fallback(question, answer):
-    print(f"Would evaluate response to: {question}")
-    
-    # Canned responses without follow-up questions
-    responses = [
-        "Your answer shows good technical knowledge and provides clear examples. To improve, you could quantify the impact of your work more specifically. Consider adding measurable outcomes to strengthen future responses.",
-        
-        "Good response with concrete practices mentioned. You might consider explaining how these practices improved outcomes in previous roles. Adding specific metrics would make this answer even stronger.",
-        
-        "Your approach seems methodical and thorough. You could strengthen this answer by mentioning how you collaborate with team members during difficult debugging sessions. Communication is key in technical roles.",
-        
-        "That's a solid answer showcasing your expertise. To make it stronger, provide more specific metrics or results from your experience. Quantifiable achievements help interviewers understand your impact."
-    ]
-    
-    # Return a response based on the question (using a simple hash)
-    hash_value = sum(ord(c) for c in question) % len(responses)
-    return responses[hash_value]
-
-# If OpenAI client initialization failed, use the fallback
-if not USE_OPENAI:
-    evaluate_response = evaluate_response_fallback
+    log.debug("Rubric feedback for: %s", question)
+    FALLBACKS.inc(component="evaluation")
+    return rubric_feedback(question, answer)
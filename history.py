@@ -0,0 +1,308 @@
+"""
+Interview history in SQLite: sessions, their questions, and per answer the
+transcript, feedback, rubric score and stage timings.
+
+Writes are write-behind. The request path only appends a statement to a
+queue, and a single writer thread commits them in batches. It waits up to
+HISTORY_FLUSH_INTERVAL after the first statement so that a burst becomes one
+transaction and one fsync. The database is in WAL mode, so reads, each on
+its own per-thread connection, never wait on the writer. A read can miss
+writes still in the queue, at most a flush interval behind.
+
+History pages are keyset-paginated. The cursor is the (time, id) of the
+last row on a page, so fetching page N costs the same as page 1 and rows
+inserted meanwhile don't shift the pages.
+"""
+import atexit
+import base64
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+from config import HISTORY_ENABLED, HISTORY_PATH, HISTORY_BATCH_SIZE, HISTORY_FLUSH_INTERVAL, HISTORY_PAGE_MAX
+from log import get_logger
+
+log = get_logger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    job TEXT NOT NULL,
+    interviewer_name TEXT,
+    interviewer_voice TEXT,
+    questions TEXT NOT NULL,          -- JSON list; index 0 is the welcome message
+    started_at REAL NOT NULL,
+    completed_at REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_by_user ON sessions (user_id, started_at, id);
+CREATE INDEX IF NOT EXISTS sessions_by_user_job ON sessions (user_id, job, started_at, id);
+
+CREATE TABLE IF NOT EXISTS answers (
+    session_id TEXT NOT NULL REFERENCES sessions (id),
+    question_index INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    question TEXT NOT NULL,
+    transcript TEXT,
+    feedback TEXT,
+    rubric_score REAL,
+    timings TEXT,                     -- JSON {stage: seconds}
+    created_at REAL NOT NULL,
+    PRIMARY KEY (session_id, question_index)
+);
+CREATE INDEX IF NOT EXISTS answers_by_user ON answers (user_id, created_at, session_id, question_index);
+"""
+
+_FLUSH = object()
+_STOP = object()
+
+
+def encode_cursor(*values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, length):
+    """Inverse of encode_cursor; raises ValueError for anything a client made up"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def clamp_limit(limit, default=20):
+    try:
+        limit = int(limit) if limit is not None else default
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    return max(1, min(limit, HISTORY_PAGE_MAX))
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_PATH, batch_size=HISTORY_BATCH_SIZE, flush_interval=HISTORY_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self._queue = queue.SimpleQueue()
+        self._local = threading.local()
+
+        db = self._connect()
+        db.executescript(SCHEMA)
+        db.close()
+
+        self._writer = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; only the last commits can be lost on power loss
+        return db
+
+    # Writing
+
+    def write(self, sql, params=()):
+        """Queue a statement for the writer thread; never blocks"""
+        self._queue.put((sql, params))
+
+    def flush(self, timeout=10):
+        """Block until everything queued so far is committed"""
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout=10):
+        if self._writer.is_alive():
+            self._queue.put((_STOP, None))
+            self._writer.join(timeout)
+
+    def _run(self):
+        db = self._connect()
+        stop = False
+        while not stop:
+            batch, waiters = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                sql, params = item
+                if sql is _STOP:
+                    stop = True
+                    break
+                if sql is _FLUSH:
+                    waiters.append(params)
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= self.batch_size or remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                self._commit(db, batch)
+            for done in waiters:
+                done.set()
+        db.close()
+
+    def _commit(self, db, batch):
+        try:
+            with db:
+                for sql, params in batch:
+                    db.execute(sql, params)
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            # Find the bad statement(s) instead of losing the whole batch
+            log.warning(f"History batch of {len(batch)} failed ({e}), retrying one at a time")
+            for sql, params in batch:
+                try:
+                    with db:
+                        db.execute(sql, params)
+                    self.written += 1
+                except sqlite3.Error as e:
+                    self.failed += 1
+                    log.warning(f"History write dropped: {e}")
+        self.batches += 1
+
+    def record_session(self, session, started_at=None):
+        self.write(
+            "INSERT OR REPLACE INTO sessions (id, user_id, job, interviewer_name, interviewer_voice, questions, "
+            "started_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (session.session_id, session.user_id, session.job, session.interviewer_name,
+             session.interviewer_voice, json.dumps(session.questions), started_at or time.time()))
+
+    def record_answer(self, session, index, transcript, feedback=None, rubric_score=None, timings=None):
+        """Store the answer to question `index`. The values come from the caller rather than
+        the session's answer lists, which a failed and retried answer leaves out of step."""
+        with session.lock:
+            question = session.questions[index]
+        self.write(
+            "INSERT OR REPLACE INTO answers (session_id, question_index, user_id, question, transcript, feedback, "
+            "rubric_score, timings, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (session.session_id, index, session.user_id, question, transcript, feedback,
+             rubric_score, json.dumps(timings or {}), time.time()))
+
+    def complete_session(self, session_id):
+        self.write("UPDATE sessions SET completed_at = ? WHERE id = ?", (time.time(), session_id))
+
+    # Reading
+
+    def _reader(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self._connect()
+        return db
+
+    def sessions_page(self, user_id, limit=20, cursor=None, job=None):
+        """A user's interviews, newest first: {"sessions": [...], "next_cursor": str or None}"""
+        sql = ("SELECT s.id, s.job, s.interviewer_name, s.started_at, s.completed_at, "
+               "(SELECT COUNT(*) FROM answers a WHERE a.session_id = s.id) AS answers, "
+               "(SELECT AVG(a.rubric_score) FROM answers a WHERE a.session_id = s.id) AS average_rubric_score "
+               "FROM sessions s WHERE s.user_id = ?")
+        params = [user_id]
+        if job:
+            sql += " AND s.job = ?"
+            params.append(job)
+        if cursor:
+            started_at, session_id = decode_cursor(cursor, 2)
+            sql += " AND (s.started_at, s.id) < (?, ?)"
+            params += [started_at, session_id]
+        sql += " ORDER BY s.started_at DESC, s.id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = [dict(row) for row in self._reader().execute(sql, params)]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1]["started_at"], rows[-1]["id"])
+        return {"sessions": rows, "next_cursor": next_cursor}
+
+    def answers_page(self, user_id, limit=20, cursor=None):
+        """A user's answers across all interviews, newest first"""
+        sql = ("SELECT session_id, question_index, question, transcript, feedback, rubric_score, timings, "
+               "created_at FROM answers WHERE user_id = ?")
+        params = [user_id]
+        if cursor:
+            created_at, session_id, question_index = decode_cursor(cursor, 3)
+            sql += " AND (created_at, session_id, question_index) < (?, ?, ?)"
+            params += [created_at, session_id, question_index]
+        sql += " ORDER BY created_at DESC, session_id DESC, question_index DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = [dict(row) for row in self._reader().execute(sql, params)]
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(last["created_at"], last["session_id"], last["question_index"])
+        for row in rows:
+            row["timings"] = json.loads(row["timings"] or "{}")
+        return {"answers": rows, "next_cursor": next_cursor}
+
+    def session_detail(self, user_id, session_id):
+        """One of the user's interviews with all its answers, or None"""
+        db = self._reader()
+        row = db.execute("SELECT * FROM sessions WHERE id = ? AND user_id = ?", (session_id, user_id)).fetchone()
+        if row is None:
+            return None
+        detail = dict(row)
+        detail["questions"] = json.loads(detail["questions"])
+        detail["answers"] = []
+        for answer in db.execute("SELECT question_index, question, transcript, feedback, rubric_score, timings, "
+                                 "created_at FROM answers WHERE session_id = ? ORDER BY question_index",
+                                 (session_id,)):
+            answer = dict(answer)
+            answer["timings"] = json.loads(answer["timings"] or "{}")
+            detail["answers"].append(answer)
+        return detail
+
+    def stats(self):
+        return {"written": self.written, "batches": self.batches, "failed": self.failed,
+                "queued": self._queue.qsize()}
+
+
+_history = None
+_history_failed = False
+_history_lock = threading.Lock()
+
+
+def get_history():
+    """The shared store, or None when HISTORY_ENABLED is off or the database can't be opened"""
+    global _history, _history_failed
+    if not HISTORY_ENABLED or _history_failed:
+        return None
+    with _history_lock:
+        if _history is None and not _history_failed:
+            try:
+                _history = HistoryStore()
+            except sqlite3.Error as e:
+                log.warning(f"Session history unavailable: {e}")
+                _history_failed = True
+    return _history
+
+
+def record_session(session):
+    history = get_history()
+    if history is not None and session.user_id:
+        history.record_session(session)
+
+
+def record_answer(session, index, transcript, feedback=None, rubric_score=None, timings=None):
+    history = get_history()
+    if history is not None and session.user_id:
+        history.record_answer(session, index, transcript, feedback, rubric_score, timings)
+
+
+def complete_session(session):
+    history = get_history()
+    if history is not None and session.user_id:
+        history.complete_session(session.session_id)
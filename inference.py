@@ -0,0 +1,232 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from config import (INFERENCE_WORKERS, INFERENCE_TORCH_THREADS, INFERENCE_QUEUE_SIZE,
+                    INFERENCE_MAX_BATCH, INFERENCE_BATCH_WAIT_MS, INFERENCE_SUBMIT_TIMEOUT)
+from log import get_logger
+
+log = get_logger(__name__)
+
+TIME_PRECISION = 0.02  # Seconds per Whisper timestamp token
+
+
+class InferenceRequest:
+    __slots__ = ("audio", "mel", "options", "key", "future", "submitted_at", "started_at")
+
+    def __init__(self, audio, mel, options, key):
+        self.audio = audio
+        self.mel = mel
+        self.options = options
+        self.key = key  # Requests with equal keys can share one decode call; None = not batchable
+        self.future = Future()
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+
+
+class WhisperInferenceService:
+    """
+    One shared Whisper model served by a small pool of worker threads.
+
+    Callers submit audio through a bounded queue instead of running the model
+    on their own thread. Answers that fit in a single 30-second window are
+    converted to log-mel on the caller's thread, and workers stack pending
+    windows from different sessions into one batched decode. Longer audio
+    goes through the regular sequential model.transcribe.
+
+    transcribe() returns the same dict shape as model.transcribe, so the
+    service can stand in for the model anywhere (e.g. StreamingTranscriber).
+
+    `batchable` is set by the loader for openai-whisper models. Cross-session
+    batching and the torch thread settings need openai-whisper and torch.
+    Other runtimes (e.g. faster-whisper) only provide transcribe(), and this
+    module doesn't import either package for them.
+    """
+
+    def __init__(self, model, batchable=False, workers=INFERENCE_WORKERS, torch_threads=INFERENCE_TORCH_THREADS,
+                 queue_size=INFERENCE_QUEUE_SIZE, max_batch=INFERENCE_MAX_BATCH,
+                 batch_wait_ms=INFERENCE_BATCH_WAIT_MS):
+        self.model = model
+        self.batchable = batchable
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000.0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=200)
+        self.completed = 0
+        self.failed = 0
+        self.batches = 0
+        self.batched_requests = 0
+
+        # Keep workers * torch threads within the core count so they don't oversubscribe
+        self.torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // max(1, workers))
+        if batchable:
+            import torch
+            torch.set_num_threads(self.torch_threads)
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError as e:
+                # Only allowed before any inter-op parallel work has started
+                log.warning(f"Could not set torch inter-op threads: {e}")
+
+        self._workers = []
+        for i in range(workers):
+            worker = threading.Thread(target=self._run, name=f"whisper-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        log.info(f"Whisper inference service: {workers} worker(s), {self.torch_threads} torch thread(s) each")
+
+    def submit(self, audio, **options):
+        """Queue audio (a path or 16 kHz float32 array) and return a Future of the result dict"""
+        mel, key = None, None
+        if self.batchable:
+            import whisper
+            if isinstance(audio, str):
+                audio = whisper.load_audio(audio)
+            audio = np.asarray(audio, dtype=np.float32)
+            if len(audio) <= whisper.audio.N_SAMPLES:
+                mel = whisper.log_mel_spectrogram(audio, self.model.dims.n_mels)
+                mel = whisper.pad_or_trim(mel, whisper.audio.N_FRAMES)
+                key = (options.get("language"), options.get("initial_prompt"),
+                       options.get("temperature", 0.0), options.get("fp16", False))
+        elif not isinstance(audio, str):
+            # Paths go straight to model.transcribe, which decodes the file itself
+            audio = np.asarray(audio, dtype=np.float32)
+
+        request = InferenceRequest(audio, mel, options, key)
+        try:
+            self._queue.put(request, timeout=INFERENCE_SUBMIT_TIMEOUT)
+        except queue.Full:
+            raise RuntimeError(f"Transcription queue full ({self._queue.maxsize} pending)")
+        return request.future
+
+    def transcribe(self, audio, **options):
+        """Blocking convenience wrapper around submit()"""
+        return self.submit(audio, **options).result()
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            return {
+                "queue_depth": self.queue_depth(),
+                "workers": len(self._workers),
+                "torch_threads": self.torch_threads,
+                "completed": self.completed,
+                "failed": self.failed,
+                "batches": self.batches,
+                "avg_batch_size": self.batched_requests / self.batches if self.batches else 0.0,
+                "latency_p50": latencies[len(latencies) // 2] if latencies else None,
+                "latency_p95": latencies[int(len(latencies) * 0.95)] if latencies else None,
+            }
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            if batch[0].key is not None:
+                # Give other sessions a moment to add windows to this batch
+                deadline = time.monotonic() + self.batch_wait
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+            groups = {}
+            for request in batch:
+                request.started_at = time.monotonic()
+                if request.key is None:
+                    self._run_single(request)
+                else:
+                    groups.setdefault(request.key, []).append(request)
+            for requests in groups.values():
+                self._run_batch(requests)
+
+    def _run_single(self, request):
+        options = dict(request.options)
+        options.setdefault("fp16", False)
+        try:
+            self._finish(request, result=self.model.transcribe(request.audio, **options))
+        except Exception as e:
+            self._finish(request, error=e)
+
+    def _run_batch(self, requests):
+        import torch
+        import whisper
+        first = requests[0].options
+        decode_options = whisper.DecodingOptions(
+            language=first.get("language"),
+            prompt=first.get("initial_prompt"),
+            temperature=first.get("temperature", 0.0),
+            fp16=first.get("fp16", False)
+        )
+        try:
+            mel = torch.stack([r.mel for r in requests]).to(self.model.device)
+            results = whisper.decode(self.model, mel, decode_options)
+        except Exception as e:
+            log.warning(f"Batched decode of {len(requests)} window(s) failed, decoding individually: {e}")
+            for request in requests:
+                self._run_single(request)
+            return
+
+        with self._stats_lock:
+            self.batches += 1
+            self.batched_requests += len(requests)
+        for request, result in zip(requests, results):
+            duration = len(request.audio) / whisper.audio.SAMPLE_RATE
+            # Same silence test model.transcribe applies with its default thresholds
+            if result.no_speech_prob > 0.6 and result.avg_logprob < -1.0:
+                self._finish(request, result={"text": "", "segments": [], "language": result.language})
+                continue
+            self._finish(request, result={
+                "text": result.text,
+                "segments": self._segments(result, duration),
+                "language": result.language
+            })
+
+    def _segments(self, result, duration):
+        """Split a decoded token sequence into timestamped segments"""
+        import whisper
+        tokenizer = whisper.tokenizer.get_tokenizer(
+            self.model.is_multilingual,
+            num_languages=getattr(self.model, "num_languages", 99),
+            language=result.language,
+            task="transcribe"
+        )
+        segments, text_tokens, start = [], [], None
+        for token in result.tokens:
+            if token < tokenizer.timestamp_begin:
+                text_tokens.append(token)
+                continue
+            timestamp = (token - tokenizer.timestamp_begin) * TIME_PRECISION
+            if start is not None and text_tokens:
+                segments.append({"start": start, "end": timestamp, "text": tokenizer.decode(text_tokens)})
+                text_tokens, start = [], None
+            else:
+                start = timestamp
+        if text_tokens:
+            segments.append({"start": start or 0.0, "end": duration, "text": tokenizer.decode(text_tokens)})
+        return segments
+
+    def _finish(self, request, result=None, error=None):
+        latency = time.monotonic() - request.submitted_at
+        waited = request.started_at - request.submitted_at
+        with self._stats_lock:
+            self._latencies.append(latency)
+            if error is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+        log.debug("Transcription request done in %.2fs (queued %.2fs, queue depth %s)", latency, waited, self.queue_depth())
+        if error is None:
+            request.future.set_result(result)
+        else:
+            request.future.set_exception(error)
@@ -0,0 +1,341 @@
+"""
+The interview flow shared by both servers.
+
+app.py (Flask) and asgi_app.py (Starlette) only route requests and turn
+the (body, status) results below into responses. Everything here is plain
+blocking code: the Flask server calls it directly, the async server runs
+the slow steps (transcription, playback, history queries) on its thread
+pools and drives AnswerPipeline step by step.
+"""
+import time
+
+import speaker
+from speaker import speak, speak_stream, prefetch_speech
+from transcriber import transcribe_audio, create_streaming_transcriber
+from recorder import record_audio_threaded, create_capture
+from rubric import quick_evaluation
+from evaluater import evaluate_response, stream_evaluation
+from config import STREAMING_TRANSCRIPTION, FEEDBACK_STREAMING, SPEECH_PAUSE_SECONDS
+from metrics import FEEDBACK_FIRST_AUDIO_SECONDS
+from sessions import next_utterance, log_session_state
+import history
+from log import get_logger
+
+log = get_logger(__name__)
+
+RECORDING_FS = 44100
+
+
+def error(message):
+    return {"status": "error", "message": message}
+
+
+def answer_filename(session, index):
+    return f"answer_{session.session_id}_{index}.wav"
+
+
+def start_session(sessions, job, questions, interviewer_name, interviewer_voice, replace_id=None, user_id=None):
+    """Create the session for a new interview (replacing `replace_id`) and open its history record"""
+    session = sessions.create(using_openai_tts=speaker.USE_OPENAI_TTS, replace_id=replace_id, user_id=user_id)
+    session.update(
+        "interview_started",
+        job=job,
+        questions=questions,
+        interviewer_name=interviewer_name,
+        interviewer_voice=interviewer_voice,
+        is_speaking=True
+    )
+    history.record_session(session)
+    return session
+
+
+def session_started(session):
+    """Body of the /api/start response"""
+    return {
+        "status": "success",
+        "message": "Interview started",
+        "job": session.job,
+        "questions": session.questions,
+        "using_openai_tts": speaker.USE_OPENAI_TTS,
+        "session_id": session.session_id
+    }
+
+
+def begin_recording(session):
+    """Claim the session for the next answer. Returns (question index, None) or (None, error body)."""
+    with session.lock:
+        if session.current_question_index < 0:
+            return None, error("Interview not started")
+
+        if session.is_recording or session.is_processing:
+            return None, error("Already recording or processing")
+
+        if session.is_speaking:
+            return None, error("Please wait for the interviewer to finish speaking")
+
+        session.update("recording_started", is_recording=True)
+        session.stop_requested_at = None
+        return session.current_question_index, None
+
+
+def start_recording(session, index, mode, end_silence_ms, on_finished):
+    """
+    Record the answer to question `index` on a new thread and return the response body.
+    `on_finished(streamer, capture)` runs on the recorder's thread once the recording ends.
+    """
+    # Transcribe while the candidate is still speaking when a local model is available
+    streamer = None
+    if STREAMING_TRANSCRIPTION:
+        try:
+            streamer = create_streaming_transcriber()
+        except Exception as e:
+            log.warning(f"Streaming transcription unavailable: {e}")
+
+    # Record the answer. It stays in memory and goes straight to the transcriber;
+    # the WAV file is only written afterwards, in the background.
+    filename = answer_filename(session, index)
+    capture = create_capture(filename, fs=RECORDING_FS)
+
+    # Manual mode waits for /api/stop_recording
+    session.recorder = record_audio_threaded(
+        filename,
+        fs=RECORDING_FS,
+        callback=lambda: on_finished(streamer, capture),
+        manual_mode=(mode == "manual"),
+        end_silence_ms=end_silence_ms,
+        on_audio=streamer.feed if streamer else None,
+        capture=capture
+    )
+
+    # Whatever the answer, the next question (or closing message) is known now:
+    # synthesize it while the candidate is still talking
+    prefetch_speech(next_utterance(session, index), voice=session.interviewer_voice)
+
+    if mode == "voice":
+        return {"status": "success", "mode": mode,
+                "message": "Recording started - it will stop when you finish speaking"}
+    return {"status": "success", "mode": mode, "message": "Recording started - press stop when finished"}
+
+
+def stop_recording(session):
+    """Wake the session's recorder; it finalizes the audio and runs the pipeline"""
+    log_session_state(session, "Stop recording requested, current state")
+
+    if not session.is_recording:
+        log.warning("Attempted to stop recording but not currently recording")
+        log.debug("Current question index: %s, processing: %s", session.current_question_index, session.is_processing)
+        return error("Not currently recording")
+
+    log.info("Stopping recording via API request")
+    session.stop_requested_at = time.time()
+    if session.recorder is not None and session.recorder.stop():
+        # Don't set is_recording to False here, the recording callback does that
+        log.info("Successfully requested recording to stop")
+    else:
+        log.warning("Failed to stop recording, forcing state reset")
+        session.update("recording_stopped", is_recording=False)
+
+    return {"status": "success", "message": "Recording stop requested"}
+
+
+def reset_recording(session):
+    """Clear stuck recording/processing flags and end the session's recording, if any"""
+    log.warning("Emergency recording state reset")
+    log_session_state(session, "Previous state")
+
+    session.update("recording_reset", is_recording=False, is_processing=False, is_speaking=False)
+
+    if session.recorder is not None and session.recorder.stop(reason="reset"):
+        log.info("Stopped the session's recorder")
+
+    log_session_state(session, "New state")
+    return {"status": "success", "message": "Recording state has been reset"}
+
+
+def history_sessions(user_id, params):
+    """(body, status) for /api/history; `params` are the query parameters"""
+    store = history.get_history()
+    if store is None:
+        return error("Interview history is disabled"), 404
+    if not user_id:
+        return {"sessions": [], "next_cursor": None}, 200
+    try:
+        return store.sessions_page(user_id, limit=history.clamp_limit(params.get("limit")),
+                                   cursor=params.get("cursor"), job=params.get("job")), 200
+    except ValueError as e:
+        return error(str(e)), 400
+
+
+def history_answers(user_id, params):
+    """(body, status) for /api/history/answers"""
+    store = history.get_history()
+    if store is None:
+        return error("Interview history is disabled"), 404
+    if not user_id:
+        return {"answers": [], "next_cursor": None}, 200
+    try:
+        return store.answers_page(user_id, limit=history.clamp_limit(params.get("limit")),
+                                  cursor=params.get("cursor")), 200
+    except ValueError as e:
+        return error(str(e)), 400
+
+
+def history_session(user_id, session_id):
+    """(body, status) for /api/history/<session_id>"""
+    store = history.get_history()
+    if store is None:
+        return error("Interview history is disabled"), 404
+    detail = store.session_detail(user_id, session_id)
+    if detail is None:
+        return error("Interview not found"), 404
+    return detail, 200
+
+
+class AnswerPipeline:
+    """
+    What happens after an answer is recorded: transcribe it, score it,
+    evaluate it (speaking the feedback), advance to the next question,
+    keep the answer in the history and speak what comes next.
+
+    run() does it all on the calling thread. The async server calls the
+    steps itself so that it can await the evaluation in between.
+    `timings` holds the stage durations in seconds, kept with the answer
+    in the history.
+    """
+
+    def __init__(self, session, streamer=None, capture=None):
+        self.session = session
+        self.streamer = streamer
+        self.capture = capture
+        log.debug("Processing recording result. Current state: recording=%s, processing=%s",
+                  session.is_recording, session.is_processing)
+        with session.lock:
+            session.update("recording_stopped", is_recording=False, is_processing=True)
+            self.index = session.current_question_index
+        self.filename = answer_filename(session, self.index)
+        self.voice = session.interviewer_voice
+        self.question = session.questions[self.index]
+        self.next_text = next_utterance(session, self.index)
+        self.timings = {}
+        self.evaluation_started = None
+        # This answer's results, kept here for the history
+        self.answer = None
+        self.rubric = None
+        self.feedback = None
+
+    def run(self):
+        try:
+            answer = self.transcribe()
+            self.answer_ready(answer)
+
+            if FEEDBACK_STREAMING:
+                # The first sentence is spoken while the rest is still being generated;
+                # the whole feedback is stored once its last sentence has arrived
+                sentences = []
+
+                def feedback_sentences():
+                    try:
+                        for sentence in stream_evaluation(self.question, answer):
+                            sentences.append(sentence)
+                            yield sentence
+                    finally:
+                        self.feedback_ready(" ".join(sentences))
+
+                self.first_feedback_audio(speak_stream(feedback_sentences(), voice=self.voice))
+            else:
+                feedback = evaluate_response(self.question, answer)
+                self.feedback_ready(feedback)
+                speak(feedback, voice=self.voice)
+
+            self.answer_done()
+            # Then the (already synthesized) next question or closing message
+            time.sleep(SPEECH_PAUSE_SECONDS)
+            log.debug("Next: %s", self.next_text)
+            speak(self.next_text, voice=self.voice)
+        except Exception:
+            log.exception("Error processing recording")
+        finally:
+            self.processing_done()
+
+    def transcribe(self):
+        """Blocking: the transcript of the answer"""
+        started = time.perf_counter()
+        answer = None
+        if self.streamer is not None:
+            # Most of the answer was decoded during capture; only the tail remains
+            try:
+                answer = self.streamer.finish()
+            except Exception as e:
+                log.warning(f"Streaming transcription failed, transcribing file instead: {e}")
+        if answer is None:
+            if self.capture is not None and not self.capture.num_samples:
+                # Nothing was captured, so no WAV file was written either
+                log.warning("No audio recorded, storing an empty answer")
+                answer = ""
+            elif self.capture is not None:
+                log.info(f"Transcribing {self.capture.duration:.1f}s of in-memory audio")
+                answer = transcribe_audio(self.capture.audio(), self.filename)
+            else:
+                log.info(f"Transcribing answer from {self.filename}")
+                answer = transcribe_audio(self.filename)
+        self.timings["transcribe"] = round(time.perf_counter() - started, 3)
+        if self.session.stop_requested_at:
+            self.timings["stop_to_transcript"] = round(time.time() - self.session.stop_requested_at, 3)
+            log.info(f"Stop-to-transcript latency: {self.timings['stop_to_transcript']:.2f}s")
+        log.debug("Transcription result: %.50s...", answer)
+        return answer
+
+    def answer_ready(self, answer):
+        """Store the transcript with its instant rubric score; the evaluation starts next"""
+        self.answer = answer
+        self.session.append("transcript_ready", "answers", answer)
+        # Instant local score and feedback, shown while the LLM evaluation is pending
+        self.rubric = quick_evaluation(self.question, answer)
+        self.session.append("rubric_ready", "rubrics", self.rubric)
+        if self.capture is not None:
+            self.capture.persist()
+
+        # The next utterance doesn't depend on the evaluation, so make sure it is
+        # being synthesized while we evaluate (a no-op if recording already started it)
+        prefetch_speech(self.next_text, voice=self.voice)
+        log.debug("Evaluating response to: %s", self.question)
+        self.evaluation_started = time.perf_counter()
+
+    def feedback_ready(self, feedback):
+        """Store the feedback and advance the state machine now rather than after playback"""
+        self.timings["evaluate"] = round(time.perf_counter() - self.evaluation_started, 3)
+        session = self.session
+        self.feedback = feedback
+        session.append("feedback_ready", "feedbacks", feedback)
+        log.debug("Feedback: %.50s...", feedback)
+
+        with session.lock:
+            next_index = self.index + 1
+            # Note: index 0 was the welcome message, so we include it in the length check
+            if next_index < len(session.questions):
+                session.update("next_question", current_question_index=next_index,
+                               is_processing=False, is_speaking=True)
+            else:
+                session.update("interview_complete", current_question_index=next_index,
+                               is_complete=True, is_processing=False, is_speaking=True)
+        log.debug("New index: %s, Total questions: %s", next_index, len(session.questions))
+
+    def first_feedback_audio(self, seconds):
+        """Record the time to the first sentence of streamed feedback audio (None if nothing played)"""
+        if seconds is None:
+            return
+        FEEDBACK_FIRST_AUDIO_SECONDS.observe(seconds)
+        self.timings["first_feedback_audio"] = round(seconds, 3)
+        log.info(f"Time to first feedback audio: {seconds:.2f}s")
+
+    def answer_done(self):
+        """Keep the answer, its feedback and timings in the history"""
+        history.record_answer(self.session, self.index, self.answer, self.feedback,
+                              self.rubric["score"], self.timings)
+        if self.session.is_complete:
+            history.complete_session(self.session)
+
+    def processing_done(self):
+        # Make sure to reset processing state when done
+        self.session.update("processing_done", is_processing=False, is_speaking=False)
+        log.debug("Set is_processing=False")
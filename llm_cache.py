@@ -0,0 +1,247 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from config import LLM_CACHE_ENABLED, LLM_CACHE_PATH, LLM_CACHE_MEMORY_ENTRIES
+from log import get_logger
+
+log = get_logger(__name__)
+
+# ttl: seconds a response stays valid (0 = never cache); persist: also keep it in SQLite
+CachePolicy = namedtuple("CachePolicy", ["ttl", "persist"])
+
+# Per call site. Question generation is cached only briefly: variety matters
+# there, and the question bank already covers repeated roles.
+CACHE_POLICIES = {
+    "jobs": CachePolicy(ttl=6 * 3600, persist=True),
+    "evaluation": CachePolicy(ttl=7 * 24 * 3600, persist=True),
+    "welcome": CachePolicy(ttl=600, persist=False),
+    "questions": CachePolicy(ttl=600, persist=False),
+}
+DEFAULT_POLICY = CachePolicy(ttl=600, persist=False)
+
+
+def make_key(request):
+    """Stable key over model, messages and every other request parameter"""
+    payload = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier cache of chat completion text.
+
+    An in-memory LRU with per-entry expiry answers repeated prompts without
+    any I/O. Call sites whose policy says persist also write to a SQLite
+    table, so their responses survive restarts. Disk hits are promoted back
+    into memory.
+
+    The lock only guards the memory tier. SQLite reads and writes run
+    outside it, each thread on its own connection, so a memory hit never
+    waits on another thread's commit.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, max_entries=LLM_CACHE_MEMORY_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._memory = OrderedDict()  # key -> (expires_at, content)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.counters = {}  # call site -> {"memory_hits", "disk_hits", "misses"}
+
+        self.persistent = False
+        try:
+            db = self._connection()
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, call_site TEXT, content TEXT, expires_at REAL)"
+            )
+            db.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+            db.commit()
+            self.persistent = True
+        except sqlite3.Error as e:
+            log.warning(f"LLM cache: persistent tier unavailable ({e}), using memory only")
+
+    def _connection(self):
+        """This thread's SQLite connection"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=10)
+        return db
+
+    def _count(self, call_site, field):
+        counters = self.counters.setdefault(call_site, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+        counters[field] += 1
+
+    def get(self, key, call_site, policy):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._count(call_site, "memory_hits")
+                    return entry[1]
+                del self._memory[key]
+
+        row = None
+        if policy.persist and self.persistent:
+            try:
+                row = self._connection().execute(
+                    "SELECT content, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+            except sqlite3.Error as e:
+                log.warning(f"LLM cache read failed: {e}")
+
+        with self._lock:
+            if row is not None:
+                self._remember_locked(key, row[1], row[0])
+                self._count(call_site, "disk_hits")
+                return row[0]
+            self._count(call_site, "misses")
+            return None
+
+    def put(self, key, content, call_site, policy):
+        expires_at = time.time() + policy.ttl
+        with self._lock:
+            self._remember_locked(key, expires_at, content)
+        if policy.persist and self.persistent:
+            try:
+                db = self._connection()
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, call_site, content, expires_at) VALUES (?, ?, ?, ?)",
+                        (key, call_site, content, expires_at)
+                    )
+            except sqlite3.Error as e:
+                log.warning(f"LLM cache write failed: {e}")
+
+    def _remember_locked(self, key, expires_at, content):
+        self._memory[key] = (expires_at, content)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            sites = {}
+            for call_site, counters in self.counters.items():
+                lookups = sum(counters.values())
+                hits = counters["memory_hits"] + counters["disk_hits"]
+                sites[call_site] = dict(counters, hit_rate=hits / lookups if lookups else 0.0)
+            return {"memory_entries": len(self._memory), "persistent": self.persistent, "call_sites": sites}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+    return _cache
+
+
+def cached_chat(client, call_site, **request):
+    """
+    client.chat.completions.create(**request) behind the shared cache.
+    Returns the message content of the first choice.
+    """
+    policy = CACHE_POLICIES.get(call_site, DEFAULT_POLICY)
+    if not LLM_CACHE_ENABLED or policy.ttl <= 0:
+        return client.chat.completions.create(**request).choices[0].message.content
+
+    cache = get_llm_cache()
+    key = make_key(request)
+    content = cache.get(key, call_site, policy)
+    if content is not None:
+        return content
+
+    content = client.chat.completions.create(**request).choices[0].message.content
+    if content:
+        cache.put(key, content, call_site, policy)
+    return content
+
+
+async def put_async(cache, key, content, call_site, policy):
+    """cache.put off the event loop: a persisted entry waits on a SQLite commit"""
+    if not policy.persist:
+        cache.put(key, content, call_site, policy)
+        return
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, cache.put, key, content, call_site, policy)
+
+
+async def cached_chat_async(client, call_site, **request):
+    """cached_chat for an AsyncOpenAI client. Lookups stay synchronous: the
+    memory tier is a dict and the SQLite tier is a primary-key read. Writes
+    that reach SQLite run on a worker thread."""
+    policy = CACHE_POLICIES.get(call_site, DEFAULT_POLICY)
+    if not LLM_CACHE_ENABLED or policy.ttl <= 0:
+        response = await client.chat.completions.create(**request)
+        return response.choices[0].message.content
+
+    cache = get_llm_cache()
+    key = make_key(request)
+    content = cache.get(key, call_site, policy)
+    if content is not None:
+        return content
+
+    response = await client.chat.completions.create(**request)
+    content = response.choices[0].message.content
+    if content:
+        await put_async(cache, key, content, call_site, policy)
+    return content
+
+
+def cached_chat_stream(client, call_site, **request):
+    """
+    cached_chat with stream=True: yields the completion text in fragments as
+    they arrive. A cache hit yields the whole text at once. A stream that
+    completes is cached like a regular response, under the same key.
+    """
+    policy = CACHE_POLICIES.get(call_site, DEFAULT_POLICY)
+    use_cache = LLM_CACHE_ENABLED and policy.ttl > 0
+    if use_cache:
+        cache = get_llm_cache()
+        key = make_key(request)
+        content = cache.get(key, call_site, policy)
+        if content is not None:
+            yield content
+            return
+
+    parts = []
+    for chunk in client.chat.completions.create(stream=True, **request):
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            yield parts[-1]
+    if use_cache and parts:
+        cache.put(key, "".join(parts), call_site, policy)
+
+
+async def cached_chat_stream_async(client, call_site, **request):
+    """cached_chat_stream for an AsyncOpenAI client"""
+    policy = CACHE_POLICIES.get(call_site, DEFAULT_POLICY)
+    use_cache = LLM_CACHE_ENABLED and policy.ttl > 0
+    if use_cache:
+        cache = get_llm_cache()
+        key = make_key(request)
+        content = cache.get(key, call_site, policy)
+        if content is not None:
+            yield content
+            return
+
+    parts = []
+    async for chunk in await client.chat.completions.create(stream=True, **request):
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            yield parts[-1]
+    if use_cache and parts:
+        await put_async(cache, key, "".join(parts), call_site, policy)
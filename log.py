@@ -0,0 +1,83 @@
+"""
+Non-blocking logging for the whole app.
+
+Modules log through get_logger(__name__). A record is only appended to a
+queue on the calling thread, and a background QueueListener formats it and
+writes it to stderr. So a slow terminal or pipe never stalls a request, a
+Whisper worker or the PortAudio callback. Formatting happens on the writer
+thread too, so prefer logger.debug("... %s", value) on hot paths.
+
+RateLimitedLog keeps threads that fire many times per second (the audio
+callback) from flooding the queue with repeats of the same message.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+from config import LOG_LEVEL
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue the record untouched; the listener thread does all formatting"""
+
+    def prepare(self, record):
+        return record
+
+
+def setup_logging(level=LOG_LEVEL):
+    """Install the queue handler on the root logger and start the writer thread. Idempotent."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        records = queue.SimpleQueue()  # put() never blocks and takes no Python-level lock
+        writer = logging.StreamHandler(sys.stderr)
+        writer.setFormatter(logging.Formatter(LOG_FORMAT, datefmt="%H:%M:%S"))
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(_DeferredQueueHandler(records))
+
+        _listener = logging.handlers.QueueListener(records, writer, respect_handler_level=True)
+        _listener.start()
+        # Flush what is still queued when the process exits
+        atexit.register(_listener.stop)
+
+
+def get_logger(name):
+    setup_logging()
+    return logging.getLogger(name)
+
+
+class RateLimitedLog:
+    """
+    Emits a message at most once per `interval` seconds per key, then reports
+    how many repeats were dropped. Meant for a single hot thread: the check
+    is a dict lookup and a clock read, with no lock.
+    """
+
+    def __init__(self, logger, interval):
+        self.logger = logger
+        self.interval = interval
+        self._last = {}  # key -> (emitted at, suppressed since)
+
+    def log(self, level, key, msg, *args):
+        now = time.monotonic()
+        last, suppressed = self._last.get(key, (None, 0))
+        if last is not None and now - last < self.interval:
+            self._last[key] = (last, suppressed + 1)
+            return
+        self._last[key] = (now, 0)
+        if suppressed:
+            msg += " (%d similar messages suppressed)"
+            args += (suppressed,)
+        self.logger.log(level, msg, *args)
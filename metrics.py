@@ -0,0 +1,235 @@
+"""
+Process-wide counters and latency histograms, exposed as Prometheus text.
+
+Recording a value costs a bisect and a short lock, so stages can be timed on
+the hot path. Numbers that other components already keep, such as cache
+hit counts and the inference queue, are not mirrored here. Collectors read
+them when /api/metrics is scraped.
+
+    with TRANSCRIPTION_SECONDS.time(backend="whisper"):
+        ...
+    FALLBACKS.inc(component="evaluation")
+"""
+import bisect
+import threading
+import time
+
+from log import get_logger
+
+log = get_logger(__name__)
+
+# Seconds; covers sub-100 ms cache hits up to slow multi-second API calls
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+DURATION_BUCKETS = (1, 5, 10, 20, 30, 60, 120, 300, 600, 1800)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """A monotonically increasing count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield f"{self.name}_total{_format_labels(self.labelnames, key)} {value}"
+
+
+class Histogram:
+    """Observations counted into cumulative buckets per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        """Context manager that observes the wall time of its block"""
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values[:-1]):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', bound))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {values[-1]}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """Register a function returning [(name, kind, help, [(labels dict, value), ...])],
+        called at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception as e:
+                log.warning(f"Metrics collector failed: {e}")
+                continue
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    names = tuple(labels)
+                    lines.append(f"{name}{_format_labels(names, tuple(labels[n] for n in names))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+RECORDING_SECONDS = registry.histogram(
+    "interview_recording_duration_seconds", "Length of recorded answers", buckets=DURATION_BUCKETS)
+RECORDING_STOP_SECONDS = registry.histogram(
+    "interview_recording_stop_latency_seconds", "Time from a stop request until the recording was finalized",
+    ["reason"])
+TRANSCRIPTION_SECONDS = registry.histogram(
+    "interview_transcription_seconds", "Time to transcribe one answer", ["backend"])
+EVALUATION_SECONDS = registry.histogram(
+    "interview_evaluation_seconds", "Time to generate feedback for one answer", ["backend"])
+QUESTIONS_SECONDS = registry.histogram(
+    "interview_question_generation_seconds", "Time to produce the questions for an interview", ["source"])
+TTS_SYNTHESIS_SECONDS = registry.histogram(
+    "interview_tts_synthesis_seconds",
+    "Time for the TTS API to synthesize one utterance or sentence (cache hits excluded)")
+TTS_FIRST_AUDIO_SECONDS = registry.histogram(
+    "interview_tts_first_audio_seconds", "Time from speak() until the first audio played")
+FEEDBACK_FIRST_AUDIO_SECONDS = registry.histogram(
+    "interview_feedback_first_audio_seconds",
+    "Time from the transcript until the first sentence of feedback started playing")
+TTS_PLAYBACK_SECONDS = registry.histogram(
+    "interview_tts_playback_seconds", "Time spent playing synthesized audio", ["engine"],
+    buckets=DURATION_BUCKETS)
+FALLBACKS = registry.counter(
+    "interview_fallbacks", "Times a degraded fallback was used", ["component"])
+
+
+def _cache_metrics():
+    """LLM and TTS cache counters, read from the caches themselves"""
+    families = []
+    import llm_cache
+    if llm_cache._cache is not None:
+        sites = llm_cache._cache.stats()["call_sites"]
+        samples = []
+        for call_site, counters in sites.items():
+            for result in ("memory_hits", "disk_hits", "misses"):
+                samples.append(({"call_site": call_site, "result": result}, counters[result]))
+        families.append(("interview_llm_cache_lookups_total", "counter",
+                         "LLM cache lookups by call site and result", samples))
+        families.append(("interview_llm_cache_hit_ratio", "gauge", "LLM cache hit ratio by call site",
+                         [({"call_site": call_site}, counters["hit_rate"]) for call_site, counters in sites.items()]))
+
+    import speaker
+    if speaker.tts_cache is not None:
+        stats = speaker.tts_cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        families.append(("interview_tts_cache_lookups_total", "counter", "TTS cache lookups by result",
+                         [({"result": "hits"}, stats["hits"]), ({"result": "misses"}, stats["misses"])]))
+        families.append(("interview_tts_cache_hit_ratio", "gauge", "TTS cache hit ratio",
+                         [({}, stats["hits"] / lookups if lookups else 0.0)]))
+        families.append(("interview_tts_cache_bytes", "gauge", "Bytes of synthesized audio on disk",
+                         [({}, stats["bytes"])]))
+    return families
+
+
+def _backend_metrics():
+    """Transcription queue and backend load times"""
+    from backends import registry as backends
+    families = [("interview_backend_load_seconds", "gauge", "Time each lazy backend took to load",
+                 [({"backend": name}, seconds) for name, seconds in sorted(backends.load_times.items())])]
+    if backends.is_ready("transcription"):
+        service = backends.get("transcription")["service"]
+        if service is not None:
+            families.append(("interview_transcription_queue_depth", "gauge",
+                             "Answers waiting for the local transcription model", [({}, service.queue_depth())]))
+    return families
+
+
+registry.add_collector(_cache_metrics)
+registry.add_collector(_backend_metrics)
+
+
+def render():
+    return registry.render()
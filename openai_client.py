@@ -0,0 +1,124 @@
+"""
+One process-wide OpenAI client.
+
+Every module used to build its own OpenAI(api_key=...) with library defaults,
+and /api/jobs built a new one per request, so each paid for its own TLS
+handshake and none had a timeout. They now share one client with a single
+tuned connection pool. Each operation gets a view of that client with its
+own timeout; the views share the pool, so a connection opened by one can
+be reused by all. Failed requests are retried by the SDK with exponential
+backoff and jitter.
+
+The ASGI server (asgi_app.py) uses an AsyncOpenAI client built the same way.
+"""
+import threading
+
+from backends import registry
+from config import (OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_MAX_CONNECTIONS, OPENAI_KEEPALIVE_CONNECTIONS,
+                    OPENAI_KEEPALIVE_EXPIRY, OPENAI_CONNECT_TIMEOUT, OPENAI_TIMEOUTS,
+                    OPENAI_MAX_RETRIES)
+from log import get_logger
+
+log = get_logger(__name__)
+
+_views = {}
+_views_lock = threading.Lock()
+
+
+def make_timeout(seconds):
+    """A read/write timeout of `seconds` with the shorter connect timeout, when httpx is importable"""
+    try:
+        import httpx
+    except ImportError:
+        return seconds
+    return httpx.Timeout(seconds, connect=OPENAI_CONNECT_TIMEOUT)
+
+
+def make_http_client(async_client=False):
+    """An httpx client with the tuned pool, or None to use the SDK's default"""
+    try:
+        import httpx
+    except ImportError:
+        log.info("httpx not importable; using the OpenAI SDK's default connection pool")
+        return None
+    client_class = httpx.AsyncClient if async_client else httpx.Client
+    return client_class(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+        ),
+        timeout=make_timeout(OPENAI_TIMEOUTS["default"])
+    )
+
+
+def load_openai_client():
+    """Create the shared client and its connection pool. Runs once."""
+    from openai import OpenAI
+
+    http_client = make_http_client()
+
+    client = OpenAI(
+        api_key=OPENAI_API_KEY or None,  # None: the library reads the OPENAI_API_KEY environment variable
+        base_url=OPENAI_BASE_URL,
+        timeout=make_timeout(OPENAI_TIMEOUTS["default"]),
+        max_retries=OPENAI_MAX_RETRIES,
+        http_client=http_client
+    )
+
+    # During background warm-up, open a pooled connection now so the first
+    # interview request doesn't pay for DNS and the TLS handshake
+    if registry.warming:
+        try:
+            client.with_options(max_retries=0).models.list()
+        except Exception as e:
+            log.warning(f"OpenAI connection priming failed: {e}")
+    return client
+
+
+# Both clients are optional: they serve the other backends, which load them on demand
+# and fall back without them, so a missing key must not hold up readiness
+registry.register("openai", load_openai_client, optional=True)
+
+
+def load_async_openai_client():
+    """Create the shared AsyncOpenAI client. Only the ASGI server asks for it."""
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(
+        api_key=OPENAI_API_KEY or None,
+        base_url=OPENAI_BASE_URL,
+        timeout=make_timeout(OPENAI_TIMEOUTS["default"]),
+        max_retries=OPENAI_MAX_RETRIES,
+        http_client=make_http_client(async_client=True)
+    )
+
+
+# Only the ASGI server creates this one, on first use
+registry.register("openai_async", load_async_openai_client, optional=True)
+
+
+def _operation_view(backend, operation):
+    view = _views.get((backend, operation))
+    if view is None:
+        client = registry.get(backend)
+        with _views_lock:
+            view = _views.get((backend, operation))
+            if view is None:
+                timeout = OPENAI_TIMEOUTS.get(operation, OPENAI_TIMEOUTS["default"])
+                view = client.with_options(timeout=make_timeout(timeout))
+                _views[(backend, operation)] = view
+    return view
+
+
+def get_openai_client(operation="default"):
+    """
+    The shared client configured for `operation` ("chat", "tts", "transcription").
+    Raises if the openai package is missing or the client can't be created.
+    """
+    return _operation_view("openai", operation)
+
+
+def get_async_openai_client(operation="default"):
+    """Async counterpart of get_openai_client"""
+    return _operation_view("openai_async", operation)
@@ -0,0 +1,67 @@
+"""
+Pre-warm the TTS cache with phrases the interviewer says over and over:
+the closing message, the fallback welcome and the generic questions.
+
+Usage:
+    python prewarm_tts.py                              # default jobs, every interviewer
+    python prewarm_tts.py --jobs "Data Engineer" "Nurse"
+    python prewarm_tts.py --voices shimmer nova
+"""
+import argparse
+
+from config import report_config
+from questions import fallback_welcome_message, generic_job_questions, closing_message
+import speaker
+from speaker import prewarm_tts_cache
+
+# Interviewer voice/name pairs offered in templates/index.html
+INTERVIEWERS = [
+    ("shimmer", "Kashmala"),
+    ("nova", "Bushra"),
+    ("echo", "Muzammil"),
+    ("fable", "Musharraf"),
+    ("onyx", "Sultan"),
+    ("alloy", "Alex"),
+]
+
+# Same list /api/jobs falls back to
+DEFAULT_JOBS = [
+    "Software Engineer", "Product Manager", "Data Scientist",
+    "Marketing Manager", "UX Designer", "Project Manager"
+]
+
+
+def known_phrases(job_titles, interviewer_name):
+    phrases = [closing_message(interviewer_name)]
+    for job in job_titles:
+        # get_job_questions lower-cases the title before building phrases
+        job = job.lower().strip()
+        phrases.append(fallback_welcome_message(job, interviewer_name))
+        phrases.extend(generic_job_questions(job))
+    return phrases
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthesize common interviewer phrases into the TTS cache")
+    parser.add_argument("--jobs", nargs="+", default=DEFAULT_JOBS, help="Job titles to pre-warm")
+    parser.add_argument("--voices", nargs="+", default=None, help="Only these voices (default: all interviewers)")
+    args = parser.parse_args()
+
+    report_config()
+    total_created, total_cached = 0, 0
+    for voice, name in INTERVIEWERS:
+        if args.voices and voice not in args.voices:
+            continue
+        phrases = known_phrases(args.jobs, name)
+        print(f"Pre-warming {len(phrases)} phrases for {name} ({voice})...")
+        created, cached = prewarm_tts_cache(phrases, voices=[voice])
+        total_created += created
+        total_cached += cached
+
+    print(f"\nSynthesized {total_created} new sentences, {total_cached} were already cached")
+    if speaker.tts_cache is not None:
+        print(f"Cache: {speaker.tts_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
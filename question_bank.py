@@ -0,0 +1,268 @@
+"""
+Pre-generated interview question bank.
+
+Questions are stored per canonical job title in a gzip-compressed JSON file.
+"SWE", "Senior Software Developer" and "software engineer" all resolve to
+"software engineer". get_job_questions samples from the bank instantly, and
+only falls back to GPT for roles the bank hasn't seen. Anything GPT generates
+is written back to the bank.
+
+Build or extend the bank offline:
+    python question_bank.py build --per-role 30
+    python question_bank.py build --jobs "Nurse" "Data Engineer"
+    python question_bank.py list
+    python question_bank.py lookup "sr. backend dev"
+"""
+import argparse
+import difflib
+import gzip
+import json
+import os
+import random
+import re
+import threading
+
+from config import QUESTION_BANK_PATH, QUESTION_BANK_MAX_PER_ROLE, QUESTION_BANK_MATCH_CUTOFF
+from log import get_logger
+
+log = get_logger(__name__)
+
+# Stands in for the interviewer's name inside stored welcome messages
+NAME_PLACEHOLDER = "{interviewer_name}"
+
+# Whole-token abbreviations, expanded before hyphenated words are split and phrases folded
+ABBREVIATIONS = {
+    "swe": "software engineer",
+    "sde": "software engineer",
+    "sre": "site reliability engineer",
+    "pm": "product manager",
+    "tpm": "technical program manager",
+    "ds": "data scientist",
+    "de": "data engineer",
+    "qa": "quality assurance",
+    "ml": "machine learning",
+    "hr": "human resources",
+    "eng": "engineer",
+    "engr": "engineer",
+    "dev": "developer",
+    "devs": "developer",
+    "mgr": "manager",
+    "admin": "administrator",
+}
+
+# Multi-word synonyms folded onto one canonical phrase
+PHRASE_SYNONYMS = {
+    "software development engineer": "software engineer",
+    "software developer": "software engineer",
+    "software programmer": "software engineer",
+    "programmer": "software engineer",
+    "coder": "software engineer",
+    "front end": "frontend",
+    "front-end": "frontend",
+    "back end": "backend",
+    "back-end": "backend",
+    "full stack": "fullstack",
+    "full-stack": "fullstack",
+    "frontend developer": "frontend engineer",
+    "backend developer": "backend engineer",
+    "fullstack developer": "fullstack engineer",
+    "web developer": "web engineer",
+    "mobile developer": "mobile engineer",
+    "ux designer": "ux designer",
+    "user experience designer": "ux designer",
+    "ui ux designer": "ux designer",
+    "product designer": "ux designer",
+    "machine learning engineer": "machine learning engineer",
+    "ai engineer": "machine learning engineer",
+    "data analyst": "data analyst",
+    "business analyst": "business analyst",
+    "project lead": "project manager",
+    "program manager": "program manager",
+}
+
+# Seniority and filler words that don't change which questions fit
+IGNORED_WORDS = {
+    "senior", "sr", "junior", "jr", "lead", "principal", "staff", "associate",
+    "entry", "level", "mid", "intern", "trainee", "i", "ii", "iii", "iv",
+    "a", "an", "the", "role", "position", "job",
+}
+
+# Words, keeping hyphenated compounds together so "de-escalation" is never read as "de"
+_token_re = re.compile(r"[a-z0-9+#]+(?:-[a-z0-9+#]+)*")
+_PHRASES_LONGEST_FIRST = sorted(PHRASE_SYNONYMS, key=len, reverse=True)
+
+
+def _fold_phrases(text):
+    # Longest phrases first so "software development engineer" wins over "software developer";
+    # repeat until stable since one fold can enable another ("front end developer")
+    for _ in range(3):
+        previous = text
+        for phrase in _PHRASES_LONGEST_FIRST:
+            text = re.sub(rf"\b{re.escape(phrase)}\b", PHRASE_SYNONYMS[phrase], text)
+        if text == previous:
+            break
+    return text
+
+
+def canonicalize_title(title):
+    """Fold a free-text job title onto a canonical key"""
+    words = []
+    for token in _token_re.findall(title.lower()):
+        words.extend(ABBREVIATIONS[token].split() if token in ABBREVIATIONS else token.split("-"))
+    # Synonyms are folded before ignored words are dropped, so that phrases containing one
+    # ("project lead") still match; and again after, for phrases an ignored word interrupted
+    words = _fold_phrases(" ".join(words)).split()
+    kept = [w for w in words if w not in IGNORED_WORDS] or words
+    return " ".join(_fold_phrases(" ".join(kept)).split())
+
+
+def is_misspelling(title, key, cutoff=QUESTION_BANK_MATCH_CUTOFF):
+    """True when canonical `title` is `key` with at most typos in each word.
+    A different word ("product" vs "project") never counts, however similar the whole titles are."""
+    words, key_words = title.split(), key.split()
+    return len(words) == len(key_words) and all(
+        difflib.SequenceMatcher(None, word, key_word).ratio() >= cutoff
+        for word, key_word in zip(words, key_words))
+
+
+class QuestionBank:
+    """Canonical job title -> {"questions": [...], "welcomes": [...]} stored as gzip JSON"""
+
+    def __init__(self, path=QUESTION_BANK_PATH, max_per_role=QUESTION_BANK_MAX_PER_ROLE,
+                 match_cutoff=QUESTION_BANK_MATCH_CUTOFF):
+        self.path = path
+        self.max_per_role = max_per_role
+        self.match_cutoff = match_cutoff
+        self._lock = threading.Lock()
+        self._roles = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                self._roles = json.load(f)
+            log.info(f"Question bank: {len(self._roles)} roles loaded from {self.path}")
+        except (OSError, ValueError) as e:
+            log.warning(f"Could not read question bank {self.path}: {e}")
+
+    def _save_locked(self):
+        temp_path = self.path + ".tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as f:
+            json.dump(self._roles, f, separators=(",", ":"), ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+    def roles(self):
+        with self._lock:
+            return {role: len(entry["questions"]) for role, entry in self._roles.items()}
+
+    def resolve(self, job_title):
+        """Canonical key of the banked role matching `job_title`, or None"""
+        canonical = canonicalize_title(job_title)
+        with self._lock:
+            if canonical in self._roles:
+                return canonical
+            keys = list(self._roles)
+        # Same words in a different order ("engineer software")
+        words = sorted(canonical.split())
+        for key in keys:
+            if sorted(key.split()) == words:
+                return key
+        for match in difflib.get_close_matches(canonical, keys, n=5, cutoff=self.match_cutoff):
+            if is_misspelling(canonical, match, self.match_cutoff):
+                return match
+        return None
+
+    def sample(self, job_title, num_questions, interviewer_name="Kashmala"):
+        """(welcome or None, questions) drawn from the bank, or None if the role is unknown
+        or doesn't have enough questions yet"""
+        key = self.resolve(job_title)
+        if key is None:
+            return None
+        with self._lock:
+            entry = self._roles[key]
+            if len(entry["questions"]) < num_questions:
+                return None
+            questions = random.sample(entry["questions"], num_questions)
+            welcome = random.choice(entry["welcomes"]) if entry["welcomes"] else None
+        if welcome is not None:
+            welcome = welcome.replace(NAME_PLACEHOLDER, interviewer_name)
+        log.debug("Question bank hit: '%s' -> '%s'", job_title, key)
+        return welcome, questions
+
+    def add(self, job_title, questions, welcome=None, interviewer_name=None):
+        """Merge newly generated questions (and optionally a welcome message) into the bank.
+        They are stored under the exact canonical title, never a fuzzy match, so roles can't merge."""
+        key = canonicalize_title(job_title)
+        if welcome and interviewer_name:
+            welcome = welcome.replace(interviewer_name, NAME_PLACEHOLDER)
+        with self._lock:
+            entry = self._roles.setdefault(key, {"questions": [], "welcomes": []})
+            known = {q.lower() for q in entry["questions"]}
+            added = [q for q in questions if q.lower() not in known]
+            entry["questions"] = (entry["questions"] + added)[-self.max_per_role:]
+            if welcome and NAME_PLACEHOLDER in welcome and welcome not in entry["welcomes"]:
+                entry["welcomes"] = (entry["welcomes"] + [welcome])[-5:]
+            if added or welcome:
+                self._save_locked()
+        return len(added)
+
+
+def build(bank, job_titles, per_role):
+    """Generate questions for each role with GPT until it has `per_role` of them"""
+    from questions import registry, generate_question_list, generate_welcome_message
+
+    client = registry.get("questions")
+    if client is None:
+        raise SystemExit("OpenAI is not available; cannot build the question bank")
+
+    for job in job_titles:
+        key = canonicalize_title(job)
+        have = bank.roles().get(key, 0)
+        if have >= per_role:
+            log.info(f"{key}: already has {have} questions")
+            continue
+        try:
+            questions = generate_question_list(client, job, per_role - have)
+            welcome = generate_welcome_message(client, job, "Kashmala")
+        except Exception as e:
+            log.warning(f"{key}: generation failed: {e}")
+            continue
+        added = bank.add(job, questions, welcome=welcome, interviewer_name="Kashmala")
+        log.info(f"{key}: added {added} questions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and inspect the interview question bank")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="Generate questions for common roles with GPT")
+    build_parser.add_argument("--jobs", nargs="+", default=None, help="Roles to build (default: a common list)")
+    build_parser.add_argument("--per-role", type=int, default=30, help="Target number of questions per role")
+    sub.add_parser("list", help="Show banked roles")
+    lookup_parser = sub.add_parser("lookup", help="Show which banked role a title resolves to")
+    lookup_parser.add_argument("title")
+    args = parser.parse_args()
+
+    bank = QuestionBank()
+    if args.command == "build":
+        build(bank, args.jobs or COMMON_ROLES, args.per_role)
+    elif args.command == "list":
+        for role, count in sorted(bank.roles().items()):
+            print(f"{count:4d}  {role}")
+    else:
+        print(f"'{args.title}' -> canonical '{canonicalize_title(args.title)}' -> banked '{bank.resolve(args.title)}'")
+
+
+# Roles built by default (the /api/jobs fallback list plus other frequent requests)
+COMMON_ROLES = [
+    "Software Engineer", "Product Manager", "Data Scientist", "Marketing Manager",
+    "UX Designer", "Project Manager", "Data Analyst", "Data Engineer",
+    "Frontend Engineer", "Backend Engineer", "DevOps Engineer", "Machine Learning Engineer",
+    "Business Analyst", "Sales Representative", "Customer Success Manager", "Nurse",
+    "Teacher", "Accountant", "Financial Analyst", "Graphic Designer",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -1,114 +1,263 @@
+import asyncio
 import os
+import threading
+import time
+from backends import registry
+from config import QUESTION_BANK_ENABLED
+from llm_cache import cached_chat, cached_chat_async
+from metrics import QUESTIONS_SECONDS, FALLBACKS
+from log import get_logger
 
-# Try to import OpenAI API for dynamic question generation
-USE_OPENAI_FOR_QUESTIONS = True
-try:
-    from openai import OpenAI
-    from config import OPENAI_API_KEY
-    
-    # Initialize the client with minimal required parameters to avoid compatibility issues
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    
-    def generate_job_questions(job_title, num_questions=3, interviewer_name="Kashmala"):
-        """Generate interview questions for any job role using GPT."""
-        print(f"Generating questions for {job_title} role...")
-        
-        # First, generate a personalized welcome message
-        try:
-            welcome_prompt = f"""Create a warm, professional welcome message for a mock interview for a {job_title} role. 
-            The message should:
-            - Greet the candidate
-            - Introduce yourself as {interviewer_name}, an AI Interview Coach
-            - Mention you'll be asking them questions about the {job_title} role
-            - Offer a brief encouragement
-            - Keep it under 3 sentences
-            
-            Return just the welcome message with no additional text or explanation.
-            """
-            
-            welcome_response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": welcome_prompt}]
-            )
-            
-            welcome_message = welcome_response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"Error generating welcome message: {e}")
-            welcome_message = f"Welcome to your {job_title} interview! I'm {interviewer_name}, your AI Interview Coach, and I'll be asking you some questions about your experience and skills. Take your time to think before answering."
-        
-        # Define generic questions outside of the try block so they're available in the except block
-        generic_questions = [
-            f"Why are you interested in the {job_title} role?",
-            f"What relevant experience do you have for this {job_title} position?",
-            f"How do you stay updated with trends in the {job_title} field?",
-            f"Tell me about your experience as a {job_title}.",
-            f"What skills do you think are most important for a {job_title}?",
-            f"Describe a challenging situation you faced in your role as a {job_title}."
-        ]
-        
-        prompt = f"""Generate {num_questions} professional interview questions for a {job_title} role.
-        
-        The questions should:
-        - Be challenging but fair
-        - Cover different aspects of the role
-        - Be open-ended (not yes/no questions)
-        - Focus on experience, skills, and scenarios relevant to the position
-        
-        Format each question on a new line without numbering.
-        """
-        
+log = get_logger(__name__)
+
+# Set when the questions backend loads; False means generic questions are used
+USE_OPENAI_FOR_QUESTIONS = False
+
+def load_questions_backend():
+    """Create the OpenAI client for dynamic question generation, or None if unavailable"""
+    global USE_OPENAI_FOR_QUESTIONS
+
+    # Try to import OpenAI API for dynamic question generation
+    try:
+        from openai_client import get_openai_client
+        client = get_openai_client("chat")
+    except Exception as e:
+        log.warning(f"Error loading OpenAI for questions: {e}")
+        log.info("Using generic questions. Install OpenAI properly for dynamic question generation.")
+        return None
+
+    USE_OPENAI_FOR_QUESTIONS = True
+    return client
+
+registry.register("questions", load_questions_backend)
+
+_question_bank = None
+_question_bank_lock = threading.Lock()
+
+def get_question_bank():
+    """The on-disk question bank, loaded on first use"""
+    global _question_bank
+    with _question_bank_lock:
+        if _question_bank is None:
+            from question_bank import QuestionBank
+            _question_bank = QuestionBank()
+    return _question_bank
+
+# Fixed phrases are shared with the TTS cache pre-warmer, so keep them in one place
+def fallback_welcome_message(job_title, interviewer_name="Kashmala"):
+    return f"Welcome to your {job_title} interview! I'm {interviewer_name}, your AI Interview Coach, and I'll be asking you some questions about your experience and skills. Take your time to think before answering."
+
+def generic_job_questions(job_title):
+    return [
+        f"Why are you interested in the {job_title} role?",
+        f"What relevant experience do you have for this {job_title} position?",
+        f"How do you stay updated with trends in the {job_title} field?",
+        f"Tell me about your experience as a {job_title}.",
+        f"What skills do you think are most important for a {job_title}?",
+        f"Describe a challenging situation you faced in your role as a {job_title}."
+    ]
+
+def closing_message(interviewer_name):
+    return f"That completes our interview session. Thank you for practicing with me today! This is {interviewer_name}, wishing you the best of luck with your job search."
+
+# Job suggestions for the start page, shared by the Flask and ASGI servers
+FALLBACK_JOBS = [
+    "Software Engineer", "Product Manager", "Data Scientist",
+    "Marketing Manager", "UX Designer", "Project Manager"
+]
+
+def suggested_jobs_request():
+    """Chat completion arguments for the /api/jobs suggestions"""
+    return {
+        "model": "gpt-4o",
+        "messages": [{"role": "user", "content": "Generate a list of 10 diverse and popular job titles that people might want to practice interviewing for. Return only the job titles, one per line, without any numbering or extra text."}]
+    }
+
+def parse_job_list(jobs_text):
+    return [job.strip() for job in jobs_text.split('\n') if job.strip()]
+
+def welcome_message_request(job_title, interviewer_name="Kashmala"):
+    """Chat completion arguments for a personalized welcome message"""
+    welcome_prompt = f"""Create a warm, professional welcome message for a mock interview for a {job_title} role. 
+    The message should:
+    - Greet the candidate
+    - Introduce yourself as {interviewer_name}, an AI Interview Coach
+    - Mention you'll be asking them questions about the {job_title} role
+    - Offer a brief encouragement
+    - Keep it under 3 sentences
+
+    Return just the welcome message with no additional text or explanation.
+    """
+    return {"model": "gpt-4o", "messages": [{"role": "user", "content": welcome_prompt}]}
+
+def question_list_request(job_title, num_questions=3):
+    """Chat completion arguments for a list of interview questions"""
+    prompt = f"""Generate {num_questions} professional interview questions for a {job_title} role.
+
+    The questions should:
+    - Be challenging but fair
+    - Cover different aspects of the role
+    - Be open-ended (not yes/no questions)
+    - Focus on experience, skills, and scenarios relevant to the position
+
+    Format each question on a new line without numbering.
+    """
+    return {"model": "gpt-4o", "messages": [{"role": "user", "content": prompt}]}
+
+def parse_question_list(questions_text):
+    """Keep only lines that are actual questions"""
+    # Extract and clean questions from the response
+    questions = [q.strip() for q in questions_text.split('\n') if q.strip()]
+
+    # Filter out any non-questions (GPT might add explanations)
+    return [q for q in questions if q.endswith('?')]
+
+def generate_welcome_message(client, job_title, interviewer_name="Kashmala"):
+    """Ask GPT for a personalized welcome message"""
+    welcome_message = cached_chat(client, "welcome", **welcome_message_request(job_title, interviewer_name))
+    return welcome_message.strip()
+
+def generate_question_list(client, job_title, num_questions=3):
+    """Ask GPT for interview questions; returns only lines that are actual questions"""
+    questions_text = cached_chat(client, "questions", **question_list_request(job_title, num_questions))
+    return parse_question_list(questions_text)
+
+def assemble_job_questions(job_title, num_questions, interviewer_name, welcome, questions):
+    """Combine generated output into [welcome] + questions.
+
+    `welcome` and `questions` are what GPT returned, or the exception raised
+    while asking for them. Whatever was generated is written back to the
+    question bank so the next interview for this role doesn't need GPT.
+    """
+    generated_welcome = None
+    if isinstance(welcome, Exception):
+        log.warning(f"Error generating welcome message: {welcome}")
+        welcome_message = fallback_welcome_message(job_title, interviewer_name)
+    else:
+        welcome_message = generated_welcome = welcome
+
+    # Define generic questions up front so they're available if generation failed
+    generic_questions = generic_job_questions(job_title)
+
+    if isinstance(questions, Exception):
+        log.warning(f"Error with OpenAI API call: {questions}")
+        # If the API call fails, return welcome message + generic questions
+        return [welcome_message] + generic_questions[:num_questions]
+
+    if QUESTION_BANK_ENABLED:
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            # Extract and clean questions from the response
-            questions_text = response.choices[0].message.content
-            questions = [q.strip() for q in questions_text.split('\n') if q.strip()]
-            
-            # Filter out any non-questions (GPT might add explanations)
-            questions = [q for q in questions if q.endswith('?')]
-            
-            # If we got fewer than requested, add generic questions
-            while len(questions) < num_questions and generic_questions:
-                questions.append(generic_questions.pop(0))
-            
-            # Prepend the welcome message as the first "question"
-            all_questions = [welcome_message] + questions[:num_questions]
-                
-            return all_questions  # Return welcome message + the requested number of questions
-            
+            get_question_bank().add(job_title, questions, welcome=generated_welcome,
+                                    interviewer_name=interviewer_name)
         except Exception as e:
-            print(f"Error with OpenAI API call: {e}")
-            # If the API call fails, return welcome message + generic questions
-            return [welcome_message] + generic_questions[:num_questions]
-        
-except (ImportError, OSError) as e:
-    USE_OPENAI_FOR_QUESTIONS = False
-    print(f"Error loading OpenAI for questions: {e}")
-    print("Using generic questions. Install OpenAI properly for dynamic question generation.")
+            log.warning(f"Could not update question bank: {e}")
+
+    # If we got fewer than requested, add generic questions
+    while len(questions) < num_questions and generic_questions:
+        questions.append(generic_questions.pop(0))
+
+    # Prepend the welcome message as the first "question"
+    return [welcome_message] + questions[:num_questions]
+
+def generate_job_questions(job_title, num_questions=3, interviewer_name="Kashmala"):
+    """Generate interview questions for any job role using GPT."""
+    client = registry.get("questions")
+    log.info(f"Generating questions for {job_title} role...")
+
+    # First, generate a personalized welcome message
+    try:
+        welcome = generate_welcome_message(client, job_title, interviewer_name)
+    except Exception as e:
+        welcome = e
+
+    try:
+        questions = generate_question_list(client, job_title, num_questions)
+    except Exception as e:
+        questions = e
+
+    return assemble_job_questions(job_title, num_questions, interviewer_name, welcome, questions)
+
+async def generate_job_questions_async(client, job_title, num_questions=3, interviewer_name="Kashmala"):
+    """Coroutine version for the ASGI server: both GPT calls run concurrently on the async client"""
+    log.info(f"Generating questions for {job_title} role...")
+    welcome, questions_text = await asyncio.gather(
+        cached_chat_async(client, "welcome", **welcome_message_request(job_title, interviewer_name)),
+        cached_chat_async(client, "questions", **question_list_request(job_title, num_questions)),
+        return_exceptions=True
+    )
+    if not isinstance(welcome, Exception):
+        welcome = welcome.strip()
+    questions = questions_text if isinstance(questions_text, Exception) else parse_question_list(questions_text)
+    return assemble_job_questions(job_title, num_questions, interviewer_name, welcome, questions)
+
+def banked_job_questions(job_title, num_questions, interviewer_name):
+    """[welcome] + questions from the question bank, or None if the role isn't banked"""
+    if not QUESTION_BANK_ENABLED:
+        return None
+    try:
+        banked = get_question_bank().sample(job_title, num_questions, interviewer_name)
+    except Exception as e:
+        log.warning(f"Question bank lookup failed: {e}")
+        return None
+    if banked is None:
+        return None
+    welcome_message, questions = banked
+    return [welcome_message or fallback_welcome_message(job_title, interviewer_name)] + questions
+
+def generic_interview(job_title, interviewer_name):
+    log.info(f"Using generic questions for {job_title}")
+    FALLBACKS.inc(component="questions")
+    return [fallback_welcome_message(job_title, interviewer_name)] + generic_job_questions(job_title)[3:]
 
 def get_job_questions(job_title, num_questions=3, interviewer_name="Kashmala"):
     """Get interview questions for a job role."""
+    start = time.perf_counter()
     # Clean and normalize job title
     job_title = job_title.lower().strip()
     
-    # Try to generate questions with OpenAI
-    if USE_OPENAI_FOR_QUESTIONS:
+    # Known roles are served instantly from the pre-generated question bank
+    banked = banked_job_questions(job_title, num_questions, interviewer_name)
+    if banked is not None:
+        QUESTIONS_SECONDS.observe(time.perf_counter() - start, source="bank")
+        return banked
+    
+    # Try to generate questions with OpenAI (the client is created on first use)
+    if registry.get("questions") is not None:
         try:
-            return generate_job_questions(job_title, num_questions, interviewer_name)
+            questions = generate_job_questions(job_title, num_questions, interviewer_name)
+            QUESTIONS_SECONDS.observe(time.perf_counter() - start, source="openai")
+            return questions
         except Exception as e:
-            print(f"Failed to generate questions: {e}")
+            log.warning(f"Failed to generate questions: {e}")
             # Fall through to generic questions if generation fails
     
     # If we can't use OpenAI or it failed, create generic questions
-    print(f"Using generic questions for {job_title}")
-    welcome_message = f"Welcome to your {job_title} interview! I'm {interviewer_name}, your AI Interview Coach, and I'll be asking you some questions about your experience and skills. Take your time to think before answering."
-    
-    return [
-        welcome_message,
-        f"Tell me about your experience as a {job_title}.",
-        f"What skills do you think are most important for a {job_title}?",
-        f"Describe a challenging situation you faced in your role as a {job_title}."
-    ]
+    questions = generic_interview(job_title, interviewer_name)
+    QUESTIONS_SECONDS.observe(time.perf_counter() - start, source="generic")
+    return questions
+
+async def get_job_questions_async(job_title, num_questions=3, interviewer_name="Kashmala"):
+    """get_job_questions for the ASGI server"""
+    start = time.perf_counter()
+    job_title = job_title.lower().strip()
+
+    banked = banked_job_questions(job_title, num_questions, interviewer_name)
+    if banked is not None:
+        QUESTIONS_SECONDS.observe(time.perf_counter() - start, source="bank")
+        return banked
+
+    try:
+        from openai_client import get_async_openai_client
+        client = get_async_openai_client("chat")
+    except Exception as e:
+        log.warning(f"Async OpenAI client unavailable for questions: {e}")
+    else:
+        try:
+            questions = await generate_job_questions_async(client, job_title, num_questions, interviewer_name)
+            QUESTIONS_SECONDS.observe(time.perf_counter() - start, source="openai")
+            return questions
+        except Exception as e:
+            log.warning(f"Failed to generate questions: {e}")
+
+    questions = generic_interview(job_title, interviewer_name)
+    QUESTIONS_SECONDS.observe(time.perf_counter() - start, source="generic")
+    return questions
@@ -1,369 +1,277 @@
+import logging
 import os
 import time
 import threading
+import queue
+
+from config import (MAX_RECORDING_DURATION, RECORDING_MODE, VAD_END_SILENCE_MS,
+                    VAD_MIN_END_SILENCE_MS, VAD_MAX_END_SILENCE_MS, LOG_AUDIO_INTERVAL)
+from metrics import RECORDING_SECONDS, RECORDING_STOP_SECONDS
+from log import get_logger, RateLimitedLog
+
+log = get_logger(__name__)
+
+
+def forward_audio(on_audio, data):
+    """Pass a captured chunk to a listener without letting it break the recording"""
+    if on_audio is None:
+        return
+    try:
+        on_audio(data)
+    except Exception as e:
+        log.warning(f"Audio listener error (ignored): {e}")
 
 # Try to import sound recording libraries, but provide a fallback if they fail
 USE_SOUNDDEVICE = True
 try:
     import sounddevice as sd
-    from scipy.io.wavfile import write
-    import numpy as np
-    import queue
-    
-    def record_audio_with_device(filename="user_input.wav", duration=15, fs=44100, callback=None):
-        """Record audio for a fixed duration."""
-        print("🎤 Recording...")
-        audio = sd.rec(int(duration * fs), samplerate=fs, channels=1)
-        sd.wait()
-        write(filename, fs, audio)
-        print("✅ Recorded")
-        if callback:
-            callback()
-    
-    def record_audio_voice_activated(filename="user_input.wav", fs=44100, silence_threshold=0.02, silence_duration=2.0, callback=None):
-        """
-        Record audio until silence is detected for a certain duration.
-        
-        Parameters:
-            filename: Output WAV file
-            fs: Sample rate
-            silence_threshold: Amplitude threshold to consider as silence
-            silence_duration: How long silence should persist before stopping (seconds)
-            callback: Function to call after recording completes
-        """
-        print("🎤 Recording... (Stop automatically when you pause speaking)")
-        print(f"Listening for voice activity... (silence_threshold={silence_threshold}, silence_duration={silence_duration}s)")
-        
-        # Create a queue to communicate between the audio callback and the main thread
-        q = queue.Queue()
-        
-        # Initialize variables for silence detection
-        last_audio_time = time.time()
-        is_silent = True
-        has_spoken = False
-        start_time = time.time()
-        
-        # Create arrays to store debug data
-        volumes = []
-        silent_states = []
-        
-        def audio_callback(indata, frames, time_info, status):
-            nonlocal last_audio_time, is_silent, has_spoken
-            
-            # Calculate volume (RMS amplitude)
-            volume_norm = np.linalg.norm(indata) / np.sqrt(frames)
-            volumes.append(volume_norm)  # Store for debugging
-            
-            # Check if the current frame is silent
-            current_is_silent = volume_norm < silence_threshold
-            silent_states.append(current_is_silent)  # Store for debugging
-            
-            # Debug output
-            if len(volumes) % 10 == 0:  # Print every 10th value to reduce output
-                print(f"Current volume: {volume_norm:.6f} {'(SILENT)' if current_is_silent else '(SPEAKING)'}")
-            
-            # Only update the last_audio_time if we've detected speech followed by silence
-            if not current_is_silent:
-                has_spoken = True
-                is_silent = False
-                last_audio_time = time.time()
-            elif has_spoken and not is_silent and current_is_silent:
-                # Transition from speech to silence
-                is_silent = True
-                print(f"Silence detected at {time.time() - start_time:.2f}s - will stop in {silence_duration}s if silence continues")
-            
-            # Add the current audio frame to the queue
-            q.put(indata.copy())
-        
-        # Start recording with callback
-        stream = sd.InputStream(callback=audio_callback, channels=1, samplerate=fs)
-        with stream:
-            print("👂 Speak now - recording will stop after you pause...")
-            
-            # Keep recording until silence is detected for the specified duration
-            chunks = []
-            recording_started = False
-            
+    from capture_buffer import CaptureBuffer, CAPTURE_SAMPLE_RATE
+    from vad import VoiceActivityDetector
+except (ImportError, OSError) as e:
+    USE_SOUNDDEVICE = False
+    log.warning(f"Error loading audio recording libraries: {e}")
+    log.info("Using a simulation for audio recording. Install sounddevice and scipy properly for real functionality.")
+
+# Recorder lifecycle states
+IDLE = "idle"
+RECORDING = "recording"
+STOPPING = "stopping"
+FINISHED = "finished"
+FAILED = "failed"
+
+# Queued in place of audio to wake the capture loop
+_STOP = object()
+
+
+class Recorder:
+    """
+    One audio capture, from the microphone into a CaptureBuffer.
+
+    The capture thread blocks on the chunk queue, so it wakes only when
+    audio arrives or stop() is called. Nothing polls. Each recording has
+    its own Recorder, so concurrent sessions don't share any state.
+
+    Modes:
+        manual: record until stop() (or MAX_RECORDING_DURATION)
+        voice:  also stop `end_silence_ms` after the candidate stops talking (see vad.py)
+        fixed:  record `duration` seconds
+
+    States: idle -> recording -> stopping -> finished (or failed).
+    `stop_latency` is the time from stop() until the recording was finalized
+    (saved to `filename`, or handed over in `capture`).
+    """
+
+    def __init__(self, filename="user_input.wav", fs=44100, mode="manual", duration=None,
+                 end_silence_ms=VAD_END_SILENCE_MS, callback=None, on_audio=None, capture=None):
+        self.filename = filename
+        self.fs = fs
+        self.mode = mode
+        self.duration = duration
+        self.end_silence_ms = end_silence_ms
+        self.callback = callback
+        self.on_audio = on_audio
+        self.capture = capture
+
+        self.state = IDLE
+        self.stop_reason = None
+        self._status_log = RateLimitedLog(log, LOG_AUDIO_INTERVAL)
+        self.stop_requested_at = None
+        self.stop_latency = None
+        self.error = None
+        self._state_changed = threading.Condition()
+        self._queue = queue.Queue()
+        self._thread = None
+        self._buffer = None
+        self.vad = None
+
+    def start(self):
+        """Record on a background thread; returns the recorder immediately"""
+        self._thread = threading.Thread(target=self.run, name=f"recorder-{os.path.basename(self.filename)}",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def run(self):
+        """Record on the calling thread until stopped, then run the callback"""
+        try:
+            self._set_state(RECORDING)
+            if USE_SOUNDDEVICE:
+                self._record_device()
+            else:
+                self._record_simulated()
+            self._finalize()
+            self._set_state(FINISHED)
+        except Exception as e:
+            self.error = e
+            log.error(f"Recorder failed for {self.filename}: {e}")
+            self._set_state(FAILED)
+
+        if self.callback:
+            self.callback()
+
+    def stop(self, reason="requested"):
+        """Ask the recording to end. Returns False if it wasn't recording."""
+        with self._state_changed:
+            if self.state not in (IDLE, RECORDING):
+                return False
+            self.stop_requested_at = time.time()
+            self.stop_reason = reason
+            self.state = STOPPING
+            self._state_changed.notify_all()
+        self._queue.put(_STOP)
+        return True
+
+    def wait(self, timeout=None):
+        """Block until the recording has finished or failed"""
+        with self._state_changed:
+            return self._state_changed.wait_for(lambda: self.state in (FINISHED, FAILED), timeout)
+
+    def _set_state(self, state):
+        with self._state_changed:
+            # A stop() that raced with start-up keeps the recorder in STOPPING
+            if not (state == RECORDING and self.state == STOPPING):
+                self.state = state
+            self._state_changed.notify_all()
+
+    def _audio_callback(self, indata, frames, time_info, status):
+        # Runs on the audio driver's thread: only cheap work here
+        if status:
+            # Overflows repeat every block once the capture thread falls behind
+            self._status_log.log(logging.WARNING, str(status), "Audio input status: %s", status)
+        self._queue.put(indata.copy())
+
+    def _record_device(self):
+        buffer = self.capture if self.capture is not None else CaptureBuffer(self.filename, input_rate=self.fs)
+        self._buffer = buffer
+        max_samples = None
+        if self.mode == "fixed" and self.duration:
+            max_samples = int(self.duration * CAPTURE_SAMPLE_RATE)
+        if self.mode == "voice":
+            # Runs on the capture thread, on the 16 kHz audio the buffer already produced
+            self.vad = VoiceActivityDetector(CAPTURE_SAMPLE_RATE, end_silence_ms=self.end_silence_ms)
+
+        log.info(f"🎤 Recording {self.filename} ({self.mode} mode)...")
+        with sd.InputStream(callback=self._audio_callback, channels=1, samplerate=self.fs):
             while True:
-                # Check for long silence after speech to end recording
-                if has_spoken and is_silent:
-                    silence_time = time.time() - last_audio_time
-                    if silence_time > silence_duration:
-                        print(f"Silence of {silence_time:.2f}s detected, stopping recording.")
-                        break
-                    elif silence_time > 0.5 and silence_time % 0.5 < 0.1:  # Print roughly every 0.5 seconds
-                        print(f"Silent for {silence_time:.1f}s (waiting for {silence_duration}s to stop)")
-                
-                # Get audio data from the queue (non-blocking)
-                try:
-                    data = q.get_nowait()
-                    chunks.append(data)
-                    if not recording_started and has_spoken:
-                        recording_started = True
-                        print("Recording started!")
-                except queue.Empty:
-                    # No audio data available, continue checking
-                    time.sleep(0.1)
-        
-        # Print debug summary
-        if volumes:
-            avg_volume = sum(volumes) / len(volumes)
-            max_volume = max(volumes)
-            print(f"\nRecording stats:")
-            print(f"Duration: {time.time() - start_time:.2f}s")
-            print(f"Average volume: {avg_volume:.6f}")
-            print(f"Max volume: {max_volume:.6f}")
-            print(f"Threshold: {silence_threshold}")
-            print(f"Suggested threshold: {max(avg_volume * 0.2, 0.01):.6f} (if sensitivity issues persist)")
-        
-        # Concatenate all chunks and save as WAV file
-        if chunks:
-            audio_data = np.concatenate(chunks, axis=0)
-            write(filename, fs, audio_data)
-            print("✅ Recording saved to", filename)
+                chunk = self._queue.get()
+                if chunk is _STOP:
+                    break
+                audio = buffer.write(chunk)
+                forward_audio(self.on_audio, audio)
+                if buffer.full:
+                    # Chunks still queued before _STOP would only be dropped
+                    log.warning(f"Recording reached the {MAX_RECORDING_DURATION}s limit")
+                    self.stop(reason="max_duration")
+                    break
+                elif max_samples is not None and buffer.num_samples >= max_samples:
+                    self.stop(reason="duration")
+                elif self.vad is not None and self.vad.process(audio):
+                    log.info(f"Answer ended after {self.end_silence_ms} ms of silence")
+                    self.stop(reason="silence")
+
+        # Audio that arrived before the stream closed still belongs to the answer
+        while True:
+            try:
+                chunk = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is not _STOP and not buffer.full:
+                forward_audio(self.on_audio, buffer.write(chunk))
+
+    def _record_simulated(self):
+        log.info("🎤 Recording until stopped (simulated)...")
+        if self.mode == "fixed" and self.duration:
+            try:
+                self._queue.get(timeout=self.duration)
+            except queue.Empty:
+                pass
         else:
-            print("⚠️ No audio recorded")
-            # Create an empty file
-            with open(filename, 'wb') as f:
+            self._queue.get()
+
+    def _finalize(self):
+        buffer = self._buffer
+        if buffer is not None:
+            RECORDING_SECONDS.observe(buffer.duration)
+        if buffer is None:
+            # Create an empty file so that the workflow doesn't break
+            with open(self.filename, 'wb') as f:
                 f.write(b'')
-        
-        if callback:
-            callback()
-    
-    def record_audio_manual(filename="user_input.wav", fs=44100, callback=None):
-        """
-        Record audio until explicitly stopped via the stop_recording flag.
-        This requires the main application to update the stop_recording flag.
-        
-        Parameters:
-            filename: Output WAV file
-            fs: Sample rate
-            callback: Function to call after recording completes
-        """
-        print(f"\n=== MANUAL RECORDING STARTED for {filename} ===")
-        print("🎤 Recording... (Press Stop when finished)")
-        
-        # Create a queue to communicate between the audio callback and the main thread
-        q = queue.Queue()
-        
-        # Flag that will be set to True when recording should stop
-        # This flag is meant to be modified from the outside
-        global stop_recording
-        stop_recording = False
-        print(f"Initial stop_recording flag: {stop_recording}")
-        
-        def audio_callback(indata, frames, time_info, status):
-            # Add the current audio frame to the queue
-            q.put(indata.copy())
-        
-        # Start recording with callback
-        stream = sd.InputStream(callback=audio_callback, channels=1, samplerate=fs)
-        with stream:
-            print("👂 Speak now - recording until you press Stop...")
-            
-            # Keep recording until explicitly told to stop
-            chunks = []
-            
-            # Add a timeout safety mechanism
-            start_time = time.time()
-            max_duration = 120  # Maximum 2 minutes to prevent unending recordings
-            
-            while not stop_recording:
-                # Check for timeout
-                elapsed = time.time() - start_time
-                if elapsed > max_duration:
-                    print(f"⚠️ Recording timed out after {max_duration} seconds")
-                    break
-                
-                # Every 5 seconds, print a status update
-                if int(elapsed) % 5 == 0 and int(elapsed) > 0 and int(elapsed - 0.1) % 5 != 0:
-                    print(f"Still recording... {int(elapsed)}s elapsed. stop_recording={stop_recording}")
-                
-                # Get audio data from the queue (non-blocking)
-                try:
-                    data = q.get_nowait()
-                    chunks.append(data)
-                except queue.Empty:
-                    # No audio data available, continue checking
-                    time.sleep(0.1)
-        
-        print(f"Recording loop exited. stop_recording={stop_recording}, chunks={len(chunks)}")
-        
-        # Concatenate all chunks and save as WAV file
-        if chunks:
-            audio_data = np.concatenate(chunks, axis=0)
-            write(filename, fs, audio_data)
-            print(f"✅ Recording saved to {filename}, duration: {len(audio_data)/fs:.2f}s")
+            log.info("✅ Simulated recording complete")
+        elif self.capture is not None:
+            buffer.finish()
+            if buffer.num_samples:
+                log.info(f"✅ Recording captured in memory, duration: {buffer.duration:.2f}s")
+            else:
+                log.warning("No audio recorded")
+        elif buffer.num_samples:
+            buffer.save()
+            log.info(f"✅ Recording saved to {self.filename}, duration: {buffer.duration:.2f}s")
         else:
-            print("⚠️ No audio recorded")
-            # Create an empty file
-            with open(filename, 'wb') as f:
+            log.warning("No audio recorded")
+            with open(self.filename, 'wb') as f:
                 f.write(b'')
-        
-        print(f"Preparing to call callback, stop_recording={stop_recording}")
-        
-        # Explicitly set global flag back to False, to ensure it's reset for next recording
-        global recording_active
-        recording_active = False
-        
-        if callback:
-            print("Calling recording callback function")
-            callback()
-        print("Record function completed")
-        print(f"=== MANUAL RECORDING COMPLETED for {filename} ===\n")
-    
-    # Set the default recording function
-    record_audio = record_audio_manual
-    
-except (ImportError, OSError) as e:
-    USE_SOUNDDEVICE = False
-    print(f"Error loading audio recording libraries: {e}")
-    print("Using a simulation for audio recording. Install sounddevice and scipy properly for real functionality.")
-    
-    # Create an empty audio file to maintain the workflow
-    def create_empty_wav(filename):
-        # Create an empty wav file so that the workflow doesn't break
-        with open(filename, 'w') as f:
-            f.write('')
-    
-    # Fixed duration recording simulation
-    def record_audio_fallback(filename="user_input.wav", duration=15, fs=44100, callback=None):
-        """Simulate fixed duration recording."""
-        print(f"🎤 Recording for {duration} seconds (simulated)...")
-        
-        # Create a progress display
-        total_dots = 20
-        for i in range(total_dots):
-            print(".", end="", flush=True)
-            time.sleep(duration / total_dots)
-        print(" Done!")
-        
-        # Create an empty file
-        create_empty_wav(filename)
-        print("✅ Simulated recording complete")
-        
-        if callback:
-            callback()
-    
-    # Simulate voice-activated recording for fallback mode
-    def record_audio_voice_activated_fallback(filename="user_input.wav", fs=44100, 
-                                             silence_threshold=0.02, silence_duration=2.0, callback=None):
-        """Simulate voice-activated recording."""
-        print(f"🎤 Recording until silence detected (simulated)...")
-        print("Speak as long as you want. Recording will stop after you pause.")
-        
-        # Simulate waiting for user input
-        input("Press Enter when you've finished speaking (simulating voice detection)...")
-        
-        # Create an empty file
-        create_empty_wav(filename)
-        print("✅ Simulated recording complete")
-        
-        if callback:
-            callback()
-    
-    # Simulate manual recording for fallback mode
-    def record_audio_manual_fallback(filename="user_input.wav", fs=44100, callback=None):
-        """Simulate manual recording."""
-        print(f"🎤 Recording until stopped (simulated)...")
-        print("Speak as long as you want. Press the Stop button when finished.")
-        
-        # Simulate waiting for stop signal
-        global stop_recording
-        stop_recording = False
-        
-        while not stop_recording:
-            time.sleep(0.5)  # Check every half second if we should stop
-        
-        # Create an empty file
-        create_empty_wav(filename)
-        print("✅ Simulated recording complete")
-        
-        if callback:
-            callback()
-    
-    # Use manual recording as the default
-    record_audio = record_audio_manual_fallback
-
-# Global variable to control recording state
-stop_recording = False
-recording_active = False  # Track if a recording session is currently active
-
-# Function to stop recording
+
+        if self.stop_requested_at is not None:
+            self.stop_latency = time.time() - self.stop_requested_at
+            RECORDING_STOP_SECONDS.observe(self.stop_latency, reason=self.stop_reason)
+            log.info(f"Recording stopped ({self.stop_reason}); stop-to-file latency {self.stop_latency * 1000:.0f} ms")
+
+
+def create_capture(filename, fs=44100):
+    """A CaptureBuffer for record_audio_threaded(capture=...), or None when recording is simulated"""
+    if not USE_SOUNDDEVICE:
+        return None
+    return CaptureBuffer(filename, input_rate=fs)
+
+def record_audio(filename="user_input.wav", duration=15, fs=44100, callback=None):
+    """Record for a fixed duration, blocking until the file is written"""
+    Recorder(filename, fs=fs, mode="fixed", duration=duration, callback=callback).run()
+
+# The most recent recording started with record_audio_threaded
+current_recorder = None
+
 def stop_current_recording():
-    """Stop the current recording session"""
-    global stop_recording, recording_active
-    print(f"\n=== STOP CURRENT RECORDING FUNCTION ===")
-    print(f"Current stop_recording flag: {stop_recording}")
-    print(f"Current recording_active status: {recording_active}")
-    
-    if not recording_active:
-        print("WARNING: No active recording session to stop!")
-        print("This could happen if:")
-        print("- The recording thread hasn't started yet")
-        print("- A previous stop request is still being processed")
-        print("- The recording thread has already completed")
-        print("=== END STOP FUNCTION (NO ACTIVE RECORDING) ===\n")
+    """Stop the most recent recording. Callers holding a Recorder should use its stop()."""
+    recorder = current_recorder
+    if recorder is None or not recorder.stop():
+        log.warning("No active recording session to stop!")
         return False
-    
-    stop_recording = True
-    print(f"Set stop_recording = {stop_recording}")
-    print("=== END STOP FUNCTION ===\n")
     return True
 
+def recording_options(data):
+    """Validate the optional /api/record body: {"mode": "manual"|"voice", "end_silence_ms": int}.
+    Returns (mode, end_silence_ms) or raises ValueError."""
+    if not isinstance(data, dict):
+        data = {}
+    mode = data.get("mode") or RECORDING_MODE
+    if mode not in ("manual", "voice"):
+        raise ValueError(f"Unknown recording mode: {mode}")
+    end_silence_ms = data.get("end_silence_ms", VAD_END_SILENCE_MS)
+    if isinstance(end_silence_ms, bool) or not isinstance(end_silence_ms, (int, float)):
+        raise ValueError("end_silence_ms must be a number")
+    end_silence_ms = int(min(max(end_silence_ms, VAD_MIN_END_SILENCE_MS), VAD_MAX_END_SILENCE_MS))
+    return mode, end_silence_ms
+
 # Function to record in a thread so it doesn't block the UI
-def record_audio_threaded(filename="user_input.wav", duration=None, fs=44100, callback=None, 
-                         silence_threshold=0.02, silence_duration=2.0, manual_mode=True):
+def record_audio_threaded(filename="user_input.wav", duration=None, fs=44100, callback=None,
+                         end_silence_ms=VAD_END_SILENCE_MS, manual_mode=True, on_audio=None,
+                         capture=None):
     """
-    Record audio in a separate thread so it doesn't block
+    Record audio in a separate thread so it doesn't block; returns the Recorder.
+    With manual_mode=False it stops by itself: after `duration` seconds if given,
+    otherwise `end_silence_ms` after the speaker goes quiet.
+    `on_audio`, if given, receives each captured chunk while recording.
+    `capture`, if given, is a CaptureBuffer that receives the recording instead of `filename`.
     """
-    global stop_recording, recording_active
-    stop_recording = False  # Reset stop flag before starting
-    recording_active = True  # Set recording as active
-    
-    print(f"\n=== STARTING NEW RECORDING THREAD ===")
-    print(f"Filename: {filename}")
-    print(f"Manual mode: {manual_mode}")
-    print(f"Reset stop_recording to {stop_recording}")
-    print(f"Set recording_active to {recording_active}")
-    
-    def record_thread():
-        global recording_active
-        try:
-            print(f"Recording thread started for {filename}")
-            if manual_mode:
-                # Use manual recording (start/stop button)
-                if "manual" in record_audio.__name__:
-                    record_audio(filename, fs=fs, callback=callback)
-                else:
-                    print("Using fixed duration recording (15 seconds) as fallback")
-                    record_audio(filename, 15, fs, callback)
-            elif duration is not None:
-                # Use fixed duration recording if duration is specified
-                if "voice_activated" not in record_audio.__name__:
-                    record_audio(filename, duration, fs, callback)
-                else:
-                    print("Using voice-activated recording (ignoring duration parameter)")
-                    record_audio(filename, fs=fs, silence_threshold=silence_threshold, 
-                                silence_duration=silence_duration, callback=callback)
-            else:
-                # Use voice-activated recording
-                if "voice_activated" in record_audio.__name__:
-                    record_audio(filename, fs=fs, silence_threshold=silence_threshold, 
-                                silence_duration=silence_duration, callback=callback)
-                else:
-                    print("Using fixed duration recording (15 seconds) as fallback")
-                    record_audio(filename, 15, fs, callback)
-        except Exception as e:
-            print(f"ERROR in recording thread: {e}")
-        finally:
-            # Always ensure recording is marked as not active
-            recording_active = False
-            print(f"Recording thread for {filename} completed, set recording_active to {recording_active}")
-    
-    thread = threading.Thread(target=record_thread)
-    thread.daemon = True  # This ensures the thread will exit when the main program exits
-    thread.start()
-    print(f"Recording thread started, returning from record_audio_threaded")
-    print("=== END STARTING RECORDING THREAD ===\n")
-    return thread
+    global current_recorder
+    if manual_mode:
+        mode = "manual"
+    elif duration is not None:
+        mode = "fixed"
+    else:
+        mode = "voice"
+
+    recorder = Recorder(filename, fs=fs, mode=mode, duration=duration, end_silence_ms=end_silence_ms,
+                        callback=callback, on_audio=on_audio, capture=capture)
+    current_recorder = recorder
+    return recorder.start()
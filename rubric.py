@@ -0,0 +1,161 @@
+"""
+Instant local scoring of an interview answer.
+
+Measures a few structure signals in the transcript, then turns them into a
+0-10 score and two or three sentences of templated feedback. The signals
+are STAR coverage (situation, task, action, result), quantified results,
+length, filler-word rate and overlap with the question's keywords. All
+patterns are compiled once and each runs in a single pass over the
+lower-cased text, so scoring an answer takes about a millisecond.
+
+The app shows this feedback while the LLM evaluation is pending, and uses it
+in place of the LLM's when that is down.
+"""
+import re
+from collections import namedtuple
+
+# Words per answer: roughly 30 seconds to 2 minutes of speech
+MIN_WORDS = 60
+IDEAL_WORDS = (90, 300)
+MAX_WORDS = 400
+
+STAR_PATTERNS = {
+    "situation": re.compile(
+        r"\b(?:when i was|while i was|at my (?:last|previous|current|first) (?:job|role|company|team)"
+        r"|(?:we|our team|the team|the company) (?:was|were|had)|there (?:was|were)|back in"
+        r"|the (?:situation|context|problem|challenge|issue) was|while working|in my (?:last|previous) role)\b"),
+    "task": re.compile(
+        r"\b(?:my (?:role|job|task|responsibility|goal|assignment) was|i was (?:responsible|asked|tasked|in charge|assigned)"
+        r"|i (?:needed|had|wanted) to|the goal was|we (?:needed|had) to|it was my job)\b"),
+    "action": re.compile(
+        r"\bi (?:then |first |also |quickly |personally )?(?:led|built|designed|created|implemented|organi[sz]ed"
+        r"|developed|wrote|started|set up|decided|analy[sz]ed|introduced|reached out|proposed|managed"
+        r"|coordinated|negotiated|automated|improved|rewrote|mentored|trained|scheduled|investigated"
+        r"|talked|met|spoke|focused|prioriti[sz]ed|tested|fixed|migrated|launched|presented|convinced)\b"),
+    "result": re.compile(
+        r"\b(?:as a result|resulted in|which (?:led|meant)|in the end|ultimately|the outcome|by the end"
+        r"|(?:reduced|increased|improved|saved|cut|grew|doubled|halved|tripled|shipped|delivered|launched"
+        r"|achieved|exceeded|won|lowered|raised)\b|i learned|we learned)"),
+}
+STAR_LABELS = {"situation": "the situation", "task": "your task", "action": "your actions", "result": "the result"}
+
+NUMBER = re.compile(
+    r"\b\d[\d,.]*(?:\s*(?:%|percent|k\b|x\b))?"
+    r"|\b(?:twice|doubled|tripled|halved|a third|a quarter|half|dozens?|hundreds?|thousands?|millions?"
+    r"|(?:ten|twenty|thirty|forty|fifty|sixty|seventy|eighty|ninety) percent)\b")
+FILLERS = re.compile(r"\b(?:um+|uh+|erm|you know|i mean|basically|literally|sort of|kind of|so yeah)\b")
+WORD = re.compile(r"[a-z0-9']+")
+
+# Prompt words that say nothing about the topic of the question
+STOPWORDS = frozenset("""
+    a about after all also an and any are as at be been before being but by can could describe did do does
+    example explain for from give had has have how i if in into is it its me most my of on or our out over
+    please share so some tell than that the their them then there these they this through time times to
+    us walk was we were what when where which while who why will with would you your yourself
+""".split())
+
+RubricScore = namedtuple("RubricScore", [
+    "score", "words", "star", "numbers", "filler_rate", "keyword_overlap", "missing_keywords",
+])
+
+
+def _stem(word):
+    """Crude suffix stripping, enough to match "managed" with "manage" and "teams" with "team" """
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[:-len(suffix)]
+    return word
+
+
+def keywords(text):
+    """Topic words of a question, stemmed, in order of appearance"""
+    seen = {}
+    for word in WORD.findall(text.lower()):
+        if len(word) > 2 and word not in STOPWORDS:
+            seen.setdefault(_stem(word), word)
+    return seen
+
+
+def score_answer(question, answer):
+    """Measure the structure signals of `answer` and combine them into a 0-10 score"""
+    text = answer.lower()
+    words = WORD.findall(text)
+    num_words = len(words)
+
+    star = tuple(part for part, pattern in STAR_PATTERNS.items() if pattern.search(text))
+    numbers = len(NUMBER.findall(text))
+    filler_rate = len(FILLERS.findall(text)) / num_words if num_words else 0.0
+
+    question_keywords = keywords(question)
+    answer_stems = {_stem(word) for word in words}
+    matched = question_keywords.keys() & answer_stems
+    overlap = len(matched) / len(question_keywords) if question_keywords else 1.0
+    missing = [word for stem, word in question_keywords.items() if stem not in answer_stems]
+
+    # STAR 4, quantified results 2, length 2, keywords 1, fluency 1
+    points = len(star)
+    points += min(numbers, 2)
+    if IDEAL_WORDS[0] <= num_words <= IDEAL_WORDS[1]:
+        points += 2
+    elif MIN_WORDS <= num_words <= MAX_WORDS:
+        points += 1
+    if num_words:
+        # Nothing said is neither on topic nor fluent
+        points += min(1.0, overlap / 0.5)
+        points += 1.0 if filler_rate < 0.02 else 0.5 if filler_rate < 0.05 else 0.0
+    score = round(points * 2) / 2
+
+    return RubricScore(score, num_words, star, numbers, round(filler_rate, 3), round(overlap, 2), missing)
+
+
+def _strength(rubric):
+    if "result" in rubric.star and rubric.numbers:
+        return "You backed up the outcome with concrete numbers, which makes your impact easy to see."
+    if len(rubric.star) >= 3:
+        return "Your answer has a clear structure, from the situation through to what you did."
+    if "action" in rubric.star:
+        return "You explained what you personally did, which is what interviewers listen for."
+    if rubric.keyword_overlap >= 0.5:
+        return "You stayed focused on what the question asked."
+    if rubric.words >= MIN_WORDS:
+        return "You gave the interviewer a reasonable amount of detail to work with."
+    return "Thanks for sharing that."
+
+
+def _improvements(rubric):
+    if rubric.words < MIN_WORDS:
+        yield ("Expand on it: aim for a minute or two that covers the situation, "
+               "what you did and how it turned out.")
+    if "result" not in rubric.star and rubric.words >= MIN_WORDS:
+        yield "Finish with the outcome: what changed because of your work?"
+    if "action" not in rubric.star:
+        yield 'Say more about the steps you personally took, using "I" rather than "we".'
+    if not rubric.numbers:
+        yield "Quantify the impact where you can, such as time saved, revenue, or the size of the team."
+    missing_context = [STAR_LABELS[part] for part in ("situation", "task") if part not in rubric.star]
+    if missing_context:
+        yield f"Set the scene briefly first by describing {' and '.join(missing_context)}."
+    if rubric.filler_rate >= 0.03:
+        yield 'Try to cut filler words like "um" and "you know"; a short pause sounds more confident.'
+    if rubric.keyword_overlap < 0.5 and rubric.missing_keywords:
+        yield f"Tie your answer back to the question, for example its mention of {', '.join(rubric.missing_keywords[:3])}."
+    if rubric.words > MAX_WORDS:
+        yield "Tighten it up so the answer stays under about two minutes."
+
+
+def rubric_feedback(question, answer, rubric=None):
+    """Two or three sentences of feedback built from the rubric signals"""
+    rubric = rubric or score_answer(question, answer)
+    if not rubric.words:
+        return ("No answer was recorded. Take a moment to gather your thoughts, then walk through "
+                "the situation, what you did and how it turned out.")
+    tips = list(_improvements(rubric))[:2]
+    if not tips:
+        tips = ["To make it even stronger, close by linking the result to the role you are applying for."]
+    return " ".join([_strength(rubric)] + tips)
+
+
+def quick_evaluation(question, answer):
+    """Score and feedback as a JSON-ready dict, for the session state"""
+    rubric = score_answer(question, answer)
+    return {"score": rubric.score, "feedback": rubric_feedback(question, answer, rubric), "signals": rubric._asdict()}
@@ -0,0 +1,251 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from config import SESSION_IDLE_TIMEOUT, MAX_SESSIONS, LOG_STATE_DUMPS
+from questions import closing_message
+from log import get_logger
+
+log = get_logger(__name__)
+
+# How many state transitions each session remembers for reconnecting clients
+EVENT_LOG_SIZE = 64
+
+
+class InterviewSession:
+    """State for a single interview, owned by one browser session.
+
+    Fields mirror the old global ``interview_state`` dict so ``to_dict()``
+    produces the same JSON shape the frontend already expects.
+
+    Every mutation should go through ``update()``/``append()``, which bump
+    ``version`` and record a delta event that ``/api/events`` streams out.
+    """
+
+    __slots__ = (
+        "session_id", "lock", "last_seen", "version", "events", "changed", "closed", "listeners",
+        "job", "current_question_index", "questions", "answers", "feedbacks", "rubrics",
+        "is_recording", "is_processing", "is_speaking", "is_complete",
+        "using_openai_tts", "interviewer_name", "interviewer_voice",
+        "stop_requested_at", "recorder", "user_id",
+    )
+
+    def __init__(self, session_id, using_openai_tts=False, user_id=None):
+        self.session_id = session_id
+        self.lock = threading.RLock()
+        self.last_seen = time.monotonic()
+        self.version = 0
+        self.events = deque(maxlen=EVENT_LOG_SIZE)
+        self.changed = threading.Condition(self.lock)
+        self.closed = False
+        self.listeners = []  # Callables run on every change; lets asyncio code wait without a thread
+
+        self.job = ""
+        self.current_question_index = -1
+        self.questions = []
+        self.answers = []
+        self.feedbacks = []
+        self.rubrics = []  # Instant local scores, one per answer (rubric.quick_evaluation)
+        self.is_recording = False
+        self.is_processing = False
+        self.is_speaking = False  # Interviewer audio is playing; recording would pick it up
+        self.is_complete = False
+        self.using_openai_tts = using_openai_tts
+        self.interviewer_name = ""
+        self.interviewer_voice = ""
+        self.stop_requested_at = None  # When Stop was pressed, for latency reporting
+        self.recorder = None  # Recorder capturing the current answer
+        self.user_id = user_id  # Browser-level id that owns this interview's history
+
+    def touch(self):
+        self.last_seen = time.monotonic()
+
+    def is_busy(self):
+        """A session that is recording, processing or speaking must not be evicted."""
+        return self.is_recording or self.is_processing or self.is_speaking
+
+    def update(self, event, **fields):
+        """Set state fields and publish them as a versioned delta"""
+        with self.lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self._publish(event, {"set": fields})
+
+    def append(self, event, field, value):
+        """Append to one of the list fields and publish the new item"""
+        with self.lock:
+            getattr(self, field).append(value)
+            self._publish(event, {"append": {field: value}})
+
+    def close(self):
+        """Mark the session as gone and wake any streaming listeners"""
+        with self.lock:
+            self.closed = True
+            self._notify_locked()
+
+    def add_listener(self, listener):
+        """Call `listener()` after every change; it must not block"""
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def _publish(self, event, delta):
+        self.version += 1
+        delta["type"] = event
+        delta["version"] = self.version
+        self.events.append(delta)
+        self._notify_locked()
+
+    def _notify_locked(self):
+        self.changed.notify_all()
+        for listener in self.listeners:
+            listener()
+
+    def events_since(self, version):
+        """Deltas newer than `version`, or None if they have rolled out of the log
+        (or `version` is one this session never had, e.g. from before a restart)"""
+        with self.lock:
+            if version == self.version:
+                return []
+            if version > self.version:
+                return None
+            if not self.events or self.events[0]["version"] > version + 1:
+                return None
+            return [e for e in self.events if e["version"] > version]
+
+    def wait_for_change(self, version, timeout):
+        """Block until the session moves past `version`, it closes, or `timeout` passes"""
+        with self.lock:
+            return self.changed.wait_for(lambda: self.version > version or self.closed, timeout)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "version": self.version,
+                "job": self.job,
+                "current_question_index": self.current_question_index,
+                "questions": list(self.questions),
+                "answers": list(self.answers),
+                "feedbacks": list(self.feedbacks),
+                "rubrics": list(self.rubrics),
+                "is_recording": self.is_recording,
+                "is_processing": self.is_processing,
+                "is_speaking": self.is_speaking,
+                "is_complete": self.is_complete,
+                "using_openai_tts": self.using_openai_tts,
+                "interviewer_name": self.interviewer_name,
+                "interviewer_voice": self.interviewer_voice,
+            }
+
+
+class SessionStore:
+    """Thread-safe, session-keyed store of InterviewSession objects.
+
+    Sessions are kept in least-recently-used order. Idle sessions are swept
+    lazily on access (no background thread), and the store never holds more
+    than ``max_sessions`` entries; busy sessions are never evicted.
+    """
+
+    def __init__(self, idle_timeout=SESSION_IDLE_TIMEOUT, max_sessions=MAX_SESSIONS,
+                 sweep_interval=30.0):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def create(self, using_openai_tts=False, replace_id=None, user_id=None):
+        """Create a new session, optionally discarding the one it replaces."""
+        session = InterviewSession(uuid.uuid4().hex, using_openai_tts=using_openai_tts, user_id=user_id)
+        with self._lock:
+            if replace_id is not None:
+                self._drop_locked(replace_id)
+            self._sessions[session.session_id] = session
+            self._evict_locked(time.monotonic(), force=True, keep=session.session_id)
+        return session
+
+    def get(self, session_id):
+        """Return the session for ``session_id`` or None if unknown/evicted."""
+        if not session_id:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            self._evict_locked(now)
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                session.last_seen = now
+            return session
+
+    def remove(self, session_id):
+        with self._lock:
+            return self._drop_locked(session_id)
+
+    def _drop_locked(self, session_id):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+        return session
+
+    def evict_idle(self):
+        """Sweep idle sessions now; returns the number evicted."""
+        with self._lock:
+            return self._evict_locked(time.monotonic(), force=True)
+
+    def _evict_locked(self, now, force=False, keep=None):
+        if not force and now - self._last_sweep < self.sweep_interval:
+            return 0
+        self._last_sweep = now
+
+        evicted = 0
+        for session_id, session in list(self._sessions.items()):
+            if now - session.last_seen > self.idle_timeout and not session.is_busy():
+                self._drop_locked(session_id)
+                evicted += 1
+
+        # Enforce the hard cap, dropping the least recently used idle sessions first
+        if len(self._sessions) > self.max_sessions:
+            for session_id, session in list(self._sessions.items()):
+                if len(self._sessions) <= self.max_sessions:
+                    break
+                if session_id != keep and not session.is_busy():
+                    self._drop_locked(session_id)
+                    evicted += 1
+
+        if evicted:
+            log.info(f"Evicted {evicted} interview session(s), {len(self._sessions)} active")
+        return evicted
+
+
+def log_session_state(session, label):
+    """Dump the full session state at DEBUG when LOG_STATE_DUMPS is on. Serializing it is
+    skipped entirely otherwise, so the request path doesn't pay for it."""
+    if LOG_STATE_DUMPS and log.isEnabledFor(logging.DEBUG):
+        log.debug("%s: %s", label, json.dumps(session.to_dict(), indent=2))
+
+
+def next_utterance(session, index):
+    """What the interviewer says after the answer to question `index`"""
+    if index + 1 < len(session.questions):
+        return session.questions[index + 1]
+    return closing_message(session.interviewer_name)
+
+
+def format_sse(event, data, event_id=None):
+    """Encode one Server-Sent Events message"""
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data)}\n\n"
@@ -3,6 +3,11 @@ import time
 import sys
 import random
 import re
+import queue
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Global variables to track TTS status
 USE_OPENAI_TTS = False
@@ -10,11 +15,17 @@ openai_client = None
 CURRENT_VOICE = "shimmer"  # Default voice
 
 # Function to add natural speech elements
-def add_natural_speech_elements(text):
+def add_natural_speech_elements(text, seed=None, opening=True):
     """
     Add filler words, slight pauses, and natural speech patterns to make 
     the text sound more conversational and human-like.
+    
+    With a `seed` the choices are deterministic, so the same input always
+    produces the same speech text (which is what makes TTS cache hits possible).
+    `opening` is False for the later pieces of an utterance that is synthesized
+    sentence by sentence: only the first piece may start with a filler.
     """
+    rng = random.Random(seed) if seed is not None else random
     # Don't modify text that's already short
     if len(text) < 30:
         return text
@@ -25,8 +36,8 @@ def add_natural_speech_elements(text):
     transitions = ["you know, ", "I mean, ", "like, ", "", "", "", ""]
     
     # Add a random filler at the beginning (30% chance)
-    if random.random() < 0.3:
-        text = random.choice(fillers) + text
+    if rng.random() < 0.3 and opening:
+        text = rng.choice(fillers) + text
     
     # Split into sentences
     sentences = re.split(r'(?<=[.!?])\s+', text)
@@ -42,143 +53,447 @@ def add_natural_speech_elements(text):
         words = sentence.split()
         if len(words) > 8:
             # Choose a random position approximately in the first half
-            pos = random.randint(2, min(5, len(words) // 2))
+            pos = rng.randint(2, min(5, len(words) // 2))
             
             # 20% chance to insert a filler or pause
-            if random.random() < 0.2:
-                if random.random() < 0.5:
-                    words.insert(pos, random.choice(transitions))
+            if rng.random() < 0.2:
+                if rng.random() < 0.5:
+                    words.insert(pos, rng.choice(transitions))
                 else:
-                    words[pos] = words[pos] + random.choice(pauses)
+                    words[pos] = words[pos] + rng.choice(pauses)
         
         processed_sentences.append(' '.join(words))
     
     return ' '.join(processed_sentences)
 
 # Import config for debugging
-from config import DEBUG
+from config import (DEBUG, TTS_CACHE_ENABLED, TTS_STREAMING, TTS_STREAM_CONCURRENCY,
+                    TTS_MIN_SENTENCE_CHARS, TTS_PLAYBACK)
+from backends import registry
+from tts_cache import normalize_text
+from metrics import TTS_SYNTHESIS_SECONDS, TTS_FIRST_AUDIO_SECONDS, TTS_PLAYBACK_SECONDS, FALLBACKS
+from log import get_logger
+
+log = get_logger(__name__)
+
+TTS_MODEL = "tts-1-hd"
+
+# On-disk cache of synthesized utterances, created when the TTS backend loads
+tts_cache = None
 
-# Try to import OpenAI for TTS
-try:
-    from openai import OpenAI
-    from config import OPENAI_API_KEY
+# Last OpenAI TTS connection check result, set when the TTS backend loads
+openai_tts_status = "OpenAI TTS not imported"
 
-    if DEBUG:
-        print(f"OpenAI import successful")
-        print(f"Using OpenAI API Key: {OPENAI_API_KEY[:8]}...{OPENAI_API_KEY[-4:]}")
+def check_openai_tts():
+    """Check if OpenAI TTS is working properly and return status message"""
+    global USE_OPENAI_TTS
+    
+    if openai_client is None:
+        USE_OPENAI_TTS = False
+        return "OpenAI TTS not imported"
     
-    # Initialize client
     try:
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        # Create a small test speech to verify credentials
+        log.info("Testing OpenAI TTS connection...")
+        response = openai_client.audio.speech.create(
+            model="tts-1",
+            voice="alloy",
+            input="Hello, I'm testing the OpenAI text to speech API."
+        )
+        
+        # If we get here without an exception, it's working
+        USE_OPENAI_TTS = True
+        return "OpenAI TTS connection successful. Available voices: alloy, echo, fable, onyx, nova, shimmer"
+    except Exception as e:
+        USE_OPENAI_TTS = False
+        return f"OpenAI TTS connection failed: {str(e)}"
+
+def synthesize_openai(text, voice=None, opening=True):
+    """Synthesize `text` with OpenAI TTS and return the path of the MP3.
+    
+    Natural speech elements are seeded from the text, so a repeated phrase
+    maps to the same cache entry and costs no API call. `opening` is False
+    for a sentence that doesn't start the utterance (see speech_pieces).
+    """
+    voice = resolve_voice(voice)  # Per-call voice, global default otherwise
+    processed_text = add_natural_speech_elements(text, seed=normalize_text(text), opening=opening)
+    
+    if tts_cache is not None:
+        cached_path = tts_cache.get(processed_text, voice, TTS_MODEL)
+        if cached_path is not None:
+            log.debug("TTS cache hit")
+            return cached_path
+    
+    # Create speech with HD model
+    with TTS_SYNTHESIS_SECONDS.time():
+        response = openai_client.audio.speech.create(
+            model=TTS_MODEL,
+            voice=voice,
+            input=processed_text
+        )
+    
+    if tts_cache is not None:
+        return tts_cache.put(processed_text, voice, TTS_MODEL, response.content)
+    
+    # No cache: use a private temp file so concurrent sessions don't overwrite each other
+    import tempfile
+    with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as f:
+        f.write(response.content)
+        return f.name
+
+def play_audio_file(path):
+    """Play an audio file and block until it finishes (platform dependent)"""
+    if not TTS_PLAYBACK:
+        return
+    import platform
+    with TTS_PLAYBACK_SECONDS.time(engine="file"):
+        if platform.system() == "Darwin":  # macOS
+            import subprocess
+            subprocess.run(["afplay", path])
+        elif platform.system() == "Windows":
+            os.system(f'start {path}')
+        else:  # Linux and others
+            os.system(f"mpg123 {path}")
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+def split_sentences(text, min_chars=TTS_MIN_SENTENCE_CHARS):
+    """Split text into sentences, merging very short ones into the next"""
+    sentences = []
+    pending = ""
+    for sentence in _SENTENCE_END.split(text.strip()):
+        pending = f"{pending} {sentence}".strip()
+        if len(pending) >= min_chars:
+            sentences.append(pending)
+            pending = ""
+    if pending:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {pending}"
+        else:
+            sentences.append(pending)
+    return sentences
+
+class SentenceSplitter:
+    """
+    Incremental split_sentences. feed() text fragments as they arrive and get
+    back the sentences they completed; close() returns whatever is left.
+    
+    A sentence is complete once the whitespace after its closing punctuation
+    has arrived, so a number like "3.5" split across fragments doesn't end
+    one early. A short last sentence can't be merged back into one already
+    returned, so it comes out on its own.
+    """
+    
+    def __init__(self, min_chars=TTS_MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""  # Text after the last sentence boundary
+        self._pending = ""  # Complete sentences still under min_chars
+    
+    def feed(self, fragment):
+        self._buffer += fragment
+        *complete, self._buffer = _SENTENCE_END.split(self._buffer)
+        sentences = []
+        for sentence in complete:
+            self._pending = f"{self._pending} {sentence}".strip()
+            if len(self._pending) >= self.min_chars:
+                sentences.append(self._pending)
+                self._pending = ""
+        return sentences
+    
+    def close(self):
+        rest = f"{self._pending} {self._buffer}".strip()
+        self._pending = self._buffer = ""
+        return [rest] if rest else []
+
+def iter_sentences(fragments, min_chars=TTS_MIN_SENTENCE_CHARS):
+    """Yield sentences from an iterable of text fragments as soon as each completes"""
+    splitter = SentenceSplitter(min_chars)
+    for fragment in fragments:
+        yield from splitter.feed(fragment)
+    yield from splitter.close()
+
+def stream_sentence_audio(sentence, voice, out_queue, opening=True):
+    """Producer: push MP3 bytes for one sentence into out_queue as they arrive.
+    
+    Ends with None; an exception is pushed (before the None) if synthesis fails.
+    """
+    try:
+        wait_for_prefetch(sentence, voice)
+        processed_text = add_natural_speech_elements(sentence, seed=normalize_text(sentence), opening=opening)
+        if tts_cache is not None:
+            cached_path = tts_cache.get(processed_text, voice, TTS_MODEL)
+            if cached_path is not None:
+                with open(cached_path, "rb") as f:
+                    out_queue.put(f.read())
+                return
         
-        # Test if the client is working
-        def check_openai_tts():
-            """Check if OpenAI TTS is working properly and return status message"""
-            global USE_OPENAI_TTS
+        # Streaming body: bytes are handed to the player before synthesis completes
+        start = time.perf_counter()
+        parts = []
+        with openai_client.audio.speech.with_streaming_response.create(
+            model=TTS_MODEL,
+            voice=voice,
+            input=processed_text,
+            response_format="mp3"
+        ) as response:
+            for chunk in response.iter_bytes(4096):
+                parts.append(chunk)
+                out_queue.put(chunk)
+        
+        TTS_SYNTHESIS_SECONDS.observe(time.perf_counter() - start)
+        
+        if tts_cache is not None:
+            tts_cache.put(processed_text, voice, TTS_MODEL, b"".join(parts))
+    except Exception as e:
+        out_queue.put(e)
+    finally:
+        out_queue.put(None)
+
+def open_stream_player():
+    """An mpg123 process reading MP3 from stdin, or None if the platform can't stream"""
+    if not TTS_PLAYBACK:
+        return None
+    import platform
+    if platform.system() in ("Darwin", "Windows"):
+        # afplay and `start` need a complete file
+        return None
+    mpg123 = shutil.which("mpg123")
+    if mpg123 is None:
+        return None
+    return subprocess.Popen([mpg123, "-q", "-"], stdin=subprocess.PIPE)
+
+def speak_openai_streaming(sentences, voice=None):
+    """
+    Sentence-pipelined OpenAI TTS.
+    
+    `sentences` may be a list or an iterable that is still being produced,
+    such as a streaming LLM response. Each sentence starts synthesizing as
+    soon as it arrives, and sentence 1 starts playing as soon as its first
+    bytes do. Later sentences keep downloading and are played in order.
+    Returns the time to first audio in seconds.
+    """
+    global USE_OPENAI_TTS
+    
+    start = time.perf_counter()
+    voice = resolve_voice(voice)
+    received = []  # Sentences handed to synthesis so far
+    queues = queue.Queue()  # One audio queue per sentence, in order, then None
+    executor = ThreadPoolExecutor(max_workers=TTS_STREAM_CONCURRENCY)
+    failed = threading.Event()
+    
+    def feed():
+        try:
+            for sentence in sentences:
+                received.append(sentence)
+                if failed.is_set():
+                    continue  # Only collected, for the system voice
+                out_queue = queue.Queue()
+                try:
+                    executor.submit(stream_sentence_audio, sentence, voice, out_queue, len(received) == 1)
+                except RuntimeError:
+                    continue  # Shut down by a failure in the meantime
+                queues.put(out_queue)
+        except Exception as e:
+            # The text source failing is not a TTS failure: speak what arrived
+            log.warning(f"Sentence source failed: {e}")
+        finally:
+            queues.put(None)
+    
+    feeder = threading.Thread(target=feed, name="tts-feed", daemon=True)
+    feeder.start()
+    
+    player = open_stream_player()
+    first_audio = None
+    played = 0
+    try:
+        for out_queue in iter(queues.get, None):
+            buffered = []
+            for chunk in iter(out_queue.get, None):
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if player is not None:
+                    player.stdin.write(chunk)
+                    player.stdin.flush()
+                    if first_audio is None:
+                        first_audio = time.perf_counter() - start
+                else:
+                    buffered.append(chunk)
             
+            if player is None:
+                # Whole-file players: this sentence plays while later ones download
+                import tempfile
+                with tempfile.NamedTemporaryFile(suffix=".mp3", delete=False) as f:
+                    f.write(b"".join(buffered))
+                if first_audio is None:
+                    first_audio = time.perf_counter() - start
+                play_audio_file(f.name)
+                os.remove(f.name)
+            played += 1
+    except Exception as e:
+        log.warning(f"OpenAI TTS streaming error: {e}")
+        log.info("Falling back to system TTS...")
+        USE_OPENAI_TTS = False
+        failed.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+        feeder.join()  # The rest of the text, if it is still arriving
+        speak_fallback(" ".join(received[played:]))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if player is not None:
             try:
-                # Create a small test speech to verify credentials
-                print("Testing OpenAI TTS connection...")
-                response = openai_client.audio.speech.create(
-                    model="tts-1",
-                    voice="alloy",
-                    input="Hello, I'm testing the OpenAI text to speech API."
-                )
-                
-                # If we get here without an exception, it's working
-                USE_OPENAI_TTS = True
-                return "OpenAI TTS connection successful. Available voices: alloy, echo, fable, onyx, nova, shimmer"
-            except Exception as e:
-                USE_OPENAI_TTS = False
-                return f"OpenAI TTS connection failed: {str(e)}"
+                player.stdin.close()
+            except BrokenPipeError:
+                pass
+            player.wait()
+            if first_audio is not None:
+                TTS_PLAYBACK_SECONDS.observe(time.perf_counter() - start - first_audio, engine="stream")
+    
+    if first_audio is not None:
+        TTS_FIRST_AUDIO_SECONDS.observe(first_audio)
+        log.info(f"Time to first audio: {first_audio:.2f}s ({len(received)} sentences)")
+    return first_audio
+
+def speech_pieces(text):
+    """The units speak() synthesizes and caches `text` in: sentences when streaming, else the whole text.
+    Only the first piece is synthesized with opening=True."""
+    return split_sentences(text) if TTS_STREAMING else [text]
+
+def speak_openai(text, voice=None):
+    """Use OpenAI for text-to-speech"""
+    global USE_OPENAI_TTS
+    
+    if not USE_OPENAI_TTS:
+        log.warning("OpenAI TTS not available, using fallback...")
+        speak_fallback(text)
+        return
+        
+    try:
+        log.debug("🗣️ OpenAI TTS: %s", text)
         
-        # Check connection on startup
-        connection_status = check_openai_tts()
-        print(f"OpenAI TTS status: {connection_status}")
+        if TTS_STREAMING:
+            speak_openai_streaming(speech_pieces(text), voice)
+            return True
         
-        def speak_openai(text):
-            """Use OpenAI for text-to-speech"""
-            global USE_OPENAI_TTS
+        wait_for_prefetch(text, resolve_voice(voice))
+        path = synthesize_openai(text, voice)
+        play_audio_file(path)
+        if tts_cache is None:
+            os.remove(path)
             
-            if not USE_OPENAI_TTS:
-                print("OpenAI TTS not available, using fallback...")
-                speak_fallback(text)
-                return
-                
-            try:
-                print(f"🗣️ OpenAI TTS: {text}")
-                
-                # Add natural speech elements and modify for faster pace
-                processed_text = add_natural_speech_elements(text)
-                
-                # Create speech with HD model
-                response = openai_client.audio.speech.create(
-                    model="tts-1-hd",
-                    voice=CURRENT_VOICE,  # Use the globally set voice
-                    input=processed_text
+        return True
+    except Exception as e:
+        log.warning(f"OpenAI TTS error: {e}")
+        log.info("Falling back to system TTS...")
+        USE_OPENAI_TTS = False
+        speak_fallback(text)
+
+# Background synthesis of utterances we know are coming next
+_prefetch_executor = ThreadPoolExecutor(max_workers=TTS_STREAM_CONCURRENCY, thread_name_prefix="tts-prefetch")
+_prefetching = {}  # (normalized text, voice) -> Future
+_prefetch_lock = threading.Lock()
+
+def prefetch_speech(text, voice=None):
+    """
+    Synthesize `text` into the TTS cache in the background, so a later
+    speak() of the same text starts without waiting on the API. Returns the
+    list of futures (one per sentence when streaming), or [] when OpenAI TTS
+    or the cache is unavailable.
+    """
+    if not registry.is_ready("tts") or not USE_OPENAI_TTS or tts_cache is None:
+        return []
+    
+    voice = resolve_voice(voice)
+    futures = []
+    for i, piece in enumerate(speech_pieces(text)):
+        key = (normalize_text(piece), voice)
+        with _prefetch_lock:
+            future = _prefetching.get(key)
+            if future is None:
+                future = _prefetch_executor.submit(synthesize_openai, piece, voice, i == 0)
+                _prefetching[key] = future
+                future.add_done_callback(
+                    lambda f, key=key: _prefetching.pop(key, None) if _prefetching.get(key) is f else None
                 )
-                
-                # Save to a temporary file and play
-                temp_file = "temp_speech.mp3"
-                response.stream_to_file(temp_file)
-                
-                # Play the audio (platform dependent)
-                import platform
-                if platform.system() == "Darwin":  # macOS
-                    import subprocess
-                    subprocess.run(["afplay", temp_file])
-                elif platform.system() == "Windows":
-                    import os
-                    os.system(f'start {temp_file}')
-                else:  # Linux and others
-                    import os
-                    os.system(f"mpg123 {temp_file}")
-                    
-                return True
-            except Exception as e:
-                print(f"OpenAI TTS error: {e}")
-                print("Falling back to system TTS...")
-                USE_OPENAI_TTS = False
-                speak_fallback(text)
-                
+        futures.append(future)
+    return futures
+
+def wait_for_prefetch(text, voice):
+    """If `text` is already being prefetched, wait for it instead of synthesizing it twice"""
+    future = _prefetching.get((normalize_text(text), voice))
+    if future is not None:
+        try:
+            future.result()
+        except Exception as e:
+            log.warning(f"TTS prefetch failed: {e}")
+
+def load_tts_backend():
+    """Set up OpenAI TTS (with a connection test) and the pyttsx3 engine. Runs once."""
+    global openai_client, openai_tts_status, engine, tts_cache
+    
+    # Try to use the shared OpenAI client for TTS
+    try:
+        from openai_client import get_openai_client
+        openai_client = get_openai_client("tts")
+    except (ImportError, OSError) as e:
+        log.warning(f"OpenAI TTS import failed: {e}")
+        log.info("OpenAI TTS not available, will check other options...")
     except Exception as e:
         if DEBUG:
-            print(f"Error initializing OpenAI client: {e}")
+            log.warning(f"Error initializing OpenAI client: {e}")
         openai_client = None
-        
-except (ImportError, OSError) as e:
-    USE_OPENAI_TTS = False
-    print(f"OpenAI TTS import failed: {e}")
-    print("OpenAI TTS not available, will check other options...")
+    
+    if TTS_CACHE_ENABLED:
+        try:
+            from tts_cache import TTSCache
+            tts_cache = TTSCache()
+            log.info(f"TTS cache: {tts_cache.stats()['entries']} cached utterances")
+        except OSError as e:
+            log.warning(f"TTS cache unavailable: {e}")
+    
+    # Check connection once, while warming up or on first use
+    openai_tts_status = check_openai_tts()
+    log.info(f"OpenAI TTS status: {openai_tts_status}")
+    
+    # pyttsx3 TTS
+    try:
+        import pyttsx3
+        engine = pyttsx3.init()
+    except Exception:
+        engine = None
+    
+    if USE_OPENAI_TTS:
+        log.info("Using OpenAI Text-to-Speech")
+    else:
+        log.info("Using system TTS")
+    return {"openai": openai_tts_status, "pyttsx3": engine is not None}
+
+registry.register("tts", load_tts_backend)
 
 # MacOS say command TTS
 def speak_macos(text):
     """Use macOS say command for TTS"""
     try:
-        print(f"🗣️ System Voice: {text}")
+        log.debug("🗣️ System Voice: %s", text)
         os.system(f'say "{text}"')
         return True
     except Exception as e:
-        print(f"macOS TTS error: {e}")
+        log.warning(f"macOS TTS error: {e}")
         return False
 
-# pyttsx3 TTS
-try:
-    import pyttsx3
-    engine = pyttsx3.init()
-    
-    def speak_pyttsx3(text):
-        """Use pyttsx3 for TTS"""
-        try:
-            print(f"🗣️ pyttsx3: {text}")
-            engine.say(text)
-            engine.runAndWait()
-            return True
-        except Exception as e:
-            print(f"pyttsx3 error: {e}")
-            return False
-except:
-    def speak_pyttsx3(text):
+# pyttsx3 TTS (engine is created by load_tts_backend)
+engine = None
+
+def speak_pyttsx3(text):
+    """Use pyttsx3 for TTS"""
+    if engine is None:
+        return False
+    try:
+        log.debug("🗣️ pyttsx3: %s", text)
+        engine.say(text)
+        engine.runAndWait()
+        return True
+    except Exception as e:
+        log.warning(f"pyttsx3 error: {e}")
         return False
 
 # Fallback text-only TTS
@@ -192,36 +507,65 @@ def speak_print(text):
     return True
 
 # Composite fallback function
-def speak_fallback(text):
-    """Try multiple fallback methods in order"""
-    # First try macOS say
-    if speak_macos(text):
-        return
-    
-    # Then try pyttsx3
-    if speak_pyttsx3(text):
-        return
-    
-    # Last resort is just print
-    speak_print(text)
+def speak_fallback(text, voice=None):
+    """Try multiple fallback methods in order (system voices ignore `voice`)"""
+    FALLBACKS.inc(component="tts")
+    with TTS_PLAYBACK_SECONDS.time(engine="system"):
+        # First try macOS say
+        if speak_macos(text):
+            return
+        
+        # Then try pyttsx3
+        if speak_pyttsx3(text):
+            return
+        
+        # Last resort is just print
+        speak_print(text)
 
-# Set the default speak function based on what's available
-if USE_OPENAI_TTS:
-    speak = speak_openai
-    print("Using OpenAI Text-to-Speech")
-else:
-    speak = speak_fallback
-    print("Using system TTS")
+def speak(text, voice=None):
+    """Speak with OpenAI TTS when it is available, otherwise a system voice"""
+    registry.get("tts")
+    if USE_OPENAI_TTS:
+        return speak_openai(text, voice=voice)
+    return speak_fallback(text, voice=voice)
+
+def speak_stream(sentences, voice=None):
+    """
+    Speak sentences as they arrive from an iterable, e.g. iter_sentences over
+    a streaming LLM response, without waiting for the whole text. Returns the
+    seconds until the first sentence started playing.
+    """
+    registry.get("tts")
+    if USE_OPENAI_TTS and TTS_STREAMING:
+        return speak_openai_streaming(sentences, voice)
+    
+    start = time.perf_counter()
+    first_audio = None
+    for sentence in sentences:
+        if first_audio is None:
+            first_audio = time.perf_counter() - start
+        speak(sentence, voice=voice)
+    return first_audio
 
 # Function to check all available voice services and report status
-def check_voice_services():
-    """Check all voice services and return status of each"""
+def check_voice_services(retest=False):
+    """Check all voice services and return status of each.
+    
+    The OpenAI check synthesizes a test phrase, so it only runs again when
+    `retest` is set; otherwise the result from backend start-up is reused.
+    """
+    global openai_tts_status
     status = {}
     
-    if 'check_openai_tts' in globals():
-        status["openai"] = check_openai_tts()
-    else:
-        status["openai"] = "OpenAI TTS not imported"
+    if retest:
+        registry.get("tts")
+        openai_tts_status = check_openai_tts()
+    elif not registry.is_ready("tts"):
+        # Don't hold the page load hostage to backend warm-up
+        status["openai"] = "Voice services are still starting up"
+        status["active"] = "system"
+        return status
+    status["openai"] = openai_tts_status
     
     # Report which service is currently active
     if USE_OPENAI_TTS:
@@ -231,16 +575,52 @@ def check_voice_services():
     
     return status
 
-# Function to change the voice
+def prewarm_tts_cache(phrases, voices=None):
+    """Synthesize known phrases into the TTS cache ahead of time, in the same
+    pieces speak() will look them up in.
+    
+    Returns (newly synthesized, already cached) counts of those pieces.
+    """
+    registry.get("tts")
+    if not USE_OPENAI_TTS or tts_cache is None:
+        log.warning("OpenAI TTS or the TTS cache is unavailable; nothing to pre-warm")
+        return 0, 0
+    
+    created, cached = 0, 0
+    for voice in voices or VALID_VOICES:
+        for i, piece in (item for phrase in phrases for item in enumerate(speech_pieces(phrase))):
+            misses = tts_cache.misses
+            try:
+                synthesize_openai(piece, voice, i == 0)
+            except Exception as e:
+                log.warning(f"Failed to pre-warm '{piece[:40]}...' ({voice}): {e}")
+                continue
+            if tts_cache.misses > misses:
+                created += 1
+            else:
+                cached += 1
+    return created, cached
+
+VALID_VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
+
+def resolve_voice(voice=None):
+    """Return `voice` if it is a valid OpenAI voice, otherwise the current default.
+
+    Unlike set_voice this does not touch the global, so concurrent interview
+    sessions can each speak with their own voice.
+    """
+    if voice in VALID_VOICES:
+        return voice
+    return CURRENT_VOICE
+
+# Function to change the default voice
 def set_voice(voice):
     """Set the voice to use for TTS"""
     global CURRENT_VOICE
-    valid_voices = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
-    
-    if voice in valid_voices:
+    if voice in VALID_VOICES:
         CURRENT_VOICE = voice
-        print(f"Voice set to: {CURRENT_VOICE}")
+        log.info(f"Voice set to: {CURRENT_VOICE}")
     else:
-        print(f"Invalid voice '{voice}', using default: {CURRENT_VOICE}")
+        log.info(f"Invalid voice '{voice}', using default: {CURRENT_VOICE}")
         
     return CURRENT_VOICE
@@ -0,0 +1,155 @@
+import threading
+import time
+
+import numpy as np
+
+from capture_buffer import StreamResampler, CAPTURE_SAMPLE_RATE
+from config import STREAMING_STEP_SECONDS, STREAMING_STABILITY_MARGIN
+from metrics import TRANSCRIPTION_SECONDS
+from log import get_logger
+
+log = get_logger(__name__)
+
+WHISPER_SAMPLE_RATE = CAPTURE_SAMPLE_RATE
+MIN_DECODE_SECONDS = 1.0  # Don't bother decoding less audio than this
+
+
+class StreamingTranscriber:
+    """
+    Incrementally transcribe an answer with a local Whisper model while it is
+    still being recorded.
+
+    The recorder hands every captured chunk to feed(). Audio is resampled to
+    16 kHz as it arrives, and a background thread re-decodes the uncommitted
+    window every `step_seconds`. Segments that end more than
+    `stability_margin` seconds before the end of the window are considered
+    stable: their text is committed and the window start moves past them.
+    When the answer ends, finish() only has to decode the remaining tail.
+    """
+
+    def __init__(self, model, input_rate=WHISPER_SAMPLE_RATE, step_seconds=STREAMING_STEP_SECONDS,
+                 stability_margin=STREAMING_STABILITY_MARGIN):
+        self.model = model
+        self.input_rate = input_rate
+        self.step_seconds = step_seconds
+        self.stability_margin = stability_margin
+
+        self._lock = threading.Lock()
+        self._chunks = []  # Uncommitted 16 kHz float32 audio, from sample _base onwards
+        self._base = 0
+        self._num_samples = 0
+        self._committed = 0  # Samples already turned into committed text
+        self._last_pass_samples = 0
+        self._texts = []
+        self._language = None
+
+        # The recorder already delivers 16 kHz; other rates are resampled here
+        self._resampler = StreamResampler(input_rate, WHISPER_SAMPLE_RATE)
+
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+        self.passes = 0
+        self.tail_seconds = 0.0
+        self.finish_latency = None
+
+    def feed(self, chunk):
+        """Add a chunk of captured audio (any shape, mono, at input_rate)"""
+        resampled = self._resampler.process(np.asarray(chunk, dtype=np.float32).reshape(-1))
+        if not len(resampled):
+            return
+        with self._lock:
+            self._chunks.append(resampled)
+            self._num_samples += len(resampled)
+            pending = self._num_samples - self._last_pass_samples
+        if pending >= self.step_seconds * WHISPER_SAMPLE_RATE:
+            self._ready.set()
+
+    def finish(self):
+        """Stop background decoding, decode the tail and return the full transcript"""
+        start = time.time()
+        self._stopped.set()
+        self._ready.set()
+        self._worker.join()
+
+        with self._lock:
+            self.tail_seconds = (self._num_samples - self._committed) / WHISPER_SAMPLE_RATE
+        self._decode_pass(final=True)
+
+        self.finish_latency = time.time() - start
+        TRANSCRIPTION_SECONDS.observe(self.finish_latency, backend="streaming")
+        log.info("Streaming transcription finished: %d passes, tail %.2fs decoded in %.2fs",
+                 self.passes, self.tail_seconds, self.finish_latency)
+        return " ".join(self._texts).strip()
+
+    @property
+    def buffered_samples(self):
+        """Samples held in memory: only the uncommitted tail of the answer"""
+        with self._lock:
+            return self._num_samples - self._base
+
+    def _consolidate(self):
+        """Merge the buffered chunks into one array; caller holds the lock"""
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0] if self._chunks else np.zeros(0, dtype=np.float32)
+
+    def _window(self):
+        """Consolidate captured audio and return (uncommitted audio, its offset)"""
+        with self._lock:
+            audio = self._consolidate()
+            self._last_pass_samples = self._num_samples
+            return audio[self._committed - self._base:], self._committed
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._ready.wait()
+            self._ready.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self._decode_pass(final=False)
+            except Exception as e:
+                log.warning(f"Streaming transcription pass failed: {e}")
+
+    def _decode_pass(self, final):
+        audio, offset = self._window()
+        if len(audio) < MIN_DECODE_SECONDS * WHISPER_SAMPLE_RATE and not (final and len(audio)):
+            return
+
+        result = self.model.transcribe(
+            audio,
+            language=self._language,
+            initial_prompt=" ".join(self._texts)[-200:] or None,
+            condition_on_previous_text=False,
+            temperature=0.0,
+            fp16=False
+        )
+        self.passes += 1
+        self._language = self._language or result.get("language")
+        segments = result.get("segments", [])
+
+        if final:
+            self._commit([s["text"] for s in segments], offset + len(audio))
+            return
+
+        # Only segments that end well before the window edge are stable
+        window_end = len(audio) / WHISPER_SAMPLE_RATE
+        stable = [s for s in segments if s["end"] <= window_end - self.stability_margin]
+        if stable:
+            self._commit([s["text"] for s in stable], offset + int(stable[-1]["end"] * WHISPER_SAMPLE_RATE))
+        elif not segments and window_end > 2 * self.stability_margin:
+            # Nothing but silence so far: drop it so later passes stay short
+            self._commit([], offset + int((window_end - self.stability_margin) * WHISPER_SAMPLE_RATE))
+
+    def _commit(self, texts, new_offset):
+        with self._lock:
+            self._texts.extend(t.strip() for t in texts if t.strip())
+            self._committed = max(self._committed, new_offset)
+            # Committed audio is never decoded again, so only the tail stays buffered
+            if self._committed > self._base:
+                audio = self._consolidate()
+                self._chunks = [audio[self._committed - self._base:].copy()]
+                self._base = self._committed
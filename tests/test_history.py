@@ -0,0 +1,84 @@
+import pytest
+
+from history import HistoryStore
+from sessions import InterviewSession
+
+
+def make_session(session_id, user_id="u1", job="Engineer"):
+    session = InterviewSession(session_id, user_id=user_id)
+    session.job = job
+    session.questions = ["Welcome", "First question?", "Second question?"]
+    session.interviewer_name = "Kashmala"
+    session.interviewer_voice = "shimmer"
+    return session
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(path=str(tmp_path / "history.sqlite3"), flush_interval=0.01)
+    yield store
+    store.close()
+
+
+def test_close_flushes_queued_writes(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    # Nothing would be committed for a minute unless close() flushes the batch
+    store = HistoryStore(path=path, batch_size=1000, flush_interval=60)
+    store.record_session(make_session("s1"), started_at=1000)
+    store.close()
+
+    reopened = HistoryStore(path=path)
+    assert [row["id"] for row in reopened.sessions_page("u1")["sessions"]] == ["s1"]
+    reopened.close()
+
+
+def test_cursor_pages_cover_every_session_once(store):
+    for i in range(7):
+        store.record_session(make_session(f"s{i}"), started_at=1000 + i)
+    assert store.flush()
+
+    seen, cursor = [], None
+    for _ in range(3):
+        page = store.sessions_page("u1", limit=3, cursor=cursor)
+        seen += [row["id"] for row in page["sessions"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+        # A newer interview started between pages doesn't shift the next one
+        store.record_session(make_session(f"new{len(seen)}"), started_at=2000 + len(seen))
+        store.flush()
+
+    assert cursor is None
+    assert seen == [f"s{i}" for i in range(6, -1, -1)]
+
+    with pytest.raises(ValueError):
+        store.sessions_page("u1", cursor="not-a-cursor")
+
+
+def test_users_only_see_their_own_history(store):
+    mine, theirs = make_session("mine", user_id="u1"), make_session("theirs", user_id="u2")
+    for session in (mine, theirs):
+        store.record_session(session)
+        store.record_answer(session, 1, f"{session.session_id} answer", "feedback", 5.0)
+    store.flush()
+
+    assert [row["id"] for row in store.sessions_page("u1")["sessions"]] == ["mine"]
+    assert [row["session_id"] for row in store.answers_page("u1")["answers"]] == ["mine"]
+    assert store.session_detail("u1", "theirs") is None
+    assert store.session_detail("u2", "theirs")["answers"][0]["transcript"] == "theirs answer"
+
+
+def test_answer_is_stored_under_its_question(store):
+    session = make_session("s1")
+    # A failed first attempt left a transcript without feedback
+    session.answers = ["lost attempt", "retried answer"]
+    session.feedbacks = ["feedback on the retry"]
+    store.record_session(session)
+    store.record_answer(session, 1, "retried answer", "feedback on the retry", 6.5, {"transcribe": 0.4})
+    store.flush()
+
+    answer, = store.session_detail("u1", "s1")["answers"]
+    assert answer["question_index"] == 1 and answer["question"] == "First question?"
+    assert answer["transcript"] == "retried answer"
+    assert answer["feedback"] == "feedback on the retry"
+    assert answer["rubric_score"] == 6.5 and answer["timings"] == {"transcribe": 0.4}
@@ -0,0 +1,17 @@
+import sys
+
+import numpy as np
+
+from inference import WhisperInferenceService
+
+
+class EchoModel:
+    def transcribe(self, audio, **options):
+        return {"text": f"{len(audio)} samples", "segments": [], "language": "en"}
+
+
+def test_non_batchable_model_needs_neither_torch_nor_whisper():
+    service = WhisperInferenceService(EchoModel(), workers=1)
+    assert service.transcribe(np.zeros(1600, dtype=np.float32))["text"] == "1600 samples"
+    assert service.stats()["completed"] == 1
+    assert "torch" not in sys.modules and "whisper" not in sys.modules
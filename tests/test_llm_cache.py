@@ -0,0 +1,30 @@
+import sqlite3
+import threading
+import time
+
+from llm_cache import CachePolicy, LLMCache
+
+PERSISTED = CachePolicy(ttl=60, persist=True)
+
+
+def test_memory_hits_do_not_wait_on_a_blocked_write(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = LLMCache(path=path)
+    cache.put("warm", "cached", "evaluation", PERSISTED)
+
+    # Another process holds the write lock, so the next put waits in SQLite
+    blocker = sqlite3.connect(path)
+    blocker.execute("BEGIN IMMEDIATE")
+    writer = threading.Thread(target=cache.put, args=("new", "text", "evaluation", PERSISTED))
+    writer.start()
+    time.sleep(0.2)
+
+    start = time.perf_counter()
+    assert cache.get("warm", "evaluation", PERSISTED) == "cached"
+    assert cache.get("new", "evaluation", PERSISTED) == "text"
+    assert time.perf_counter() - start < 0.1
+
+    blocker.rollback()
+    writer.join(5)
+    assert not writer.is_alive()
+    assert LLMCache(path=path).get("new", "evaluation", PERSISTED) == "text"
@@ -0,0 +1,27 @@
+from question_bank import QuestionBank, canonicalize_title
+
+QUESTIONS = ["Tell me about a launch you ran.", "How do you prioritize?", "Describe a hard stakeholder."]
+
+
+def test_abbreviations_expand_whole_tokens_only():
+    assert canonicalize_title("De-escalation Specialist") == "de escalation specialist"
+    assert canonicalize_title("Sr. DE") == "data engineer"
+    assert canonicalize_title("front-end developer") == "frontend engineer"
+
+
+def test_synonyms_apply_before_ignored_words_are_dropped():
+    assert canonicalize_title("Project Lead") == "project manager"
+    assert canonicalize_title("Senior Project Lead") == "project manager"
+    assert canonicalize_title("Lead Software Developer") == "software engineer"
+
+
+def test_similar_roles_stay_separate(tmp_path):
+    bank = QuestionBank(path=str(tmp_path / "bank.json.gz"))
+    bank.add("Project Manager", QUESTIONS)
+
+    assert bank.resolve("Product Manager") is None
+    assert bank.resolve("Projet Manager") == "project manager"
+
+    bank.add("Product Manager", QUESTIONS[:2])
+    assert bank.roles() == {"project manager": 3, "product manager": 2}
+    assert bank.sample("Product Manager", 3) is None
@@ -0,0 +1,45 @@
+from rubric import score_answer, quick_evaluation
+
+QUESTION = "Tell me about a time you had to manage a difficult project deadline."
+
+STRUCTURED = (
+    "At my last job our team was three weeks from launching a billing system when the vendor API changed. "
+    "My role was to keep the launch on schedule without cutting testing. "
+    "I first analyzed which features depended on the vendor and prioritized the deadline-critical ones. "
+    "Then I set up a daily check-in with the vendor and wrote an adapter layer so the project could move "
+    "forward while they stabilized the API. I also negotiated a two day extension for the reporting module "
+    "with our product manager. As a result we shipped the core system on the original deadline, reduced "
+    "billing errors by 40% in the first month and delivered the reporting module 2 days later. "
+    "I learned to surface risks to a difficult deadline early and to keep stakeholders informed."
+)
+
+
+def test_empty_answer_scores_zero():
+    rubric = score_answer(QUESTION, "")
+    assert rubric.score == 0
+    assert rubric.words == 0 and rubric.star == () and rubric.numbers == 0
+
+    evaluation = quick_evaluation(QUESTION, "")
+    assert evaluation["score"] == 0
+    assert evaluation["feedback"].startswith("No answer was recorded")
+
+
+def test_short_answer_scores_low_and_asks_for_more():
+    evaluation = quick_evaluation(QUESTION, "I worked late and we made the deadline.")
+    assert 0 <= evaluation["score"] <= 4
+    assert "Expand on it" in evaluation["feedback"]
+
+
+def test_structured_answer_scores_high():
+    rubric = score_answer(QUESTION, STRUCTURED)
+    assert set(rubric.star) == {"situation", "task", "action", "result"}
+    assert rubric.numbers >= 2
+    assert 8 <= rubric.score <= 10
+    assert rubric.score * 2 == int(rubric.score * 2)
+    assert rubric.keyword_overlap >= 0.5
+
+
+def test_scores_stay_in_range():
+    rambling = "um so yeah basically " * 200 + STRUCTURED
+    for answer in ("", "Yes.", STRUCTURED, rambling, STRUCTURED * 3):
+        assert 0 <= score_answer(QUESTION, answer).score <= 10
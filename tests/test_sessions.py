@@ -0,0 +1,40 @@
+import json
+
+from sessions import EVENT_LOG_SIZE, InterviewSession, format_sse
+
+
+def test_events_since_replays_only_missed_deltas():
+    session = InterviewSession("s1")
+    session.update("interview_started", job="Engineer", current_question_index=1)
+    seen = session.version
+    session.append("transcript_ready", "answers", "My answer")
+    session.update("next_question", current_question_index=2)
+
+    missed = session.events_since(seen)
+    assert [delta["type"] for delta in missed] == ["transcript_ready", "next_question"]
+    assert [delta["version"] for delta in missed] == [seen + 1, seen + 2]
+    assert missed[0]["append"] == {"answers": "My answer"}
+    assert missed[1]["set"] == {"current_question_index": 2}
+    assert session.events_since(session.version) == []
+
+
+def test_events_since_asks_for_a_snapshot_once_deltas_are_gone():
+    session = InterviewSession("s1")
+    for i in range(EVENT_LOG_SIZE + 5):
+        session.update("tick", current_question_index=i)
+
+    assert session.events_since(0) is None
+    assert session.events_since(4) is None
+    assert len(session.events_since(5)) == EVENT_LOG_SIZE
+    # A version from before a restart is ahead of this session's
+    assert session.events_since(session.version + 10) is None
+
+
+def test_format_sse():
+    message = format_sse("delta", {"text": "two\nlines", "version": 3}, 3)
+    assert message.endswith("\n\n")
+    lines = message[:-2].split("\n")
+    assert lines[:2] == ["event: delta", "id: 3"]
+    assert len(lines) == 3 and json.loads(lines[2][len("data: "):]) == {"text": "two\nlines", "version": 3}
+
+    assert format_sse("snapshot", {}) == "event: snapshot\ndata: {}\n\n"
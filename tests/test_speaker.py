@@ -0,0 +1,61 @@
+import contextlib
+import types
+
+import pytest
+
+import speaker
+from questions import closing_message
+from tts_cache import TTSCache
+
+
+class FakeSpeechAPI:
+    """Stands in for client.audio.speech and counts synthesis requests"""
+
+    def __init__(self):
+        self.requests = []
+        self.with_streaming_response = types.SimpleNamespace(create=self._stream)
+
+    def create(self, model, voice, input, **options):
+        self.requests.append(input)
+        return types.SimpleNamespace(content=b"mp3:" + input.encode())
+
+    def _stream(self, model, voice, input, **options):
+        self.requests.append(input)
+        response = types.SimpleNamespace(iter_bytes=lambda size: iter([b"mp3:" + input.encode()]))
+        return contextlib.nullcontext(response)
+
+
+@pytest.fixture
+def openai_tts(tmp_path, monkeypatch):
+    api = FakeSpeechAPI()
+    monkeypatch.setattr(speaker, "openai_client", types.SimpleNamespace(audio=types.SimpleNamespace(speech=api)))
+    monkeypatch.setattr(speaker, "tts_cache", TTSCache(directory=str(tmp_path)))
+    monkeypatch.setattr(speaker, "USE_OPENAI_TTS", True)
+    monkeypatch.setattr(speaker, "TTS_PLAYBACK", False)
+    monkeypatch.setitem(speaker.registry._backends, "tts", {})
+    return api
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_prewarmed_phrase_is_a_cache_hit(openai_tts, monkeypatch, streaming):
+    monkeypatch.setattr(speaker, "TTS_STREAMING", streaming)
+    phrase = closing_message("Kashmala")
+
+    created, cached = speaker.prewarm_tts_cache([phrase], voices=["shimmer"])
+    assert created == len(speaker.speech_pieces(phrase)) and cached == 0
+    synthesized = len(openai_tts.requests)
+
+    speaker.speak(phrase, voice="shimmer")
+    assert len(openai_tts.requests) == synthesized
+
+
+def test_only_the_first_sentence_gets_an_opening_filler(openai_tts, monkeypatch):
+    monkeypatch.setattr(speaker, "TTS_STREAMING", True)
+    text = " ".join(f"Sentence number {i} explains one more part of the answer in detail." for i in range(12))
+    pieces = speaker.speech_pieces(text)
+
+    speaker.speak(text, voice="shimmer")
+    # Sentences are synthesized concurrently, so the requests can arrive in any order
+    assert len(openai_tts.requests) == len(pieces) > 1
+    fillers = ("Um, ", "Hmm, ", "So, ", "Well, ", "Right, ")
+    assert sum(spoken.startswith(fillers) for spoken in openai_tts.requests) <= 1
@@ -0,0 +1,36 @@
+import numpy as np
+
+from streaming_transcriber import StreamingTranscriber, WHISPER_SAMPLE_RATE
+
+
+class FakeModel:
+    """Reports one segment per window that ends a second short of the stability margin"""
+
+    def __init__(self, margin):
+        self.margin = margin
+        self.window_lengths = []
+
+    def transcribe(self, audio, **kwargs):
+        self.window_lengths.append(len(audio))
+        seconds = len(audio) / WHISPER_SAMPLE_RATE
+        return {"language": "en", "segments": [{"text": "words", "end": max(0.0, seconds - self.margin - 1.0)}]}
+
+
+def test_buffer_stays_bounded_over_a_long_answer():
+    model = FakeModel(margin=1.0)
+    # A step larger than the answer keeps the background thread idle; passes run here instead
+    streamer = StreamingTranscriber(model, step_seconds=10 ** 6, stability_margin=1.0)
+    chunk = np.zeros(WHISPER_SAMPLE_RATE // 10, dtype=np.float32)
+    step = 5 * WHISPER_SAMPLE_RATE
+
+    peak = 0
+    for n in range(10 * 60 * 10):  # Ten minutes in 100 ms chunks
+        streamer.feed(chunk)
+        if (n + 1) * len(chunk) % step == 0:
+            streamer._decode_pass(final=False)
+            peak = max(peak, streamer.buffered_samples)
+
+    assert peak <= 10 * WHISPER_SAMPLE_RATE
+    assert max(model.window_lengths) <= 10 * WHISPER_SAMPLE_RATE
+    assert streamer.finish().startswith("words words")
+    assert streamer.buffered_samples == 0
@@ -0,0 +1,33 @@
+from transcriber import CANNED_ANSWERS, transcribe_with_canned_responses
+
+
+def test_canned_answer_follows_the_question_index():
+    session_id = "0a0b0c0d0e0f40a08000000000000000"  # Hex ids are full of digits
+    answers = [transcribe_with_canned_responses(None, f"answer_{session_id}_{i}.wav") for i in range(1, 4)]
+    assert answers == CANNED_ANSWERS[1:4]
+    assert transcribe_with_canned_responses(None, "answer_2.wav") == CANNED_ANSWERS[2]
+
+
+def test_segments_are_mapped_back_to_the_original_recording(monkeypatch):
+    import numpy as np
+    import transcriber
+
+    rate = 16000
+    rng = np.random.default_rng(0)
+    quiet = lambda s: rng.normal(0, 0.001, int(rate * s)).astype(np.float32)
+    voiced = lambda s: (0.3 * np.sin(2 * np.pi * 200 * np.arange(int(rate * s)) / rate)).astype(np.float32)
+    # Speech at 2-3 s and 6-7 s of the recording, with a 3 s pause between
+    audio = np.concatenate([quiet(2), voiced(1), quiet(3), voiced(1), quiet(2)])
+
+    def segments(compacted, filename):
+        end = len(compacted) / rate
+        return "two parts", [{"start": 0.0, "end": 1.0, "text": "one"}, {"start": end - 1.0, "end": end, "text": "two"}]
+
+    monkeypatch.setattr(transcriber, "COMPACT_SILENCE", True)
+    monkeypatch.setitem(transcriber.registry._backends, "transcription",
+                        {"name": "fake", "transcribe": None, "segments": segments, "service": None})
+    text, mapped = transcriber.transcribe_audio_segments(audio, "answer_x_1.wav")
+
+    assert text == "two parts"
+    assert 1.7 <= mapped[0]["start"] <= 2.0 and 2.7 <= mapped[0]["end"] <= 3.1
+    assert 5.9 <= mapped[1]["start"] <= 6.2 and 7.0 <= mapped[1]["end"] <= 7.3
@@ -0,0 +1,44 @@
+import numpy as np
+
+from vad import VoiceActivityDetector, FRAME_MS
+
+RATE = 16000
+rng = np.random.default_rng(0)
+
+
+def quiet(ms):
+    return rng.normal(0, 0.001, RATE * ms // 1000).astype(np.float32)
+
+
+def voiced(ms):
+    t = np.arange(RATE * ms // 1000) / RATE
+    return (0.3 * np.sin(2 * np.pi * 200 * t)).astype(np.float32)
+
+
+def feed(vad, audio, block_ms=100):
+    """Feed in recorder-sized blocks; True if the answer ended at any point"""
+    block = RATE * block_ms // 1000
+    return any([vad.process(audio[i:i + block]) for i in range(0, len(audio), block)])
+
+
+def test_short_dips_inside_speech_do_not_start_the_end_silence_timer():
+    vad = VoiceActivityDetector(end_silence_ms=600, hangover_ms=200, min_speech_ms=100)
+    assert not feed(vad, np.concatenate([quiet(300), voiced(1000)]))
+
+    # Two seconds of speech in 60 ms syllables with 120 ms pauses: every burst is
+    # shorter than the onset, but each resumes within the hangover
+    talking = np.concatenate([np.concatenate([quiet(120), voiced(60)]) for _ in range(12)])
+    assert not feed(vad, talking)
+    assert vad.silence_ms < 200
+
+    assert not feed(vad, quiet(400))
+    assert feed(vad, quiet(400))
+
+
+def test_hangover_does_not_extend_a_real_pause():
+    vad = VoiceActivityDetector(end_silence_ms=600, hangover_ms=200, min_speech_ms=100)
+    feed(vad, np.concatenate([quiet(300), voiced(500), quiet(400)]))
+    # A burst after the hangover has expired is a new onset, and too short to be one
+    feed(vad, voiced(60))
+    assert vad.silence_ms >= 400 - FRAME_MS
+    assert feed(vad, quiet(300))
@@ -1,80 +1,257 @@
 import os
-import whisper
+import re
+from backends import registry
+from metrics import TRANSCRIPTION_SECONDS, FALLBACKS
+from config import (COMPACT_SILENCE, TRANSCRIPTION_BACKEND, WHISPER_MODEL_SIZE, WHISPER_QUANTIZE,
+                    FASTER_WHISPER_COMPUTE_TYPE, INFERENCE_WORKERS, INFERENCE_TORCH_THREADS)
+from log import get_logger
 
-# Attempt to use local Whisper model
-USE_LOCAL_WHISPER = True
-try:
-    model = whisper.load_model("base")
+log = get_logger(__name__)
 
-    def transcribe_with_local_whisper(filename):
-        print(f"Transcribing with local Whisper model: {filename}")
-        result = model.transcribe(filename)
-        return result["text"]
+# Backend availability, filled in when the transcription backend first loads
+USE_LOCAL_WHISPER = False
+USE_OPENAI_API = False
 
-    transcribe_audio = transcribe_with_local_whisper
-    print("Using local Whisper model for transcription")
+# Canned answers by question index
+CANNED_ANSWERS = [
+    "I've worked on several technical projects including a web application using React and Node.js...",
+    "I ensure code quality by writing comprehensive test suites including unit and integration tests...",
+    "When debugging complex problems, I first gather all available information including logs...",
+    "I stay current with industry trends by following tech blogs...",
+    "When working in teams, I value clear communication and well-defined responsibilities...",
+    "My approach to learning new technologies is to build small projects that use core functionality...",
+]
+ANSWER_INDEX = re.compile(r"_(\d+)\.wav$")
 
-except (ImportError, OSError, Exception) as e:
-    USE_LOCAL_WHISPER = False
-    print(f"Local Whisper model not available: {e}")
-    print("Trying alternative transcription methods...")
+def transcribe_with_canned_responses(audio, filename):
+    log.warning(f"Would transcribe {filename} (Transcription systems not available)")
+    FALLBACKS.inc(component="transcription")
 
-# Try OpenAI Whisper API if local fails
-if not USE_LOCAL_WHISPER:
-    USE_OPENAI_API = True
+    if "job_role" in filename:
+        roles = ["software engineer", "product manager", "data scientist",
+                 "marketing specialist", "ux designer", "project manager"]
+        import hashlib
+        hash_value = int(hashlib.md5(filename.encode()).hexdigest(), 16) % len(roles)
+        return roles[hash_value]
+
+    # Recordings are named answer_<session>_<question index>.wav (answer_<i>.wav in main.py)
+    match = ANSWER_INDEX.search(os.path.basename(filename))
+    index = int(match.group(1)) if match else None
+    if index is not None and index < len(CANNED_ANSWERS):
+        return CANNED_ANSWERS[index]
+    return "I believe my experience and passion for learning make me a good fit for this role..."
+
+def local_threads():
+    """CPU threads per inference worker, so that workers don't oversubscribe the cores"""
+    return INFERENCE_TORCH_THREADS or max(1, (os.cpu_count() or 1) // max(1, INFERENCE_WORKERS))
+
+def quantize_whisper(model):
+    """Dynamic int8 quantization of a Whisper model's Linear layers, in place (CPU only).
+
+    Weights are stored as int8 and activations are quantized on the fly, which
+    speeds up the encoder and decoder matmuls on CPU. The convolutions and the
+    embedding-tied output projection stay in fp32.
+    """
+    import torch
+    import whisper
+    for module in model.modules():
+        # Whisper's Linear subclass only casts weights to the input dtype, a no-op in fp32;
+        # quantize_dynamic only swaps exact nn.Linear instances
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+def load_whisper_model(size=WHISPER_MODEL_SIZE, quantize=WHISPER_QUANTIZE):
+    """An openai-whisper model on CPU, optionally int8-quantized"""
+    import whisper
+    model = whisper.load_model(size, device="cpu")
+    if quantize:
+        model = quantize_whisper(model)
+    return model
+
+class FasterWhisperModel:
+    """
+    A faster-whisper (CTranslate2) model behind the model.transcribe() interface.
+
+    CTranslate2 runs int8 kernels natively and needs no torch at inference
+    time. transcribe() returns the same dict shape as openai-whisper, so the
+    inference service and StreamingTranscriber can use it unchanged.
+    """
+
+    def __init__(self, size=WHISPER_MODEL_SIZE, compute_type=FASTER_WHISPER_COMPUTE_TYPE, threads=None):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(size, device="cpu", compute_type=compute_type, cpu_threads=threads or local_threads())
+
+    def transcribe(self, audio, language=None, initial_prompt=None, temperature=0.0, **options):
+        segments, info = self.model.transcribe(audio, language=language, initial_prompt=initial_prompt,
+                                               temperature=temperature, beam_size=1)
+        segments = [{"start": s.start, "end": s.end, "text": s.text} for s in segments]
+        return {"text": "".join(s["text"] for s in segments), "segments": segments, "language": info.language}
+
+def load_local_model(backend, size=WHISPER_MODEL_SIZE, quantize=None, threads=None):
+    """Load a local model by backend name ("whisper" or "faster_whisper").
+    `quantize` = None uses the configured precision; True/False forces int8/fp32."""
+    if backend == "faster_whisper":
+        compute_type = FASTER_WHISPER_COMPUTE_TYPE if quantize is None else ("int8" if quantize else "float32")
+        return FasterWhisperModel(size, compute_type=compute_type, threads=threads)
+    if backend == "whisper":
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return load_whisper_model(size, WHISPER_QUANTIZE if quantize is None else quantize)
+    raise ValueError(f"Unknown local transcription backend: {backend}")
+
+def load_local_backend(backend):
+    model = load_local_model(backend)
+
+    # All sessions share one model through a queued, batching worker pool
+    from inference import WhisperInferenceService
+    inference_service = WhisperInferenceService(model, batchable=backend == "whisper")
+
+    def transcribe_segments_with_local_model(audio, filename):
+        # In-memory audio skips the file read and the ffmpeg decode
+        log.debug("Transcribing with local %s model: %s", backend, filename)
+        result = inference_service.transcribe(audio)
+        return result["text"], result.get("segments", [])
+
+    def transcribe_with_local_model(audio, filename):
+        return transcribe_segments_with_local_model(audio, filename)[0]
+
+    log.info(f"Using local {backend} model for transcription ({WHISPER_MODEL_SIZE})")
+    return {"name": backend, "transcribe": transcribe_with_local_model,
+            "segments": transcribe_segments_with_local_model, "service": inference_service}
+
+def load_openai_backend():
+    from openai import OpenAIError
+    from openai_client import get_openai_client
     try:
-        from openai import OpenAI
-        from config import OPENAI_API_KEY
-
-        client = OpenAI(api_key=OPENAI_API_KEY)
-
-        def transcribe_with_openai_api(filename):
-            print(f"Transcribing with OpenAI API: {filename}")
-            try:
-                with open(filename, "rb") as audio_file:
-                    response = client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file
-                    )
-                return response.text
-            except Exception as e:
-                print(f"OpenAI API transcription error: {e}")
-                return "[Transcription failed]"
-
-        transcribe_audio = transcribe_with_openai_api
-        print("Using OpenAI API for transcription")
-
-    except (ImportError, OSError, Exception) as e:
-        USE_OPENAI_API = False
-        print(f"OpenAI API not available for transcription: {e}")
-
-# Fallback if both fail
-if not USE_LOCAL_WHISPER and not USE_OPENAI_API:
-    print("Using simulated transcription with canned responses")
-
-    def transcribe_with_canned_responses(filename):
-        print(f"Would transcribe {filename} (Transcription systems not available)")
-
-        if "job_role" in filename:
-            roles = ["software engineer", "product manager", "data scientist", 
-                     "marketing specialist", "ux designer", "project manager"]
-            import hashlib
-            hash_value = int(hashlib.md5(filename.encode()).hexdigest(), 16) % len(roles)
-            return roles[hash_value]
-
-        if "0" in filename:
-            return "I've worked on several technical projects including a web application using React and Node.js..."
-        elif "1" in filename:
-            return "I ensure code quality by writing comprehensive test suites including unit and integration tests..."
-        elif "2" in filename:
-            return "When debugging complex problems, I first gather all available information including logs..."
-        elif "3" in filename:
-            return "I stay current with industry trends by following tech blogs..."
-        elif "4" in filename:
-            return "When working in teams, I value clear communication and well-defined responsibilities..."
-        elif "5" in filename:
-            return "My approach to learning new technologies is to build small projects that use core functionality..."
-        else:
-            return "I believe my experience and passion for learning make me a good fit for this role..."
-
-    transcribe_audio = transcribe_with_canned_responses
+        client = get_openai_client("transcription")
+    except OpenAIError as e:
+        raise RuntimeError(f"OpenAI client unavailable: {e}")
+
+    def transcribe_with_openai_api(audio, filename):
+        log.debug("Transcribing with OpenAI API: %s", filename)
+        try:
+            if isinstance(audio, str):
+                with open(audio, "rb") as audio_file:
+                    response = client.audio.transcriptions.create(model="whisper-1", file=audio_file)
+            else:
+                # Upload in-memory audio as a WAV without touching the disk
+                from capture_buffer import wav_bytes
+                response = client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=(os.path.basename(filename), wav_bytes(audio), "audio/wav")
+                )
+            return response.text
+        except Exception as e:
+            log.warning(f"OpenAI API transcription error: {e}")
+            return "[Transcription failed]"
+
+    log.info("Using OpenAI API for transcription")
+    return {"name": "openai_api", "transcribe": transcribe_with_openai_api, "segments": None, "service": None}
+
+def load_canned_backend():
+    log.info("Using simulated transcription with canned responses")
+    return {"name": "canned", "transcribe": transcribe_with_canned_responses, "segments": None, "service": None}
+
+TRANSCRIPTION_BACKENDS = {
+    "faster_whisper": lambda: load_local_backend("faster_whisper"),
+    "whisper": lambda: load_local_backend("whisper"),
+    "openai_api": load_openai_backend,
+    "canned": load_canned_backend,
+}
+
+def load_transcription_backend():
+    """Load the configured transcription backend. Runs once, on first use or warm-up.
+
+    With TRANSCRIPTION_BACKEND = "auto", backends are tried fastest first and
+    the first one that loads is used; canned responses always load.
+    """
+    global USE_LOCAL_WHISPER, USE_OPENAI_API
+
+    if TRANSCRIPTION_BACKEND == "auto":
+        candidates = list(TRANSCRIPTION_BACKENDS)
+    else:
+        candidates = [TRANSCRIPTION_BACKEND, "canned"]
+
+    for name in candidates:
+        try:
+            backend = TRANSCRIPTION_BACKENDS[name]()
+        except (ImportError, OSError, RuntimeError, ValueError) as e:
+            # Missing package, model files that can't be read or downloaded, a runtime that
+            # fails to initialize, or an unsupported configuration
+            log.warning(f"Transcription backend {name} not available: {e}")
+            continue
+        USE_LOCAL_WHISPER = backend["service"] is not None
+        USE_OPENAI_API = name == "openai_api"
+        return backend
+
+registry.register("transcription", load_transcription_backend)
+
+def get_transcription_backend():
+    """The loaded backend: {"name", "transcribe", "segments", "service"}"""
+    return registry.get("transcription")
+
+def transcribe_audio(audio, filename=None):
+    """Transcribe with whichever backend is available.
+
+    `audio` is a file path or a 16 kHz float32 array (e.g. CaptureBuffer.audio()).
+    `filename` names in-memory audio for logs and uploads.
+    """
+    if filename is None:
+        filename = audio if isinstance(audio, str) else "answer.wav"
+    backend = get_transcription_backend()
+    with TRANSCRIPTION_SECONDS.time(backend=backend["name"]):
+        if COMPACT_SILENCE and not isinstance(audio, str):
+            audio, _ = prepare_audio(audio)
+        return backend["transcribe"](audio, filename)
+
+def transcribe_audio_segments(audio, filename=None):
+    """transcribe_audio, also returning Whisper's timestamped segments: (text, segments).
+
+    Segment times are in the original recording, also when silence was
+    compacted before decoding. Backends without timestamps (the API and
+    canned responses) return no segments.
+    """
+    if filename is None:
+        filename = audio if isinstance(audio, str) else "answer.wav"
+    backend = get_transcription_backend()
+    if backend["segments"] is None:
+        return transcribe_audio(audio, filename), []
+    time_map = None
+    with TRANSCRIPTION_SECONDS.time(backend=backend["name"]):
+        if COMPACT_SILENCE and not isinstance(audio, str):
+            audio, time_map = prepare_audio(audio)
+        text, segments = backend["segments"](audio, filename)
+    if time_map is not None:
+        segments = time_map.map_segments(segments)
+    return text, segments
+
+def prepare_audio(audio):
+    """Trim and compact silence before decoding, so less audio goes through Whisper.
+    Returns (audio, TimeMap) so timestamps can be mapped back to the recording."""
+    from audio_preprocess import compact_silence
+    compacted, time_map = compact_silence(audio)
+    if time_map.removed_seconds > 0:
+        log.info(f"Compacted answer audio {time_map.original_seconds:.1f}s -> {time_map.compact_seconds:.1f}s")
+    return compacted, time_map
+
+def get_inference_service():
+    """The shared local Whisper service, or None when using another backend"""
+    return get_transcription_backend()["service"]
+
+def create_streaming_transcriber(input_rate=16000):
+    """Start a StreamingTranscriber that decodes audio while it is recorded.
+    `input_rate` defaults to the 16 kHz the recorder hands its listeners.
+
+    Streaming needs the local model; other backends transcribe the finished
+    file, so this returns None for them. It also returns None while the
+    backend is still loading, rather than delaying the start of a recording.
+    """
+    if not registry.is_ready("transcription"):
+        return None
+    inference_service = get_inference_service()
+    if inference_service is None:
+        return None
+    from streaming_transcriber import StreamingTranscriber
+    return StreamingTranscriber(inference_service, input_rate=input_rate)
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from config import TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES
+
+
+def normalize_text(text):
+    """Canonical form of an utterance for cache keys (unicode + whitespace)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def cache_key(text, voice, model):
+    digest = hashlib.sha256()
+    for part in (model, voice, normalize_text(text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class TTSCache:
+    """
+    Content-addressed on-disk cache of synthesized speech.
+
+    Each utterance is stored as <sha256(model, voice, text)>.mp3 in the cache
+    directory. An in-memory index, rebuilt from the directory at startup,
+    tracks entries in least-recently-used order. The oldest files are deleted
+    once the total size exceeds max_bytes. File mtimes are touched on hits,
+    so the LRU order survives restarts.
+    """
+
+    def __init__(self, directory=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # key -> size in bytes, oldest first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".mp3")
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".mp3"):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.total_bytes += size
+
+    def get(self, text, voice, model):
+        """Path of the cached audio, or None on a miss"""
+        key = cache_key(text, voice, model)
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            # Deleted behind our back; forget it
+            with self._lock:
+                self.total_bytes -= self._index.pop(key, 0)
+            return None
+        return path
+
+    def put(self, text, voice, model, data):
+        """Store synthesized audio bytes and return the cached file path"""
+        key = cache_key(text, voice, model)
+        path = self._path(key)
+        # Write to a temp file and rename so readers never see a partial file
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self.total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self.total_bytes += len(data)
+            self._evict_locked(keep=key)
+        return path
+
+    def _evict_locked(self, keep=None):
+        while self.total_bytes > self.max_bytes and len(self._index) > 1:
+            key, size = next(iter(self._index.items()))
+            if key == keep:
+                break
+            del self._index[key]
+            self.total_bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
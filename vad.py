@@ -0,0 +1,143 @@
+import numpy as np
+
+from config import VAD_END_SILENCE_MS, VAD_MARGIN_DB, VAD_HANGOVER_MS, VAD_MIN_SPEECH_MS
+
+FRAME_MS = 20
+CALIBRATION_MS = 200  # Audio used to seed the noise floor before any decisions
+MAX_SPEECH_ZCR = 0.35  # Frames above this zero-crossing rate are hiss or fricative noise, not voiced speech
+FLOOR_ADAPT_RATE = 0.02  # How fast the noise floor follows non-speech frames, per frame
+
+
+def frame_energy_db(frames):
+    """Mean energy of each row of a (n_frames, frame_len) array, in dB"""
+    return 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+
+
+class VoiceActivityDetector:
+    """
+    Frame-level voice activity detection and end-of-answer endpointing.
+
+    Blocks of 16 kHz audio are split into 20 ms frames. Per-frame energy (dB)
+    and zero-crossing rate are computed for the whole block at once in NumPy.
+    A frame counts as speech when its energy is `margin_db` above an adaptive
+    noise floor. Frames that are only slightly above the floor must also have
+    a voiced-speech zero-crossing rate.
+
+    Speech starts after `min_speech_ms` of consecutive speech frames, which
+    rejects clicks. It then holds for `hangover_ms` after each speech frame.
+    Speech that resumes within the hangover continues the same stretch,
+    however short the burst, and the dip before it counts as speech. So
+    pauses between words don't start the end-silence timer. process()
+    returns True once the candidate has spoken and `end_silence_ms` of
+    silence have followed.
+    """
+
+    def __init__(self, sample_rate=16000, end_silence_ms=VAD_END_SILENCE_MS, margin_db=VAD_MARGIN_DB,
+                 hangover_ms=VAD_HANGOVER_MS, min_speech_ms=VAD_MIN_SPEECH_MS):
+        self.frame_len = sample_rate * FRAME_MS // 1000
+        self.end_silence_frames = max(1, end_silence_ms // FRAME_MS)
+        self.hangover_frames = max(1, hangover_ms // FRAME_MS)
+        self.min_speech_frames = max(1, min_speech_ms // FRAME_MS)
+        self.margin_db = margin_db
+        self.calibration_frames = CALIBRATION_MS // FRAME_MS
+
+        self.noise_floor_db = None
+        self.frames = 0  # Frames processed so far
+        self.speech_frames = 0
+        self.last_speech_frame = None  # Index of the last frame of confirmed speech
+        self.has_spoken = False
+        self.ended = False
+
+        self._pending = np.zeros(0, dtype=np.float32)  # Samples short of a full frame
+        self._run = 0  # Consecutive speech frames carried across blocks
+        self._calibration = []
+
+    @property
+    def silence_ms(self):
+        """Silence since the last speech frame (or since the start)"""
+        last = -1 if self.last_speech_frame is None else self.last_speech_frame
+        return (self.frames - 1 - last) * FRAME_MS
+
+    @property
+    def speaking(self):
+        return self.last_speech_frame is not None and self.frames - 1 - self.last_speech_frame < self.hangover_frames
+
+    def process(self, audio):
+        """Feed a block of 16 kHz float32 audio; returns True once the answer has ended"""
+        audio = np.concatenate((self._pending, np.asarray(audio, dtype=np.float32).reshape(-1)))
+        n_frames = len(audio) // self.frame_len
+        self._pending = audio[n_frames * self.frame_len:]
+        if not n_frames:
+            return self.ended
+
+        frames = audio[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        energy_db = frame_energy_db(frames)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_len - 1)
+
+        if self.noise_floor_db is None:
+            self._calibration.append(energy_db)
+            seen = np.concatenate(self._calibration)
+            if len(seen) < self.calibration_frames:
+                self.frames += n_frames
+                return False
+            # A low percentile ignores speech that started during calibration
+            self.noise_floor_db = float(np.percentile(seen, 20))
+            self._calibration = None
+
+        above = energy_db - self.noise_floor_db
+        speech = (above > 2 * self.margin_db) | ((above > self.margin_db) & (zcr < MAX_SPEECH_ZCR))
+
+        # Onset needs min_speech_frames in a row; a convolution counts runs across the block
+        if self.min_speech_frames > 1:
+            carried = np.zeros(self.min_speech_frames - 1, dtype=bool)
+            carried[max(0, len(carried) - self._run):] = True
+            flags = np.concatenate((carried, speech))
+            runs = np.convolve(flags, np.ones(self.min_speech_frames, dtype=int), mode="valid")
+            confirmed = runs >= self.min_speech_frames
+        else:
+            confirmed = speech
+
+        # Length of the speech run still open at the end of the block
+        gaps = np.flatnonzero(~speech)
+        self._run = n_frames - 1 - gaps[-1] if len(gaps) else self._run + n_frames
+
+        # Walk the speech frames in order: each one either confirms an onset or, within the
+        # hangover of the previous one, continues it (bridging the dip in between)
+        last = self.last_speech_frame
+        for i in np.flatnonzero(speech):
+            frame = self.frames + int(i)
+            if last is not None and frame - last <= self.hangover_frames:
+                self.speech_frames += frame - last
+            elif confirmed[i]:
+                self.speech_frames += self.min_speech_frames  # The run that confirmed the onset
+            else:
+                continue
+            last = frame
+        if last != self.last_speech_frame:
+            self.has_spoken = True
+            self.last_speech_frame = last
+
+        # Track the floor with the quieter non-speech frames; fall immediately if it gets quieter
+        quiet = energy_db[~speech]
+        if len(quiet):
+            level = float(np.median(quiet))
+            if level < self.noise_floor_db:
+                self.noise_floor_db = level
+            else:
+                # Same rate per frame whatever the block size
+                rate = 1.0 - (1.0 - FLOOR_ADAPT_RATE) ** len(quiet)
+                self.noise_floor_db += rate * (level - self.noise_floor_db)
+
+        self.frames += n_frames
+        if self.has_spoken and self.silence_ms >= self.end_silence_frames * FRAME_MS:
+            self.ended = True
+        return self.ended
+
+    def stats(self):
+        return {
+            "seconds": self.frames * FRAME_MS / 1000,
+            "speech_seconds": self.speech_frames * FRAME_MS / 1000,
+            "noise_floor_db": self.noise_floor_db,
+            "ended": self.ended,
+        }